@@ -8,4 +8,38 @@ class AccountAdmin(admin.ModelAdmin):
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
-    list_display = ["id", "account", "date", "type", "amount", "balance_after"]
\ No newline at end of file
+    list_display = ["id", "account", "date", "type", "amount", "balance_after", "counterparty"]
+
+@admin.register(BalanceSnapshot)
+class BalanceSnapshotAdmin(admin.ModelAdmin):
+    list_display = ["id", "account", "day", "balance"]
+
+@admin.register(DailySummary)
+class DailySummaryAdmin(admin.ModelAdmin):
+    list_display = ["id", "account", "day", "type", "total", "count"]
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ["id", "key", "status_code", "created_at"]
+
+@admin.register(ArchivedPeriod)
+class ArchivedPeriodAdmin(admin.ModelAdmin):
+    list_display = ["id", "period", "transactions", "started_at", "completed_at"]
+
+@admin.register(QueuedMovement)
+class QueuedMovementAdmin(admin.ModelAdmin):
+    list_display = ["id", "account", "type", "amount", "status", "transaction", "created_at", "processed_at"]
+
+@admin.register(LedgerEvent)
+class LedgerEventAdmin(admin.ModelAdmin):
+    list_display = ["sequence", "account", "date", "type", "amount", "balance_after", "transaction", "recorded_at"]
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(ProjectionCheckpoint)
+class ProjectionCheckpointAdmin(admin.ModelAdmin):
+    list_display = ["id", "name", "sequence", "updated_at"]
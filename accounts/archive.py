@@ -0,0 +1,78 @@
+"""
+Monthly archiving of transactions.
+
+Closed months are moved, oldest first and in batches, from the transaction
+table to ArchivedTransaction (partitioned by ``period``, the first day of the
+month), so the transaction table and its statement indexes only hold recent
+history. Statements read the StatementEntry view over both tables;
+TransactionFilter prunes it to the table(s) the requested date range can
+touch, using the horizons of the archived months.
+
+The horizons are read from the database for every statement (one aggregate
+over the small ArchivedPeriod table), never from a cache: archiving runs in
+another process, and stale horizons would prune archived rows out of
+statements.
+"""
+import datetime
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ArchivedPeriod, ArchivedTransaction, Transaction, month_start, next_month
+from .retries import retry_on_lock
+
+ARCHIVED_FIELDS = ['id', 'account_id', 'date', 'type', 'amount', 'balance_after', 'counterparty_id']
+
+
+def month_bounds(period):
+    start = datetime.datetime.combine(period, datetime.time.min, tzinfo=datetime.timezone.utc)
+    return start, datetime.datetime.combine(next_month(period), datetime.time.min, tzinfo=datetime.timezone.utc)
+
+
+def closed_periods(before):
+    """
+    Return the months with transactions dated before ``before`` (a first day of month), oldest first.
+    """
+    first = Transaction.objects.filter(date__lt=month_bounds(before)[0]).order_by('date').values_list('date', flat=True).first()
+    periods = []
+    period = None if first is None else month_start(first.astimezone(datetime.timezone.utc).date())
+    while period is not None and period < before:
+        periods.append(period)
+        period = next_month(period)
+    return periods
+
+
+@retry_on_lock
+def archive_batch(period, batch_size):
+    """
+    Move up to ``batch_size`` transactions of ``period`` to the archive in one
+    database transaction and return how many were moved; marks the month as
+    completed once none are left.
+    """
+    start, end = month_bounds(period)
+    with transaction.atomic():
+        archived, created = ArchivedPeriod.objects.get_or_create(period=period)
+        rows = list(
+            Transaction.objects.filter(date__gte=start, date__lt=end)
+            .order_by('id').values(*ARCHIVED_FIELDS)[:batch_size]
+        )
+        if rows:
+            ArchivedTransaction.objects.bulk_create([ArchivedTransaction(period=period, **row) for row in rows])
+            Transaction.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+            ArchivedPeriod.objects.filter(pk=archived.pk).update(transactions=F('transactions') + len(rows))
+        if len(rows) < batch_size:
+            ArchivedPeriod.objects.filter(pk=archived.pk).update(completed_at=timezone.now())
+    return len(rows)
+
+
+def archive_period(period, batch_size=1000):
+    """
+    Move every transaction of ``period`` to the archive, ``batch_size`` at a time; returns how many were moved.
+    """
+    moved = 0
+    while True:
+        batch = archive_batch(period, batch_size)
+        moved += batch
+        if batch < batch_size:
+            return moved
@@ -0,0 +1,186 @@
+"""
+Async (ASGI) variants of the account and transaction endpoints.
+
+These are plain Django async views on the async ORM (``aget``, ``acreate``,
+``acount``, async iteration), so under ASGI a request does not hop to a
+worker thread the way the sync DRF generics do. Serializers are only used to
+validate and encode data, never to query. Posting a transaction still runs
+Transaction.save in a thread (through ``asave``) because Django has no async
+``transaction.atomic()``.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError
+from django.http import JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .filters import TransactionFilter
+from .models import Account, InsufficientFunds, StatementEntry, Transaction
+from .pagination import StandardResultsSetPagination, cached_count
+from .serializers import AccountSerializer, TransactionBulkItemSerializer, TransactionRowSerializer, TransactionSerializer
+
+
+class AsyncAccountSerializer(AccountSerializer):
+    """
+    AccountSerializer without the synchronous IBAN uniqueness validator;
+    AsyncAccountListCreate checks uniqueness with an async query instead.
+    """
+    iban = serializers.CharField(max_length=34)
+
+
+class AsyncAPIView(View):
+    """
+    Base for the async views. Like DRF's APIView they are exempt from CSRF checks.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+
+def error_response(errors, status=400):
+    return JsonResponse(errors, status=status)
+
+
+def not_found(model):
+    return error_response({'detail': f'No {model._meta.object_name} matches the given query.'}, status=404)
+
+
+def not_found_page():
+    return error_response({'detail': 'Invalid page.'}, status=404)
+
+
+def read_json(request):
+    try:
+        return json.loads(request.body or b'{}')
+    except ValueError as exc:
+        raise ValueError(f'JSON parse error - {exc}')
+
+
+class AsyncAccountListCreate(AsyncAPIView):
+    """
+    Async API view to list and create accounts.
+    """
+    read_from_replica = True
+
+    async def get(self, request, *args, **kwargs):
+        accounts = [AccountSerializer(account).data async for account in Account.objects.order_by('pk')]
+        return JsonResponse(accounts, safe=False)
+
+    async def post(self, request, *args, **kwargs):
+        try:
+            serializer = AsyncAccountSerializer(data=read_json(request))
+        except ValueError as exc:
+            return error_response({'detail': str(exc)})
+        if not serializer.is_valid():
+            return error_response(serializer.errors)
+        duplicate = {'iban': ['account with this iban already exists.']}
+        if await Account.objects.filter(iban=serializer.validated_data['iban']).aexists():
+            return error_response(duplicate)
+        try:
+            account = await Account.objects.acreate(**serializer.validated_data)
+        except IntegrityError:
+            return error_response(duplicate)
+        return JsonResponse(AccountSerializer(account).data, status=201)
+
+
+class AsyncAccountDetail(AsyncAPIView):
+    """
+    Async API view to retrieve an account.
+    """
+    read_from_replica = True
+
+    async def get(self, request, pk, *args, **kwargs):
+        try:
+            account = await Account.objects.aget(pk=pk)
+        except Account.DoesNotExist:
+            return not_found(Account)
+        return JsonResponse(AccountSerializer(account).data)
+
+
+class AsyncTransactionListCreate(AsyncAPIView):
+    """
+    Async API view to list and create transactions.
+
+    - GET: The statement with the type/date filters, date ordering and page-number pagination of TransactionListCreate.
+    - POST: Post a transaction; an account without sufficient funds is rejected by the guarded balance update.
+    """
+
+    pagination = StandardResultsSetPagination
+    read_from_replica = True
+
+    async def get(self, request, *args, **kwargs):
+        filterset = TransactionFilter(request.GET, queryset=StatementEntry.objects.order_by('-date'))
+        if not filterset.is_valid():
+            return error_response(filterset.errors)
+        # Pruning may look the archive horizons up in the database.
+        queryset = await sync_to_async(lambda: filterset.qs)()
+        ordering = request.GET.get('ordering')
+        if ordering in ('date', '-date'):
+            queryset = queryset.order_by(ordering)
+
+        try:
+            page = int(request.GET.get('page', 1))
+            page_size = int(request.GET.get(self.pagination.page_size_query_param, self.pagination.page_size))
+        except ValueError:
+            return not_found_page()
+        page_size = min(max(page_size, 1), self.pagination.max_page_size)
+        count, exact = await sync_to_async(cached_count)(queryset)
+        if page < 1 or (exact and (page - 1) * page_size >= max(count, 1)):
+            return not_found_page()
+
+        rows = TransactionRowSerializer()
+        offset = (page - 1) * page_size
+        # One row more than the page tells whether a next page exists when the count is an estimate.
+        results = [rows.to_representation(row) async for row in rows.select(queryset)[offset:offset + page_size + 1]]
+        has_next = offset + page_size < count if exact else len(results) > page_size
+        results = results[:page_size]
+        if not results and page > 1:
+            return not_found_page()
+        url = request.build_absolute_uri()
+        next_url = replace_query_param(url, 'page', page + 1) if has_next else None
+        if page == 1:
+            previous_url = None
+        elif page == 2:
+            previous_url = remove_query_param(url, 'page')
+        else:
+            previous_url = replace_query_param(url, 'page', page - 1)
+        return JsonResponse({'count': count, 'count_exact': exact, 'next': next_url, 'previous': previous_url,
+                             'results': results})
+
+    async def post(self, request, *args, **kwargs):
+        try:
+            data = read_json(request) if request.content_type == 'application/json' else request.POST.dict()
+        except ValueError as exc:
+            return error_response({'detail': str(exc)})
+        serializer = TransactionBulkItemSerializer(data=data)
+        if not serializer.is_valid():
+            return error_response(serializer.errors)
+        account_id = serializer.validated_data['account']
+        if not await Account.objects.filter(pk=account_id).aexists():
+            return error_response({'account': [f'Invalid pk "{account_id}" - object does not exist.']})
+        transaction = Transaction(account_id=account_id, type=serializer.validated_data['type'],
+                                  amount=serializer.validated_data['amount'])
+        try:
+            await transaction.asave()
+        except InsufficientFunds as exc:
+            return error_response({api_settings.NON_FIELD_ERRORS_KEY: exc.messages})
+        return JsonResponse(TransactionSerializer(transaction).data, status=201)
+
+
+class AsyncTransactionDetail(AsyncAPIView):
+    """
+    Async API view to retrieve a transaction.
+    """
+
+    async def get(self, request, pk, *args, **kwargs):
+        try:
+            transaction = await Transaction.objects.aget(pk=pk)
+        except Transaction.DoesNotExist:
+            return not_found(Transaction)
+        return JsonResponse(TransactionSerializer(transaction).data)
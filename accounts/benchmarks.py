@@ -0,0 +1,915 @@
+"""
+Benchmarks for the accounts ledger.
+
+Scenarios are run with ``python manage.py benchmark <scenario>``. Each one
+creates its own accounts (IBANs prefixed with ``BENCH``) in the configured
+database and removes them when it is done, and returns one result row per
+measured configuration.
+"""
+import asyncio
+import datetime
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import statistics
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from decimal import Decimal
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections
+from django.db.models import Sum
+from django.test import AsyncClient, Client, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from .ledger import QUEUE_BATCH_SIZE, drain_queue, post_movements, post_transfers
+from .models import Account, IdempotencyKey, InsufficientFunds, Transaction
+from .money import money_storage, stored_as
+from .pagination import KeysetPagination
+from .serializers import TransactionRowSerializer, TransactionSerializerBasic
+
+BENCH_IBAN_PREFIX = 'BENCH'
+DATASET_IBAN_PREFIX = f'{BENCH_IBAN_PREFIX}DATA'
+DATASETS = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+OPENING_BALANCE = Decimal('1000000.00')
+POST_AMOUNT = Decimal('1.00')
+
+SCENARIOS = {}
+
+
+def argument(*args, **kwargs):
+    return args, kwargs
+
+
+def scenario(name, *arguments):
+    """
+    Register a benchmark scenario together with its command-line arguments.
+    """
+    def register(func):
+        SCENARIOS[name] = (func, arguments)
+        return func
+    return register
+
+
+def create_accounts(count, balance=OPENING_BALANCE):
+    prefix = f'{BENCH_IBAN_PREFIX}{uuid.uuid4().hex[:12].upper()}'
+    Account.objects.bulk_create(
+        Account(iban=f'{prefix}{n:08d}', balance=balance) for n in range(count)
+    )
+    return list(Account.objects.filter(iban__startswith=prefix).order_by('pk').values_list('pk', flat=True))
+
+
+def cleanup(keep_datasets=False):
+    accounts = Account.objects.filter(iban__startswith=BENCH_IBAN_PREFIX)
+    if keep_datasets:
+        accounts = accounts.exclude(iban__startswith=DATASET_IBAN_PREFIX)
+    accounts.delete()
+
+
+# Scenarios measuring whole request/response cycles drive the API with the
+# in-process test client; this lets its requests through host validation.
+serve_any_host = override_settings(ALLOWED_HOSTS=['*'])
+# Timed reads measure the database path; the read-through cache would
+# otherwise answer every repeated request after the first.
+uncached = override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+
+
+def seed_transactions(account_ids, count, batch_size=10000, days=0):
+    """
+    Insert ``count`` deposits spread over ``account_ids`` with bulk_create.
+    Balances are not maintained; this only provides rows to read back.
+
+    With ``days``, the rows cycle through all transaction types and each
+    batch is dated a little later than the previous one, so the history
+    covers the last ``days`` days for date filters to select from.
+    """
+    kinds = [kind for kind, _ in Transaction.TRANSACTION_TYPES] if days else [Transaction.DEPOSIT]
+    batches = range(0, count, batch_size)
+    step = datetime.timedelta(days=days) / max(len(batches), 1)
+    first_day = timezone.now() - datetime.timedelta(days=days)
+    for number, start in enumerate(batches):
+        created = Transaction.objects.bulk_create(
+            Transaction(account_id=account_ids[n % len(account_ids)], type=kinds[n % len(kinds)],
+                        amount=POST_AMOUNT, balance_after=POST_AMOUNT)
+            for n in range(start, min(start + batch_size, count))
+        )
+        if days:
+            Transaction.objects.filter(pk__gte=created[0].pk, pk__lte=created[-1].pk).update(date=first_day + step * number)
+
+
+def load_dataset(name, accounts, days=365):
+    """
+    Return the account ids of the named dataset (see DATASETS), seeding it
+    unless a complete copy kept by an earlier run (--keep-dataset) exists.
+    """
+    prefix = f'{DATASET_IBAN_PREFIX}{name.upper()}-'
+    existing = Account.objects.filter(iban__startswith=prefix)
+    account_ids = list(existing.order_by('pk').values_list('pk', flat=True))
+    if (len(account_ids) == accounts
+            and Transaction.objects.filter(account_id__in=existing.values('pk')).count() == DATASETS[name]):
+        return account_ids
+    existing.delete()
+    Account.objects.bulk_create(Account(iban=f'{prefix}{n:08d}', balance=OPENING_BALANCE) for n in range(accounts))
+    account_ids = list(existing.order_by('pk').values_list('pk', flat=True))
+    seed_transactions(account_ids, DATASETS[name], days=days)
+    return account_ids
+
+
+def timed_get(client, path, params, repeat):
+    """
+    Median and worst wall time in milliseconds of ``repeat`` identical GETs.
+    """
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(path, params)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.status_code
+    return round(statistics.median(samples), 2), round(max(samples), 2)
+
+
+def _timings(samples):
+    """
+    Median, 95th percentile and throughput of request wall times in seconds.
+    """
+    samples = sorted(samples)
+    median = statistics.median(samples)
+    return {
+        'median_ms': round(median * 1000, 3),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 3),
+        'ops_per_second': round(1 / median, 1),
+    }
+
+
+def _timed_requests(request, repeat):
+    """
+    Call ``request`` once to warm up, then ``repeat`` timed times; it must answer 2xx.
+    """
+    samples = []
+    for n in range(repeat + 1):
+        started = time.perf_counter()
+        response = request()
+        elapsed = time.perf_counter() - started
+        assert 200 <= response.status_code < 300, (response.status_code, getattr(response, 'data', None))
+        if n:
+            samples.append(elapsed)
+    return _timings(samples)
+
+
+def _parse_counts(value):
+    return [int(part) for part in str(value).split(',') if part]
+
+
+def _post_worker(account_id, posts):
+    """
+    Alternate deposits and withdrawals against one account through
+    Transaction.save, returning (net amount posted, failed posts).
+    """
+    net, errors = Decimal('0'), 0
+    for n in range(posts):
+        kind = Transaction.DEPOSIT if n % 2 == 0 else Transaction.WITHDRAWAL
+        movement = Transaction(account_id=account_id, type=kind, amount=POST_AMOUNT)
+        try:
+            movement.save()
+        except (InsufficientFunds, OperationalError):
+            errors += 1
+        else:
+            net += movement.signed_amount
+    connections.close_all()
+    return net, errors
+
+
+@scenario(
+    'posting',
+    argument('--workers', default='1,2,4,8', help='Comma-separated worker counts to measure.'),
+    argument('--posts', type=int, default=200, help='Transactions posted by each worker.'),
+    argument('--mode', choices=['threads', 'processes'], default='threads'),
+    argument('--contention', choices=['shared', 'distinct', 'both'], default='both',
+             help='Post to one shared account or to one account per worker.'),
+)
+def posting(workers, posts, mode, contention, **options):
+    """
+    Concurrent Transaction.save throughput, checking that no update is lost.
+    """
+    layouts = ['shared', 'distinct'] if contention == 'both' else [contention]
+    results = []
+    for layout in layouts:
+        for count in _parse_counts(workers):
+            account_ids = create_accounts(1 if layout == 'shared' else count)
+            targets = [account_ids[n % len(account_ids)] for n in range(count)]
+            connections.close_all()
+            if mode == 'threads':
+                executor = ThreadPoolExecutor(max_workers=count)
+            else:
+                executor = ProcessPoolExecutor(max_workers=count, mp_context=get_context('fork'))
+            started = time.perf_counter()
+            with executor:
+                outcomes = list(executor.map(_post_worker, targets, [posts] * count))
+            elapsed = time.perf_counter() - started
+
+            expected = OPENING_BALANCE * len(account_ids) + sum(net for net, _ in outcomes)
+            actual = sum(Account.objects.filter(pk__in=account_ids).values_list('balance', flat=True))
+            posted = count * posts - sum(errors for _, errors in outcomes)
+            results.append({
+                'mode': mode,
+                'accounts': layout,
+                'workers': count,
+                'posted': posted,
+                'failed': count * posts - posted,
+                'seconds': round(elapsed, 3),
+                'posts_per_second': round(posted / elapsed, 1),
+                'lost_updates': actual != expected,
+            })
+            cleanup()
+    return results
+
+
+def _movements(account_ids, rows, seed=0):
+    generator = random.Random(seed)
+    kinds = [Transaction.DEPOSIT, Transaction.WITHDRAWAL, Transaction.TRANSFER]
+    return [
+        {'account': generator.choice(account_ids), 'type': generator.choice(kinds),
+         'amount': f'{generator.randint(1, 50000) / 100:.2f}'}
+        for _ in range(rows)
+    ]
+
+
+@scenario(
+    'bulk',
+    argument('--rows', default='1000,10000', help='Comma-separated batch sizes to measure.'),
+    argument('--accounts', type=int, default=50, help='Accounts the rows are spread over.'),
+    argument('--single-rows', type=int, default=500,
+             help='Rows posted one by one to measure the single-row path.'),
+)
+def bulk(rows, accounts, single_rows, **options):
+    """
+    Throughput of POST /api/transactions/bulk/ against one POST per row.
+    """
+    results = []
+    with serve_any_host:
+        client = Client()
+        account_ids = create_accounts(accounts)
+        started = time.perf_counter()
+        for movement in _movements(account_ids, single_rows):
+            client.post('/api/transactions/', movement, content_type='application/json')
+        elapsed = time.perf_counter() - started
+        results.append({'path': 'single', 'rows': single_rows, 'seconds': round(elapsed, 3),
+                        'rows_per_second': round(single_rows / elapsed, 1)})
+        cleanup()
+
+        for count in _parse_counts(rows):
+            account_ids = create_accounts(accounts)
+            body = json.dumps(_movements(account_ids, count))
+            started = time.perf_counter()
+            client.post('/api/transactions/bulk/', body, content_type='application/json')
+            elapsed = time.perf_counter() - started
+            results.append({'path': 'bulk', 'rows': count, 'seconds': round(elapsed, 3),
+                            'rows_per_second': round(count / elapsed, 1)})
+            cleanup()
+    return results
+
+
+def _transfers(account_ids, count, seed=0):
+    generator = random.Random(seed)
+    return [
+        {'source': source, 'destination': destination, 'amount': Decimal(generator.randint(1, 10000)) / 100}
+        for source, destination in (generator.sample(account_ids, 2) for _ in range(count))
+    ]
+
+
+def _transfer_worker(transfers, batch_size):
+    """
+    Execute ``transfers`` through post_transfers in batches of ``batch_size``,
+    returning the number rejected or failed.
+    """
+    failed = 0
+    for start in range(0, len(transfers), batch_size):
+        try:
+            outcomes = post_transfers(transfers[start:start + batch_size])
+        except OperationalError:
+            failed += min(batch_size, len(transfers) - start)
+        else:
+            failed += sum(1 for outcome in outcomes if not isinstance(outcome, tuple))
+    connections.close_all()
+    return failed
+
+
+@scenario(
+    'transfers',
+    argument('--workers', default='1,4,8', help='Comma-separated worker thread counts to measure.'),
+    argument('--transfers', type=int, default=400, help='Transfers executed by each worker.'),
+    argument('--accounts', type=int, default=4, help='Accounts the transfers move money between.'),
+    argument('--batch-sizes', default='1,100', help='Comma-separated numbers of transfers per database transaction.'),
+)
+def transfers(workers, transfers, accounts, batch_sizes, **options):
+    """
+    Two-sided transfer throughput under contention, checking that no money is created or lost.
+    """
+    results = []
+    for batch_size in _parse_counts(batch_sizes):
+        for count in _parse_counts(workers):
+            account_ids = create_accounts(accounts)
+            work = [_transfers(account_ids, transfers, seed=n) for n in range(count)]
+            connections.close_all()
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=count) as executor:
+                failed = sum(executor.map(_transfer_worker, work, [batch_size] * count))
+            elapsed = time.perf_counter() - started
+
+            total = sum(Account.objects.filter(pk__in=account_ids).values_list('balance', flat=True))
+            executed = count * transfers - failed
+            results.append({
+                'batch_size': batch_size,
+                'workers': count,
+                'executed': executed,
+                'failed': failed,
+                'seconds': round(elapsed, 3),
+                'transfers_per_second': round(executed / elapsed, 1),
+                'money_conserved': total == OPENING_BALANCE * accounts,
+            })
+            cleanup()
+    return results
+
+
+@scenario(
+    'idempotency',
+    argument('--requests', type=int, default=200, help='Distinct deposits to post.'),
+    argument('--retries', type=int, default=5, help='Times each deposit is sent.'),
+    argument('--concurrency', type=int, default=8, help='Concurrent clients.'),
+)
+def idempotency(requests, retries, concurrency, **options):
+    """
+    Retry storm: deposits written per distinct request with and without Idempotency-Key.
+    """
+    results = []
+    run = uuid.uuid4().hex
+    with serve_any_host:
+        for keyed in (False, True):
+            account_id = create_accounts(1)[0]
+            body = {'account': account_id, 'type': Transaction.DEPOSIT, 'amount': '1.00'}
+            attempts = [n for n in range(requests) for _ in range(retries)]
+            headers = (lambda n: {'HTTP_IDEMPOTENCY_KEY': f'{run}-{n}'}) if keyed else (lambda n: {})
+            statuses = Counter()
+
+            def send(client, n):
+                try:
+                    response = client.post('/api/transactions/', body, content_type='application/json', **headers(n))
+                except OperationalError:
+                    statuses['failed'] += 1
+                else:
+                    statuses['replayed' if response.has_header('Idempotent-Replayed') else response.status_code] += 1
+
+            pending = iter(attempts)
+            latencies, elapsed = _wsgi_load(lambda client: send(client, next(pending)), len(attempts), concurrency)
+            written = Transaction.objects.filter(account_id=account_id).count()
+            results.append({
+                'idempotency_key': keyed,
+                'requests': requests,
+                'sent': len(attempts),
+                'replayed': statuses['replayed'],
+                'failed': statuses['failed'],
+                'written': written,
+                'writes_per_request': round(written / requests, 2),
+                **_latency_summary(latencies, elapsed),
+            })
+            cleanup()
+    IdempotencyKey.objects.filter(key__startswith=run).delete()
+    return results
+
+
+class _WriteCounter:
+    """
+    Database execute wrapper counting INSERT, UPDATE and DELETE statements from any thread.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip()[:6].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+            with self.lock:
+                self.count += 1
+        return execute(sql, params, many, context)
+
+
+@scenario(
+    'queue',
+    argument('--requests', type=int, default=500, help='Deposits to post in each mode.'),
+    argument('--accounts', type=int, default=10, help='Accounts the deposits are spread over.'),
+    argument('--concurrency', type=int, default=4, help='Concurrent clients.'),
+    argument('--batch-size', type=int, default=QUEUE_BATCH_SIZE, help='Queued movements posted per worker batch.'),
+)
+def queue(requests, accounts, concurrency, batch_size, **options):
+    """
+    POST /api/transactions/ latency and writes per movement, posted in the request or through the posting queue.
+    """
+    results = []
+    with serve_any_host:
+        for mode in ('sync', 'queued'):
+            account_ids = create_accounts(accounts)
+            headers = {'HTTP_PREFER': 'respond-async'} if mode == 'queued' else {}
+            writes = _WriteCounter()
+            pending = iter(range(requests))
+
+            def send(client):
+                body = {'account': account_ids[next(pending) % accounts], 'type': Transaction.DEPOSIT, 'amount': '1.00'}
+                with connection.execute_wrapper(writes):
+                    response = client.post('/api/transactions/', body, content_type='application/json', **headers)
+                assert response.status_code in (201, 202), response.status_code
+
+            latencies, elapsed = _wsgi_load(send, requests, concurrency)
+            started = time.perf_counter()
+            with connection.execute_wrapper(writes):
+                while drain_queue(batch_size):
+                    pass
+            drained = time.perf_counter() - started
+            posted = Transaction.objects.filter(account_id__in=account_ids).count()
+            results.append({
+                'mode': mode,
+                'requests': requests,
+                'posted': posted,
+                'writes_per_movement': round(writes.count / requests, 2),
+                **_latency_summary(latencies, elapsed),
+                'drain_seconds': round(drained, 3),
+                'posted_per_second': round(posted / (elapsed + drained), 1),
+            })
+            cleanup()
+    return results
+
+
+@scenario(
+    'suite',
+    argument('--dataset', choices=list(DATASETS), default='10k', help='Seeded transactions to run against.'),
+    argument('--accounts', type=int, default=1000, help='Accounts the dataset is spread over.'),
+    argument('--repeat', type=int, default=20, help='Timed requests per read benchmark.'),
+    argument('--posts', type=int, default=200, help='Transactions posted by the write benchmarks.'),
+    argument('--workers', type=int, default=4, help='Concurrent clients of the concurrent posting benchmark.'),
+    argument('--keep-dataset', action='store_true', help='Keep the seeded dataset for the next run.'),
+)
+def suite(dataset, accounts, repeat, posts, workers, **options):
+    """
+    Repeatable API suite over a seeded dataset: posting, statement listing and filtering, deep pagination, accounts.
+    """
+    account_ids = load_dataset(dataset, accounts)
+    page_size = 100
+    total = Transaction.objects.count()
+    deep_page = max(1, min(total // page_size // 2, 10000))
+    date, pk = Transaction.objects.order_by('-date', '-id').values_list('date', 'id')[(deep_page - 1) * page_size]
+    last_month = (timezone.now() - datetime.timedelta(days=30)).date().isoformat()
+    account_id = account_ids[0]
+    reads = [
+        ('account_list', '/api/accounts/', {}),
+        ('account_detail', f'/api/accounts/{account_id}/', {}),
+        ('statement_first_page', '/api/transactions/', {'page_size': page_size}),
+        ('statement_ordered', '/api/transactions/', {'ordering': 'date', 'page_size': page_size}),
+        ('statement_filtered', '/api/transactions/', {'type': Transaction.WITHDRAWAL, 'start_date': last_month, 'page_size': page_size}),
+        ('statement_deep_page', '/api/transactions/', {'page': deep_page, 'page_size': page_size}),
+        ('statement_deep_cursor', '/api/transactions/', {'cursor': KeysetPagination.make_cursor(date, pk), 'page_size': page_size}),
+        ('account_statement', f'/api/accounts/{account_id}/transactions/', {'page_size': page_size}),
+        ('account_statement_filtered', f'/api/accounts/{account_id}/transactions/', {'type': Transaction.DEPOSIT, 'start_date': last_month, 'page_size': page_size}),
+    ]
+
+    results = []
+    with serve_any_host:
+        client = Client()
+        with uncached:
+            for name, path, params in reads:
+                results.append({'benchmark': name, 'dataset': dataset,
+                                **_timed_requests(lambda: client.get(path, params), repeat)})
+            body = {'account': create_accounts(1)[0], 'type': Transaction.DEPOSIT, 'amount': '1.00'}
+            results.append({'benchmark': 'post_single', 'dataset': dataset, **_timed_requests(
+                lambda: client.post('/api/transactions/', body, content_type='application/json'), posts)})
+
+            targets = iter(create_accounts(posts))
+            failed = Counter()
+
+            def post(client):
+                body = {'account': next(targets), 'type': Transaction.DEPOSIT, 'amount': '1.00'}
+                try:
+                    client.post('/api/transactions/', body, content_type='application/json')
+                except OperationalError:
+                    failed['posts'] += 1
+            latencies, elapsed = _wsgi_load(post, posts, workers)
+            summary = _latency_summary(latencies, elapsed)
+            results.append({'benchmark': f'post_concurrent_{workers}', 'dataset': dataset,
+                            'median_ms': summary['p50_ms'], 'p95_ms': _timings(latencies)['p95_ms'],
+                            'ops_per_second': round((posts - failed['posts']) / elapsed, 1)})
+
+        for name, path, params in reads[1:3]:
+            results.append({'benchmark': f'{name}_cached', 'dataset': dataset,
+                            **_timed_requests(lambda: client.get(path, params), repeat)})
+    return results
+
+
+STOCK_SQLITE_OPTIONS = {'init_command': 'PRAGMA journal_mode=DELETE'}
+
+
+def _sqlite_mixed_load(account_ids, readers, duration):
+    """
+    One thread posting deposits through the ledger while ``readers`` threads read
+    statement pages, for ``duration`` seconds; returns (reads, writes, failed writes).
+    """
+    deadline = time.perf_counter() + duration
+    statement = TransactionRowSerializer()
+
+    def read(n):
+        reads = 0
+        queryset = Transaction.objects.filter(account_id=account_ids[n % len(account_ids)]).order_by('-date', '-id')
+        while time.perf_counter() < deadline:
+            list(statement.select(queryset)[:100])
+            reads += 1
+        connections.close_all()
+        return reads
+
+    def write():
+        writes = failed = 0
+        while time.perf_counter() < deadline:
+            try:
+                post_movements([{'account': account_ids[0], 'type': Transaction.DEPOSIT, 'amount': POST_AMOUNT}])
+            except OperationalError:
+                failed += 1
+            else:
+                writes += 1
+        connections.close_all()
+        return writes, failed
+
+    with ThreadPoolExecutor(max_workers=readers + 1) as executor:
+        writer = executor.submit(write)
+        reads = sum(executor.map(read, range(readers)))
+        return (reads, *writer.result())
+
+
+@scenario(
+    'sqlite',
+    argument('--readers', default='0,1,4,8', help='Comma-separated numbers of concurrent reader threads.'),
+    argument('--duration', type=float, default=5, help='Seconds per measurement.'),
+    argument('--rows', type=int, default=100000, help='Transactions to seed for the readers.'),
+)
+def sqlite(readers, duration, rows, **options):
+    """
+    Statement reads and posts per second alongside the single writer: stock SQLite against the tuned profile.
+    """
+    if connection.vendor != 'sqlite':
+        raise CommandError('The sqlite scenario needs the SQLite database.')
+    account_ids = create_accounts(10)
+    seed_transactions(account_ids, rows)
+    database = connections.settings[DEFAULT_DB_ALIAS]
+    tuned_options, tuned_age = database['OPTIONS'], database['CONN_MAX_AGE']
+    profiles = [('stock', STOCK_SQLITE_OPTIONS, 0), ('tuned', tuned_options, tuned_age)]
+    results = []
+    try:
+        for profile, profile_options, max_age in profiles:
+            database['OPTIONS'], database['CONN_MAX_AGE'] = profile_options, max_age
+            connections.close_all()
+            for count in _parse_counts(readers):
+                reads, writes, failed = _sqlite_mixed_load(account_ids, count, duration)
+                results.append({
+                    'profile': profile,
+                    'readers': count,
+                    'reads_per_second': round(reads / duration, 1),
+                    'writes_per_second': round(writes / duration, 1),
+                    'failed_writes': failed,
+                })
+    finally:
+        database['OPTIONS'], database['CONN_MAX_AGE'] = tuned_options, tuned_age
+        connections.close_all()
+    return results
+
+
+@scenario(
+    'pagination',
+    argument('--rows', type=int, default=1000000, help='Transactions to seed.'),
+    argument('--pages', default='1,10,100,1000,10000', help='Comma-separated page depths to measure.'),
+    argument('--page-size', type=int, default=100),
+    argument('--repeat', type=int, default=5, help='Requests per measurement.'),
+)
+def pagination(rows, pages, page_size, repeat, **options):
+    """
+    Page latency of /api/transactions/ by page number and by keyset cursor at increasing depth.
+    """
+    account_ids = create_accounts(10)
+    seed_transactions(account_ids, rows)
+    statement = Transaction.objects.filter(account_id__in=account_ids).order_by('-date', '-id')
+    results = []
+    with serve_any_host, uncached:
+        client = Client()
+        for page in _parse_counts(pages):
+            offset = (page - 1) * page_size
+            if offset >= rows:
+                continue
+            page_number = timed_get(client, '/api/transactions/', {'page': page, 'page_size': page_size}, repeat)
+            params = {'cursor': '', 'page_size': page_size}
+            if offset:
+                date, pk = statement.values_list('date', 'id')[offset - 1]
+                params['cursor'] = KeysetPagination.make_cursor(date, pk)
+            keyset = timed_get(client, '/api/transactions/', params, repeat)
+            results.append({
+                'rows': rows,
+                'page': page,
+                'page_number_ms': page_number[0],
+                'page_number_max_ms': page_number[1],
+                'keyset_ms': keyset[0],
+                'keyset_max_ms': keyset[1],
+            })
+    return results
+
+
+def _best_of(repeat, func):
+    """
+    Fastest of ``repeat`` calls in milliseconds, with the last call's result.
+    """
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best, 3), result
+
+
+@scenario(
+    'serializer',
+    argument('--page-sizes', default='10,100,1000', help='Comma-separated page sizes to measure.'),
+    argument('--repeat', type=int, default=20, help='Runs per measurement; the fastest is kept.'),
+)
+def serializer(page_sizes, repeat, **options):
+    """
+    Statement page encoding: TransactionSerializerBasic against the TransactionRowSerializer fast path.
+    """
+    sizes = _parse_counts(page_sizes)
+    account_ids = create_accounts(1)
+    seed_transactions(account_ids, max(sizes))
+    statement = Transaction.objects.filter(account_id__in=account_ids).order_by('-date')
+    renderer = JSONRenderer()
+    results = []
+    for size in sizes:
+        model_ms, model_body = _best_of(repeat, lambda: renderer.render(
+            TransactionSerializerBasic(statement[:size], many=True).data))
+        rows = TransactionRowSerializer()
+        fast_ms, fast_body = _best_of(repeat, lambda: renderer.render(
+            rows.encode(rows.select(statement)[:size])))
+        results.append({
+            'page_size': size,
+            'model_serializer_ms': model_ms,
+            'row_serializer_ms': fast_ms,
+            'speedup': round(model_ms / fast_ms, 2),
+            'identical': model_body == fast_body,
+        })
+    return results
+
+
+def _cpu_ms(func):
+    """
+    Process CPU time of one call in milliseconds.
+    """
+    started = time.process_time()
+    func()
+    return round((time.process_time() - started) * 1000, 3)
+
+
+def _table_bytes(table):
+    """
+    Bytes used by ``table`` and its indexes, or None where the database cannot tell (SQLite without dbstat).
+    """
+    with connection.cursor() as cursor:
+        try:
+            if connection.vendor == 'sqlite':
+                cursor.execute(
+                    'SELECT SUM(pgsize) FROM dbstat WHERE name = %s OR name IN '
+                    '(SELECT name FROM sqlite_master WHERE type = %s AND tbl_name = %s)', [table, 'index', table])
+            elif connection.vendor == 'postgresql':
+                cursor.execute('SELECT pg_total_relation_size(%s)', [table])
+            else:
+                return None
+        except OperationalError:
+            return None
+        return cursor.fetchone()[0]
+
+
+@scenario(
+    'money',
+    argument('--rows', type=int, default=100000, help='Transactions to seed for the listing and storage measurements.'),
+    argument('--posts', type=int, default=2000, help='Movements posted, in batches of 100.'),
+    argument('--repeat', type=int, default=5, help='Runs of each read measurement; the fastest is kept.'),
+)
+def money(rows, posts, repeat, **options):
+    """
+    Posting and listing CPU time and bytes per transaction row with the current money storage.
+
+    Run it, convert the database with convert_money_storage (and set
+    ACCOUNTS_MONEY_STORAGE to match), then run it again with --compare.
+    """
+    storage = stored_as(connection)
+    if storage != money_storage():
+        raise CommandError(f'Money columns are stored as {storage} but ACCOUNTS_MONEY_STORAGE is '
+                           f'{money_storage()}; run convert_money_storage first.')
+    account_ids = create_accounts(10)
+    size_before = _table_bytes('accounts_transaction')
+    seed_transactions(account_ids, rows)
+    size_after = _table_bytes('accounts_transaction')
+
+    kinds = [Transaction.DEPOSIT, Transaction.WITHDRAWAL]
+    movements = [{'account': account_ids[n % len(account_ids)], 'type': kinds[n % 2], 'amount': POST_AMOUNT}
+                 for n in range(posts)]
+    posting_ms = _cpu_ms(lambda: [post_movements(movements[start:start + 100]) for start in range(0, posts, 100)])
+
+    statement = Transaction.objects.filter(account_id__in=account_ids).order_by('-date')
+    serializer = TransactionRowSerializer()
+    listing_ms = min(_cpu_ms(lambda: serializer.encode(serializer.select(statement))) for _ in range(repeat))
+    total_ms, _ = _best_of(repeat, lambda: Transaction.objects.filter(account_id__in=account_ids).aggregate(Sum('amount')))
+    row_bytes = None if size_before is None or size_after is None else round((size_after - size_before) / max(rows, 1), 1)
+    return [{
+        'storage': storage,
+        'rows': rows,
+        'posting_cpu_ms': posting_ms,
+        'posts_per_second': round(posts / posting_ms * 1000) if posting_ms else None,
+        'listing_cpu_ms': listing_ms,
+        'sum_ms': total_ms,
+        'row_bytes': row_bytes,
+    }]
+
+
+def _latency_summary(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+        'p99_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2),
+    }
+
+
+def _wsgi_load(request, requests, concurrency):
+    """
+    Drive the WSGI handler from ``concurrency`` threads, one test client each.
+    """
+    local = threading.local()
+
+    def call(_):
+        if not hasattr(local, 'client'):
+            local.client = Client()
+        started = time.perf_counter()
+        request(local.client)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(call, range(requests)))
+    return latencies, time.perf_counter() - started
+
+
+def _asgi_load(request, requests, concurrency):
+    """
+    Drive the ASGI handler from ``concurrency`` concurrent coroutines.
+    """
+    async def run():
+        client = AsyncClient()
+        pending = iter(range(requests))
+        latencies = []
+
+        async def worker():
+            for _ in pending:
+                started = time.perf_counter()
+                await request(client)
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, time.perf_counter() - started
+    return asyncio.run(run())
+
+
+@scenario(
+    'asgi',
+    argument('--requests', type=int, default=500, help='Requests per measurement.'),
+    argument('--concurrency', default='1,8,32', help='Comma-separated numbers of concurrent clients.'),
+    argument('--workload', choices=['list', 'post'], default='list',
+             help='GET a statement page or POST deposits.'),
+    argument('--rows', type=int, default=10000, help='Transactions to seed for the list workload.'),
+)
+def asgi(requests, concurrency, workload, rows, **options):
+    """
+    Requests/sec and p99 latency: WSGI TransactionListCreate against ASGI sync and async views.
+    """
+    account_id = create_accounts(1)[0]
+    if workload == 'list':
+        seed_transactions([account_id], rows)
+    body = {'account': account_id, 'type': Transaction.DEPOSIT, 'amount': '1.00'}
+
+    def make_request(path):
+        if workload == 'list':
+            return lambda client: client.get(path, {'page_size': 100})
+        return lambda client: client.post(path, body, content_type='application/json')
+
+    targets = [
+        ('wsgi', 'sync', _wsgi_load, '/api/transactions/'),
+        ('asgi', 'sync', _asgi_load, '/api/transactions/'),
+        ('asgi', 'async', _asgi_load, '/api/async/transactions/'),
+    ]
+    results = []
+    with serve_any_host, uncached:
+        for clients in _parse_counts(concurrency):
+            for server, view, load, path in targets:
+                latencies, elapsed = load(make_request(path), requests, clients)
+                results.append({'server': server, 'view': view, 'workload': workload,
+                                'concurrency': clients, **_latency_summary(latencies, elapsed)})
+    return results
+
+
+def _boot_worker(path, docs, importtime=False):
+    """
+    Run accounts.startup in a fresh interpreter with the docs on or off; returns its report and the -X importtime lines.
+    """
+    command = [sys.executable, *(['-X', 'importtime'] if importtime else []), '-m', 'accounts.startup', path]
+    env = {**os.environ, 'API_DOCS': '1' if docs == 'on' else '0'}
+    process = subprocess.run([*command, repr(time.time())], capture_output=True, text=True, env=env, cwd=settings.BASE_DIR)
+    if process.returncode:
+        raise CommandError(f'Worker failed to start:\n{process.stderr}')
+    report = json.loads(process.stdout)
+    if report['status'] >= 400:
+        raise CommandError(f'GET {path} returned {report["status"]}.')
+    return report, [line for line in process.stderr.splitlines() if line.startswith('import time:') and '[us]' not in line]
+
+
+def _import_times(lines):
+    """
+    Parse -X importtime lines into (module, modules in its import subtree, self ms, cumulative ms, importing module).
+
+    The interpreter prints a module after everything it imports, indented two
+    spaces deeper per level.
+    """
+    parsed = []
+    for line in lines:
+        self_us, cumulative_us, name = line.removeprefix('import time:').split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        parsed.append((name.strip(), depth, int(self_us) / 1000, int(cumulative_us) / 1000))
+    # Modules printed at each depth that are still waiting for the module importing them.
+    sizes, waiting = [], Counter()
+    for _, depth, _, _ in parsed:
+        sizes.append(1 + waiting.pop(depth + 1, 0))
+        waiting[depth] += sizes[-1]
+    parents, ancestors = [], []
+    for name, depth, _, _ in reversed(parsed):
+        del ancestors[depth:]
+        parents.append(ancestors[-1] if ancestors else None)
+        ancestors.append(name)
+    parents.reverse()
+    return [(name, size, self_ms, cumulative_ms, parent)
+            for (name, _, self_ms, cumulative_ms), size, parent in zip(parsed, sizes, parents)]
+
+
+@scenario(
+    'startup',
+    argument('--docs', choices=['on', 'off', 'both'], default='both', help='Boot workers with API_DOCS on, off or both.'),
+    argument('--runs', type=int, default=5, help='Workers to boot per setting; step timings are medians.'),
+    argument('--top', type=int, default=10, help='Modules and packages with the most import time to report.'),
+    argument('--path', default='/api/accounts/', help='Path of the first request.'),
+)
+def startup(docs, runs, top, path, **options):
+    """
+    Worker cold start: time per boot step up to the first response, and the modules and packages that take longest to import.
+
+    Step rows give the step's own time and the time since the process was
+    spawned, so the ``first request`` row's cumulative time is the time to
+    first request. Import rows come from one more boot under -X importtime,
+    which slows it down: compare them with each other, not with the steps.
+    """
+    if runs < 1:
+        raise CommandError('--runs must be positive.')
+    results = []
+    for mode in ['on', 'off'] if docs == 'both' else [docs]:
+        reports = [_boot_worker(path, mode)[0] for _ in range(runs)]
+        for index, step in enumerate(reports[0]['steps']):
+            results.append({
+                'benchmark': f'docs={mode} {step["step"]}',
+                'modules': step['modules'],
+                'self_ms': round(statistics.median(report['steps'][index]['ms'] for report in reports), 1),
+                'cumulative_ms': round(statistics.median(report['steps'][index]['elapsed_ms'] for report in reports), 1),
+            })
+
+        _, lines = _boot_worker(path, mode, importtime=True)
+        modules = _import_times(lines)
+        packages = {}
+        for name, _, self_ms, cumulative_ms, parent in modules:
+            package = packages.setdefault(name.partition('.')[0], {'modules': 0, 'self_ms': 0, 'cumulative_ms': 0})
+            package['modules'] += 1
+            package['self_ms'] += self_ms
+            # Time spent importing the package, counted where it is entered from outside it.
+            if parent is None or parent.partition('.')[0] != name.partition('.')[0]:
+                package['cumulative_ms'] += cumulative_ms
+        shown = sorted(packages, key=lambda name: packages[name]['self_ms'], reverse=True)[:top]
+        for name in shown:
+            results.append({'benchmark': f'docs={mode} package {name}', 'modules': packages[name]['modules'],
+                            'self_ms': round(packages[name]['self_ms'], 1),
+                            'cumulative_ms': round(packages[name]['cumulative_ms'], 1)})
+        for name, size, self_ms, cumulative_ms, _ in sorted(modules, key=lambda module: module[2], reverse=True)[:top]:
+            results.append({'benchmark': f'docs={mode} import {name}', 'modules': size,
+                            'self_ms': round(self_ms, 1), 'cumulative_ms': round(cumulative_ms, 1)})
+    return results
@@ -0,0 +1,161 @@
+"""
+Read-through cache for account reads and the first statement pages.
+
+Entries live in Django's cache framework (``ACCOUNTS_CACHE_ALIAS``, the
+local-memory ``default`` cache unless configured otherwise) under versioned
+keys. Every scope (one account, the account list, the statement) has a
+version counter that is bumped whenever its data changes; readers fetch the
+version *before* querying the database and store what they read under that
+version, so a read that raced with a write is stored under a version nobody
+asks for again instead of being served as stale.
+
+Writers bump the version twice: immediately, so reads on the writer's own
+connection see the change, and again on commit, which discards anything a
+concurrent reader cached from the database while the write was still
+uncommitted.
+
+Invalidations only reach the processes sharing the cache backend, so the
+cache is off unless ``ACCOUNTS_CACHE_ALIAS`` names a shared backend (Redis,
+Memcached, the database cache). A per-process backend such as the default
+local-memory cache would keep serving balances that other web workers, the
+queue worker or management commands have changed. ``ACCOUNTS_CACHE_ENABLED``
+overrides the choice, e.g. for a single-process development server.
+
+Values read from a lagging read replica may be older than the version they
+are stored under. They are cached under their own keys, so clients pinned
+to the primary after a write (see accounts.routers) never get them, and only
+for as long as writers stay pinned (ACCOUNTS_REPLICA_PIN_SECONDS).
+"""
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+from .routers import pin_seconds, reading_from_replica
+
+ACCOUNT = 'account'
+ACCOUNT_LIST = 'account-list'
+STATEMENT = 'statement'
+
+
+def get_cache():
+    return caches[getattr(settings, 'ACCOUNTS_CACHE_ALIAS', 'default')]
+
+
+def cache_timeout():
+    return getattr(settings, 'ACCOUNTS_CACHE_TIMEOUT', 60)
+
+
+def shared_backend():
+    """
+    Whether every process of the deployment sees the same cache (and so the same versions).
+    """
+    return not isinstance(get_cache(), (LocMemCache, DummyCache))
+
+
+def enabled():
+    setting = getattr(settings, 'ACCOUNTS_CACHE_ENABLED', None)
+    return shared_backend() if setting is None else setting
+
+
+class CacheMetrics:
+    """
+    Hit/miss counters per scope, kept per process.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def record(self, scope, hit):
+        with self.lock:
+            (self.hits if hit else self.misses)[scope] += 1
+
+    def snapshot(self):
+        with self.lock:
+            scopes = sorted(set(self.hits) | set(self.misses))
+            return {
+                scope: {
+                    'hits': self.hits[scope],
+                    'misses': self.misses[scope],
+                    'hit_ratio': round(self.hits[scope] / ((self.hits[scope] + self.misses[scope]) or 1), 4),
+                }
+                for scope in scopes
+            }
+
+    def reset(self):
+        with self.lock:
+            self.hits.clear()
+            self.misses.clear()
+
+
+metrics = CacheMetrics()
+
+
+def version_key(scope, ident=''):
+    return f'accounts:{scope}:{ident}:version'
+
+
+def get_version(scope, ident=''):
+    cache = get_cache()
+    key = version_key(scope, ident)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key, 1)
+    return version
+
+
+def bump_version(scope, ident=''):
+    cache = get_cache()
+    key = version_key(scope, ident)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, timeout=None)
+
+
+def cached(scope, ident, variant, build):
+    """
+    Return the cached value for ``variant`` of ``scope``/``ident``, calling
+    ``build`` and storing its result on a miss. Without the cache, ``build`` runs every time.
+    """
+    if not enabled():
+        return build()
+    cache = get_cache()
+    replica = reading_from_replica()
+    key = f'accounts:{scope}:{ident}:{get_version(scope, ident)}:{variant}'
+    if replica:
+        key = f'{key}:replica'
+    value = cache.get(key)
+    metrics.record(scope, value is not None)
+    if value is None:
+        value = build()
+        cache.set(key, value, timeout=min(cache_timeout(), pin_seconds()) if replica else cache_timeout())
+    return value
+
+
+def invalidate(*scopes):
+    """
+    Invalidate ``(scope, ident)`` pairs now and again when the current transaction commits.
+    """
+    def bump():
+        for scope, ident in scopes:
+            bump_version(scope, ident)
+    bump()
+    transaction.on_commit(bump)
+
+
+def invalidate_accounts(account_ids):
+    """
+    Invalidate everything derived from the balances or history of ``account_ids``.
+    """
+    invalidate(
+        (ACCOUNT_LIST, ''),
+        (STATEMENT, ''),
+        *((ACCOUNT, account_id) for account_id in sorted(set(account_ids))),
+    )
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+from . import cache
+
+
+@register(Tags.caches)
+def check_cache_backend(app_configs, **kwargs):
+    """
+    Warn when the read-through cache is forced on with a backend other processes cannot see; in queued
+    posting mode, where every balance is moved by process_posting_queue, that is an error.
+    """
+    if not getattr(settings, 'ACCOUNTS_CACHE_ENABLED', None) or cache.shared_backend():
+        return []
+    if getattr(settings, 'ACCOUNTS_POSTING_MODE', 'sync') == 'queued':
+        return [Error(
+            'Queued posting needs a shared cache backend when ACCOUNTS_CACHE_ENABLED is set.',
+            hint='process_posting_queue posts in its own process, and its invalidations never reach a '
+                 'per-process cache. Configure a shared backend (e.g. REDIS_URL) or leave ACCOUNTS_CACHE_ENABLED unset.',
+            id='accounts.E001',
+        )]
+    return [Warning(
+        'ACCOUNTS_CACHE_ENABLED is set with a per-process cache backend.',
+        hint='Invalidations only reach this process: other workers, the queue worker and management '
+             'commands leave it serving stale balances. Configure a shared backend (e.g. REDIS_URL) '
+             'or leave ACCOUNTS_CACHE_ENABLED unset.',
+        id='accounts.W001',
+    )]
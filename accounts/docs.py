@@ -0,0 +1,133 @@
+"""
+OpenAPI documentation of the API views, without importing drf_yasg at startup.
+
+Views are documented with ``swagger_auto_schema`` and ``openapi`` from this
+module, used exactly like their drf_yasg counterparts. They only record what
+was declared: ``openapi.Parameter(...)`` and friends become Deferred values
+and the decorator keeps the method and its arguments. install() imports
+drf_yasg, resolves the recorded values and applies the real decorator; it is
+called when the documentation is first requested (see schema_view()).
+
+Workers that never serve the docs never import drf_yasg, and with
+``API_DOCS = False`` the docs URLs and the drf_yasg app are left out
+altogether.
+"""
+import functools
+import threading
+
+_recorded = []
+_install_lock = threading.Lock()
+_installed = False
+
+
+class Deferred:
+    """
+    A drf_yasg.openapi attribute, or a call of one, resolved by install().
+    """
+    # Underscored, so reading an attribute of the drf_yasg object (parameter.name) fails instead of returning ours.
+    def __init__(self, attribute, args=None, kwargs=None):
+        self._attribute = attribute
+        self._args = args
+        self._kwargs = kwargs
+
+    def __call__(self, *args, **kwargs):
+        return Deferred(self._attribute, args, kwargs)
+
+    def __repr__(self):
+        return f'openapi.{self._attribute}' if self._args is None else f'openapi.{self._attribute}(...)'
+
+
+class DeferredModule:
+    """
+    Stands in for the drf_yasg.openapi module: every attribute is Deferred.
+    """
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return Deferred(name)
+
+
+openapi = DeferredModule()
+
+
+def swagger_auto_schema(**kwargs):
+    """
+    Record drf_yasg.utils.swagger_auto_schema(**kwargs) for ``view_method``, to be applied by install().
+    """
+    def decorator(view_method):
+        _recorded.append((view_method, kwargs))
+        return view_method
+    return decorator
+
+
+def resolve(value, module):
+    """
+    Replace every Deferred in ``value`` (recursively through lists, tuples and dicts) by its drf_yasg object.
+    """
+    if isinstance(value, Deferred):
+        resolved = getattr(module, value._attribute)
+        if value._args is None:
+            return resolved
+        return resolved(*resolve(value._args, module), **resolve(value._kwargs, module))
+    if isinstance(value, (list, tuple)):
+        return type(value)(resolve(item, module) for item in value)
+    if isinstance(value, dict):
+        return {key: resolve(item, module) for key, item in value.items()}
+    return value
+
+
+def install():
+    """
+    Import drf_yasg and apply every recorded swagger_auto_schema; later calls do nothing.
+    """
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        from drf_yasg import openapi as drf_openapi
+        from drf_yasg.utils import swagger_auto_schema as drf_swagger_auto_schema
+
+        for view_method, kwargs in _recorded:
+            drf_swagger_auto_schema(**resolve(kwargs, drf_openapi))(view_method)
+        _installed = True
+
+
+@functools.cache
+def schema_view():
+    """
+    The drf_yasg schema view of the API, built (and drf_yasg imported) on first use.
+    """
+    from drf_yasg import openapi as drf_openapi
+    from drf_yasg.views import get_schema_view
+    from rest_framework import permissions
+
+    install()
+    return get_schema_view(
+        drf_openapi.Info(
+            title="Bank Account API",
+            default_version='v1',
+            description="API documentation for the Bank Account project",
+            terms_of_service="https://www.google.com/policies/terms/",
+            contact=drf_openapi.Contact(email="contact@bank.local"),
+            license=drf_openapi.License(name="BSD License"),
+        ),
+        public=True,
+        permission_classes=(permissions.AllowAny,),
+    )
+
+
+@functools.cache
+def ui_view(renderer):
+    """
+    The drf_yasg view rendering the docs with ``renderer``.
+    """
+    return schema_view().with_ui(renderer, cache_timeout=0)
+
+
+def docs_view(renderer):
+    """
+    A view serving the ``renderer`` ('swagger' or 'redoc') documentation page, and the schema itself with ``?format=openapi``.
+    """
+    def view(request, *args, **kwargs):
+        return ui_view(renderer)(request, *args, **kwargs)
+    return view
@@ -0,0 +1,48 @@
+"""
+Streaming statement exports.
+
+Rows are read through a chunked database cursor and encoded one at a time,
+so memory use does not depend on how many transactions are exported.
+"""
+import csv
+import json
+
+from .serializers import TransactionRowSerializer, TransactionSerializerBasic
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """
+    File-like object whose write() hands the written line back to csv.writer's caller.
+    """
+    def write(self, value):
+        return value
+
+
+def statement_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield statement rows encoded exactly like TransactionSerializerBasic,
+    without instantiating models.
+    """
+    serializer = TransactionRowSerializer()
+    for row in serializer.select(queryset).iterator(chunk_size=chunk_size):
+        yield serializer.to_representation(row)
+
+
+def csv_stream(queryset):
+    writer = csv.writer(Echo())
+    yield writer.writerow(list(TransactionSerializerBasic().fields))
+    for row in statement_rows(queryset):
+        yield writer.writerow(row.values())
+
+
+def ndjson_stream(queryset):
+    for row in statement_rows(queryset):
+        yield json.dumps(row) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', csv_stream),
+    'ndjson': ('application/x-ndjson', ndjson_stream),
+}
@@ -1,10 +1,22 @@
 from django_filters import rest_framework as django_filters
-from .models import Transaction
+from .models import ArchivedPeriod, StatementEntry, Transaction
 class TransactionFilter(django_filters.FilterSet):
     start_date = django_filters.DateFilter(field_name="date", lookup_expr='gte')
     end_date = django_filters.DateFilter(field_name="date", lookup_expr='lte')
-    type = django_filters.MultipleChoiceFilter(choices=Transaction.TRANSACTION_TYPES)
+    # No joins, so no duplicates: DISTINCT would make the database sort the UNION ALL instead of merging its indexes.
+    type = django_filters.MultipleChoiceFilter(choices=Transaction.TRANSACTION_TYPES, distinct=False)
 
     class Meta:
-        model = Transaction
-        fields = ['type', 'start_date', 'end_date']
\ No newline at end of file
+        # Also filters Transaction querysets, which have the same fields.
+        model = StatementEntry
+        fields = ['type', 'start_date', 'end_date']
+
+    def filter_queryset(self, queryset):
+        """
+        Filter, then prune statements read from StatementEntry to the tables (recent or archived) the date range touches.
+        """
+        queryset = super().filter_queryset(queryset)
+        if queryset.model is StatementEntry:
+            data = self.form.cleaned_data
+            queryset = queryset.prune(data.get('start_date'), data.get('end_date'), ArchivedPeriod.objects.horizons())
+        return queryset
@@ -0,0 +1,162 @@
+"""
+Batch posting engine for the accounts ledger.
+
+Transaction.save posts one movement at a time. The functions here post many
+movements at once: accounts are locked in primary key order, running
+balances are computed in memory, and every account gets a single bulk insert
+and a single balance UPDATE no matter how many of its movements were posted.
+Locking in primary key order also means two batches (or two transfers)
+touching the same accounts can never deadlock each other.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.settings import api_settings
+
+from .models import Account, InsufficientFunds, QueuedMovement, Transaction
+from .retries import retry_on_lock
+
+BULK_BATCH_SIZE = 1000
+QUEUE_BATCH_SIZE = 1000
+
+
+def missing_account(account_id, field='account'):
+    return ValidationError({field: f'Invalid pk "{account_id}" - object does not exist.'})
+
+
+def error_detail(exc):
+    """
+    Convert a Django ValidationError raised by the ledger into DRF error detail.
+    """
+    if hasattr(exc, 'error_dict'):
+        return exc.message_dict
+    return {api_settings.NON_FIELD_ERRORS_KEY: exc.messages}
+
+
+class PostingBatch:
+    """
+    Movements being posted together inside one database transaction.
+
+    Must be created inside ``transaction.atomic()``: it locks the accounts on
+    creation and keeps their running balances in memory until write().
+    """
+    def __init__(self, account_ids):
+        self.balances = dict(
+            Account.objects.select_for_update()
+            .filter(pk__in=sorted(set(account_ids)))
+            .order_by('pk')
+            .values_list('pk', 'balance')
+        )
+        self.opening = dict(self.balances)
+        self.posted = []
+
+    def __contains__(self, account_id):
+        return account_id in self.balances
+
+    def covers(self, account_id, amount):
+        return self.balances[account_id] >= amount
+
+    def add(self, account_id, type, amount, counterparty_id=None):
+        entry = Transaction(account_id=account_id, type=type, amount=amount, counterparty_id=counterparty_id)
+        entry.balance_after = self.balances[account_id] = self.balances[account_id] + entry.signed_amount
+        self.posted.append(entry)
+        return entry
+
+    def write(self):
+        """
+        Insert the posted movements and move each balance with one UPDATE.
+        """
+        Transaction.objects.bulk_create(self.posted, batch_size=BULK_BATCH_SIZE)
+        Transaction.after_posting(self.posted)
+        for account_id, balance in self.balances.items():
+            if balance != self.opening[account_id]:
+                Account.objects.filter(pk=account_id).update(balance=balance)
+
+
+@retry_on_lock
+def post_movements(movements):
+    """
+    Post validated movements in input order.
+
+    ``movements`` is a sequence of dicts with ``account`` (primary key),
+    ``type`` and ``amount``. Returns a list aligned with the input holding
+    either the posted Transaction or the ValidationError that rejected the
+    movement. Rejected movements do not affect the ones around them.
+    """
+    results = []
+    with transaction.atomic():
+        batch = PostingBatch(movement['account'] for movement in movements)
+        for movement in movements:
+            account_id, amount = movement['account'], movement['amount']
+            signed_amount = -amount if movement['type'] in Transaction.DEBIT_TYPES else amount
+            if account_id not in batch:
+                results.append(missing_account(account_id))
+            # Like apply_movement, check every movement that lowers the balance, whatever its type.
+            elif signed_amount < 0 and not batch.covers(account_id, -signed_amount):
+                results.append(InsufficientFunds('Insufficient funds for this transaction.'))
+            else:
+                results.append(batch.add(account_id, movement['type'], amount))
+        batch.write()
+    return results
+
+
+@retry_on_lock
+def post_transfers(transfers):
+    """
+    Execute validated transfers in input order as double-entry pairs.
+
+    ``transfers`` is a sequence of dicts with ``source`` and ``destination``
+    (account primary keys) and a positive ``amount``. Each accepted transfer
+    debits the source with a TRANSFER and credits the destination with a
+    DEPOSIT, both naming the other account as counterparty, in the same
+    database transaction. Many transfers between the same accounts are
+    netted into one balance UPDATE per account.
+
+    Returns a list aligned with the input holding either the (debit, credit)
+    pair or the ValidationError that rejected the transfer.
+    """
+    results = []
+    with transaction.atomic():
+        batch = PostingBatch(pk for item in transfers for pk in (item['source'], item['destination']))
+        for item in transfers:
+            source, destination, amount = item['source'], item['destination'], item['amount']
+            if source not in batch:
+                results.append(missing_account(source, 'source'))
+            elif destination not in batch:
+                results.append(missing_account(destination, 'destination'))
+            elif not batch.covers(source, amount):
+                results.append(InsufficientFunds('Insufficient funds for this transaction.'))
+            else:
+                results.append((
+                    batch.add(source, Transaction.TRANSFER, amount, counterparty_id=destination),
+                    batch.add(destination, Transaction.DEPOSIT, amount, counterparty_id=source),
+                ))
+        batch.write()
+    return results
+
+
+@retry_on_lock
+def drain_queue(limit=QUEUE_BATCH_SIZE):
+    """
+    Post up to ``limit`` queued movements, oldest first, and return how many were processed.
+
+    The movements are posted with post_movements in the database transaction
+    that marks them posted or rejected, so every account they touch gets a
+    single bulk insert and a single balance UPDATE, and a movement is never
+    posted twice. On PostgreSQL concurrent workers skip each other's locked rows.
+    """
+    with transaction.atomic():
+        queued = list(QueuedMovement.objects.pending().select_for_update(skip_locked=True).order_by('id')[:limit])
+        if not queued:
+            return 0
+        outcomes = post_movements([{'account': item.account_id, 'type': item.type, 'amount': item.amount} for item in queued])
+        processed_at = timezone.now()
+        for item, outcome in zip(queued, outcomes):
+            item.processed_at = processed_at
+            if isinstance(outcome, ValidationError):
+                item.status, item.errors = QueuedMovement.REJECTED, error_detail(outcome)
+            else:
+                item.status, item.transaction, item.balance_after = QueuedMovement.POSTED, outcome, outcome.balance_after
+        QueuedMovement.objects.bulk_update(queued, ['status', 'transaction', 'balance_after', 'errors', 'processed_at'],
+                                           batch_size=BULK_BATCH_SIZE)
+    return len(queued)
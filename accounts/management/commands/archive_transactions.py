@@ -0,0 +1,56 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from accounts.archive import archive_period, closed_periods
+from accounts.models import month_start
+
+
+def parse_month(value):
+    try:
+        return datetime.datetime.strptime(value, '%Y-%m').date()
+    except ValueError:
+        raise CommandError(f'Invalid month "{value}"; use YYYY-MM.')
+
+
+class Command(BaseCommand):
+    help = "Move the transactions of closed months from the transaction table to the archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help='Archive the months before this one (YYYY-MM). Defaults to --keep-months.')
+        parser.add_argument('--keep-months', type=int, default=12,
+                            help='Closed months kept in the transaction table besides the current one.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Transactions moved per database transaction.')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the months that would be archived.')
+
+    def handle(self, *args, before, keep_months, batch_size, dry_run, **options):
+        if keep_months < 0 or batch_size < 1:
+            raise CommandError('--keep-months must not be negative and --batch-size must be positive.')
+        current = month_start(timezone.now().astimezone(datetime.timezone.utc).date())
+        if before is None:
+            before = current
+            for _ in range(keep_months):
+                before = month_start(before - datetime.timedelta(days=1))
+        else:
+            before = parse_month(before)
+            if before > current:
+                raise CommandError(f'Only closed months can be archived; use --before {current:%Y-%m} or earlier.')
+
+        periods = closed_periods(before)
+        if not periods:
+            self.stdout.write(f'No transactions before {before:%Y-%m} to archive.')
+            return
+        started, total = time.perf_counter(), 0
+        for period in periods:
+            if dry_run:
+                self.stdout.write(f'Would archive {period:%Y-%m}.')
+                continue
+            moved = archive_period(period, batch_size)
+            total += moved
+            self.stdout.write(f'Archived {moved} transactions of {period:%Y-%m}.')
+        if not dry_run:
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(
+                f'Archived {total} transactions of {len(periods)} months in {elapsed:.2f}s.'))
@@ -0,0 +1,94 @@
+import json
+import subprocess
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from accounts.benchmarks import SCENARIOS, cleanup
+
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def row_key(index, row):
+    return row.get('benchmark', index)
+
+
+class Command(BaseCommand):
+    help = "Run an accounts benchmark scenario against the configured database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Also write the results as JSON to this file.')
+        parser.add_argument('--compare', help='JSON results of an earlier run to compare timings against.')
+        subparsers = parser.add_subparsers(dest='scenario', required=True)
+        for name, (func, arguments) in SCENARIOS.items():
+            subparser = subparsers.add_parser(name, help=func.__doc__.strip().splitlines()[0])
+            for args, kwargs in arguments:
+                subparser.add_argument(*args, **kwargs)
+
+    def handle(self, *args, scenario, output, compare, **options):
+        func, _ = SCENARIOS[scenario]
+        started_at = timezone.now()
+        try:
+            results = func(**options)
+        finally:
+            cleanup(keep_datasets=options.get('keep_dataset', False))
+        self.print_table(results)
+
+        report = {
+            'scenario': scenario,
+            'options': {key: value for key, value in options.items() if key in self.scenario_options(scenario)},
+            'database': connection.vendor,
+            'commit': current_commit(),
+            'started_at': started_at.isoformat(),
+            'results': results,
+        }
+        if output:
+            Path(output).write_text(json.dumps(report, indent=2, default=str) + '\n')
+            self.stdout.write(f'Results written to {output}')
+        if compare:
+            self.print_comparison(json.loads(Path(compare).read_text()), report)
+
+    def scenario_options(self, scenario):
+        _, arguments = SCENARIOS[scenario]
+        return {args[0].lstrip('-').replace('-', '_') for args, _ in arguments}
+
+    def print_table(self, rows):
+        if not rows:
+            return
+        columns = list(rows[0])
+        widths = {c: max(len(c), *(len(str(row[c])) for row in rows)) for c in columns}
+        self.stdout.write('  '.join(c.ljust(widths[c]) for c in columns))
+        for row in rows:
+            self.stdout.write('  '.join(str(row[c]).ljust(widths[c]) for c in columns))
+
+    def print_comparison(self, baseline, report):
+        """
+        Print the change of every timing (``*_ms``), throughput (``*_per_second``) and size (``*_bytes``)
+        against the matching row of ``baseline``; suite rows match by benchmark name,
+        other scenarios by position.
+        """
+        if baseline.get('scenario') != report['scenario']:
+            self.stderr.write(f"Baseline is a {baseline.get('scenario')} run, not {report['scenario']}.")
+            return
+        self.stdout.write(f"\nCompared with {baseline.get('commit') or 'baseline'} ({baseline.get('started_at')}):")
+        previous = {row_key(index, row): row for index, row in enumerate(baseline['results'])}
+        rows = []
+        for index, row in enumerate(report['results']):
+            before = previous.get(row_key(index, row))
+            if before is None:
+                continue
+            for metric, value in row.items():
+                if not metric.endswith(('_ms', '_per_second', '_bytes')) or not before.get(metric):
+                    continue
+                change = (value - before[metric]) / before[metric] * 100
+                rows.append({'row': row_key(index, row), 'metric': metric, 'baseline': before[metric],
+                             'current': value, 'change': f'{change:+.1f}%'})
+        self.print_table(rows)
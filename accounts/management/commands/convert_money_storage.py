@@ -0,0 +1,28 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from accounts.money import STORAGES, convert_storage, money_storage, stored_as
+
+
+class Command(BaseCommand):
+    help = "Convert the money columns to the storage configured in ACCOUNTS_MONEY_STORAGE (or --to)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--to', choices=STORAGES, help='Target storage. Defaults to ACCOUNTS_MONEY_STORAGE.')
+
+    def handle(self, *args, to, **options):
+        target = to or money_storage()
+        source = stored_as(connection)
+        if source == target:
+            self.stdout.write(f'Money is already stored as {target}.')
+            return
+        started = time.perf_counter()
+        with connection.schema_editor() as schema_editor:
+            convert_storage(schema_editor, apps.get_model, source, target)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Converted money columns from {source} to {target} in {elapsed:.2f}s.'))
+        if target != money_storage():
+            self.stdout.write(self.style.WARNING(f'Set ACCOUNTS_MONEY_STORAGE = "{target}" before serving requests.'))
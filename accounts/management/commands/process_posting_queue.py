@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import cache
+from accounts.ledger import QUEUE_BATCH_SIZE, drain_queue
+from accounts.models import QueuedMovement
+
+
+class Command(BaseCommand):
+    help = "Post the transactions queued by POST /api/transactions/ in queued mode, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=QUEUE_BATCH_SIZE, help='Queued movements posted per database transaction.')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty instead of waiting for more.')
+
+    def handle(self, *args, batch_size, interval, once, **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive.')
+        if cache.enabled() and not cache.shared_backend():
+            raise CommandError('The read-through cache uses a per-process backend, so the web workers would not see '
+                               'the balances posted here. Configure a shared cache or unset ACCOUNTS_CACHE_ENABLED.')
+        started, processed = time.perf_counter(), 0
+        try:
+            while True:
+                count = drain_queue(batch_size)
+                processed += count
+                if count:
+                    self.stdout.write(f'Processed {count} queued movements.')
+                elif once:
+                    break
+                else:
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        elapsed = time.perf_counter() - started
+        pending = QueuedMovement.objects.pending().count()
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} queued movements in {elapsed:.2f}s; {pending} pending.'))
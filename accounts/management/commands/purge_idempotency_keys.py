@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete stored idempotency keys older than ACCOUNTS_IDEMPOTENCY_TTL."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000, help='Keys deleted per query.')
+
+    def handle(self, *args, batch_size, **options):
+        deleted = 0
+        while True:
+            batch = list(IdempotencyKey.objects.expired().order_by('created_at').values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                break
+            deleted += IdempotencyKey.objects.filter(pk__in=batch).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired idempotency keys.'))
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import DailySummary
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily statement summaries from the transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--account', type=int, action='append', dest='accounts',
+                            help='Only rebuild this account (repeatable). Defaults to every account.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Summary rows inserted per query.')
+
+    def handle(self, *args, accounts, batch_size, **options):
+        started = time.perf_counter()
+        written = DailySummary.objects.rebuild(accounts, batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} daily summaries in {elapsed:.2f}s.'))
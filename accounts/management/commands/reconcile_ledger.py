@@ -0,0 +1,97 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import F, Max, Min, OuterRef, Subquery, Sum
+
+from accounts.cache import invalidate_accounts
+from accounts.models import Account, StatementEntry, Transaction
+from accounts.money import money_value
+
+CENTS = Decimal('0.01')
+
+
+def reconcile_range(first_pk, last_pk, repair=False):
+    """
+    Check the accounts with primary keys in [first_pk, last_pk] with a single
+    query and return (accounts checked, drifted accounts).
+
+    The expected balance of an account is its opening balance (the balance
+    before its first transaction) plus the signed sum of all its
+    transactions, archived ones included. Accounts without transactions
+    have nothing to check.
+    With ``repair`` the drift is subtracted from the stored balance with an
+    F() update, which stays correct if transactions are posted meanwhile.
+    """
+    history = StatementEntry.objects.filter(account=OuterRef('pk'))
+    first = history.order_by('date', 'id')
+    rows = (
+        Account.objects.filter(pk__gte=first_pk, pk__lte=last_pk)
+        .annotate(
+            net=Subquery(history.order_by().values('account').annotate(total=Sum(Transaction.signed_amount_expression())).values('total')),
+            first_balance_after=Subquery(first.values('balance_after')[:1]),
+            first_signed=Subquery(first.annotate(signed=Transaction.signed_amount_expression()).values('signed')[:1]),
+        )
+        .values_list('pk', 'iban', 'balance', 'net', 'first_balance_after', 'first_signed')
+    )
+    checked, drifted = 0, []
+    for pk, iban, balance, net, first_balance_after, first_signed in rows:
+        if net is None:
+            continue
+        checked += 1
+        expected = (first_balance_after - first_signed + net).quantize(CENTS)
+        if balance != expected:
+            drifted.append((pk, iban, balance, expected))
+            if repair:
+                Account.objects.filter(pk=pk).update(balance=F('balance') - money_value(balance - expected))
+                invalidate_accounts([pk])
+    return checked, drifted
+
+
+def reconcile_range_in_worker(first_pk, last_pk, repair=False):
+    try:
+        return reconcile_range(first_pk, last_pk, repair)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Recompute every account balance from its transactions and report (and optionally repair) drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help='Correct the stored balance of drifted accounts.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Accounts checked per query.')
+        parser.add_argument('--workers', type=int, default=1, help='Processes checking account ranges in parallel.')
+
+    def handle(self, *args, repair, batch_size, workers, **options):
+        started = time.perf_counter()
+        bounds = Account.objects.aggregate(first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            self.stdout.write('No accounts to reconcile.')
+            return
+        ranges = [
+            (start, min(start + batch_size - 1, bounds['last']))
+            for start in range(bounds['first'], bounds['last'] + 1, batch_size)
+        ]
+        starts, ends = zip(*ranges)
+        repairs = [repair] * len(ranges)
+        if workers > 1:
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('fork')) as executor:
+                results = list(executor.map(reconcile_range_in_worker, starts, ends, repairs))
+        else:
+            results = list(map(reconcile_range, starts, ends, repairs))
+
+        checked = sum(count for count, _ in results)
+        drifted = [row for _, rows in results for row in rows]
+        for pk, iban, balance, expected in drifted:
+            self.stdout.write(
+                f'Account {pk} ({iban}): balance {balance}, expected {expected}, drift {balance - expected}'
+                + (' - repaired' if repair else '')
+            )
+        elapsed = time.perf_counter() - started
+        summary = f'Checked {checked} accounts in {elapsed:.2f}s: {len(drifted)} drifted.'
+        self.stdout.write(self.style.WARNING(summary) if drifted else self.style.SUCCESS(summary))
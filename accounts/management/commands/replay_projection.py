@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.projections import PROJECTIONS, replay
+
+REPLAY_BATCH_SIZE = 20000
+
+
+class Command(BaseCommand):
+    help = "Rebuild projections from the whole ledger event log, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('projections', nargs='*',
+                            help=f'Projections to rebuild ({", ".join(PROJECTIONS)}). Defaults to every projection.')
+        parser.add_argument('--batch-size', type=int, default=REPLAY_BATCH_SIZE, help='Events applied per database transaction.')
+
+    def handle(self, *args, projections, batch_size, **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive.')
+        unknown = sorted(set(projections) - set(PROJECTIONS))
+        if unknown:
+            raise CommandError(f'Unknown projection: {", ".join(unknown)}.')
+        for name in projections or list(PROJECTIONS):
+            started = time.perf_counter()
+            applied = replay(name, batch_size)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(
+                f'Replayed {applied} events into {name} in {elapsed:.2f}s ({applied / (elapsed or 1):.0f} events/s).'))
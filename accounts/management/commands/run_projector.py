@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.projections import PROJECTION_BATCH_SIZE, PROJECTIONS, lag, project
+
+
+class Command(BaseCommand):
+    help = "Apply new ledger events to the projections, in batches, from each projection's checkpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projection', action='append', dest='projections', choices=sorted(PROJECTIONS),
+                            help='Only run this projection (repeatable). Defaults to every projection.')
+        parser.add_argument('--batch-size', type=int, default=PROJECTION_BATCH_SIZE, help='Events applied per database transaction.')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to wait when every projection is up to date.')
+        parser.add_argument('--once', action='store_true', help='Exit once the projections are up to date instead of waiting for more events.')
+
+    def handle(self, *args, projections, batch_size, interval, once, **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive.')
+        names = projections or list(PROJECTIONS)
+        started, applied = time.perf_counter(), dict.fromkeys(names, 0)
+        try:
+            while True:
+                counts = {name: project(name, batch_size) for name in names}
+                for name, count in counts.items():
+                    applied[name] += count
+                    if count:
+                        self.stdout.write(f'Applied {count} events to {name}.')
+                if any(counts.values()):
+                    continue
+                if once:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        elapsed = time.perf_counter() - started
+        for name in names:
+            self.stdout.write(self.style.SUCCESS(
+                f'Applied {applied[name]} events to {name} in {elapsed:.2f}s; {lag(name)} behind the log.'))
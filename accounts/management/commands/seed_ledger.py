@@ -0,0 +1,205 @@
+import datetime
+import itertools
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from decimal import Decimal
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+
+from accounts.models import Account, Transaction
+
+CENTS = Decimal('0.01')
+MAX_AMOUNT = Decimal('99999999.99')
+TYPE_WEIGHTS = {Transaction.DEPOSIT: 45, Transaction.WITHDRAWAL: 40, Transaction.TRANSFER: 15}
+# Movements cluster in office hours; weight of each hour of the day (UTC).
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 8, 12, 14, 14, 13, 12, 12, 13, 13, 12, 10, 8, 6, 4, 3, 2, 1]
+# Account numbers are a bijection of the account index modulo 10**10.
+ACCOUNT_NUMBER_MULTIPLIER = 7_919_000_003
+# History ends on a fixed day by default, so a seed generates the same dates whenever it runs.
+DEFAULT_END_DATE = datetime.date(2025, 1, 1)
+
+
+def spanish_control_digits(bank, branch, number):
+    weights = [1, 2, 4, 8, 5, 10, 9, 7, 3, 6]
+
+    def digit(digits):
+        value = 11 - sum(int(d) * w for d, w in zip(digits, weights)) % 11
+        return {11: 0, 10: 1}.get(value, value)
+    return f'{digit("00" + bank + branch)}{digit(number)}'
+
+
+def iban_check_digits(country, bban):
+    """
+    ISO 13616 check digits: 98 minus the remainder of BBAN + country + "00" (letters as numbers) mod 97.
+    """
+    digits = ''.join(str(int(char, 36)) for char in f'{bban}{country}00')
+    return f'{98 - int(digits) % 97:02d}'
+
+
+def make_iban(rng, index, offset):
+    """
+    A valid Spanish IBAN for the account with ``index``; unique for every index of one seed.
+    """
+    bank, branch = f'{rng.randint(1, 9999):04d}', f'{rng.randint(1, 9999):04d}'
+    number = f'{(index * ACCOUNT_NUMBER_MULTIPLIER + offset) % 10 ** 10:010d}'
+    bban = f'{bank}{branch}{spanish_control_digits(bank, branch, number)}{number}'
+    return f'ES{iban_check_digits("ES", bban)}{bban}'
+
+
+def money(value):
+    return min(Decimal(value).quantize(CENTS), MAX_AMOUNT).max(CENTS)
+
+
+@contextmanager
+def explicit_dates():
+    """
+    Let bulk_create store the generated Transaction.date instead of the current time (auto_now_add).
+    """
+    field = Transaction._meta.get_field('date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def generate_block(seed, block, first_index, accounts, rows, start, days):
+    """
+    Generate the accounts [first_index, first_index + accounts) and ``rows``
+    transactions between them, reproducibly for (seed, block).
+
+    Movements are dated over ``days`` days from ``start`` and applied in date
+    order to in-memory balances, so every ``balance_after`` continues the
+    chain of its account. Debits an account cannot cover become deposits.
+    Transfers are a TRANSFER debit and a DEPOSIT credit between two accounts
+    of the block, naming each other as counterparty.
+    """
+    rng = random.Random(f'{seed}:{block}')
+    offset = random.Random(seed).randrange(10 ** 10)
+    ibans = [make_iban(rng, index, offset) for index in range(first_index, first_index + accounts)]
+    opening = [money(rng.lognormvariate(7, 1.2)) for _ in range(accounts)]
+    activity = list(itertools.accumulate(rng.paretovariate(1.5) for _ in range(accounts)))
+    hours = list(itertools.accumulate(HOUR_WEIGHTS))
+    types, type_weights = list(TYPE_WEIGHTS), list(itertools.accumulate(TYPE_WEIGHTS.values()))
+
+    events = sorted(zip(
+        (start + datetime.timedelta(days=day, hours=hour, seconds=second) for day, hour, second in zip(
+            (rng.randrange(days) for _ in range(rows)),
+            rng.choices(range(24), cum_weights=hours, k=rows),
+            (rng.randrange(3600) for _ in range(rows)),
+        )),
+        rng.choices(range(accounts), cum_weights=activity, k=rows),
+        rng.choices(types, cum_weights=type_weights, k=rows),
+        (money(rng.lognormvariate(4, 1.3)) for _ in range(rows)),
+    ), key=lambda event: event[0])
+
+    balances = list(opening)
+    movements = []
+    for moment, account, kind, amount in events:
+        if kind == Transaction.TRANSFER and accounts > 1 and balances[account] >= amount:
+            other = rng.randrange(accounts - 1)
+            other += other >= account
+            balances[account] -= amount
+            balances[other] += amount
+            movements.append((account, moment, kind, amount, balances[account], other))
+            movements.append((other, moment, Transaction.DEPOSIT, amount, balances[other], account))
+            continue
+        if kind != Transaction.DEPOSIT and balances[account] < amount:
+            kind = Transaction.DEPOSIT
+        balances[account] += amount if kind == Transaction.DEPOSIT else -amount
+        movements.append((account, moment, kind, amount, balances[account], None))
+    return ibans, balances, movements
+
+
+# Set in worker processes writing to a database that allows a single writer
+# (SQLite): blocks are generated in parallel but inserted one at a time.
+write_lock = nullcontext()
+
+
+def seed_block(seed, block, first_index, accounts, rows, start, days, batch_size):
+    """
+    Generate one block and insert it in one database transaction; returns the rows written.
+    """
+    ibans, balances, movements = generate_block(seed, block, first_index, accounts, rows, start, days)
+    with write_lock, transaction.atomic(), explicit_dates():
+        created = Account.objects.bulk_create(
+            [Account(iban=iban, balance=balance) for iban, balance in zip(ibans, balances)], batch_size=batch_size)
+        pks = [account.pk for account in created]
+        entries = [
+            Transaction(account_id=pks[account], date=moment, type=kind, amount=amount, balance_after=balance_after,
+                        counterparty_id=None if other is None else pks[other])
+            for account, moment, kind, amount, balance_after, other in movements
+        ]
+        Transaction.objects.bulk_create(entries, batch_size=batch_size)
+        Transaction.after_posting(entries)
+    return len(entries)
+
+
+def start_worker(lock):
+    global write_lock
+    if lock is not None:
+        write_lock = lock
+
+
+def seed_block_in_worker(*args):
+    try:
+        return seed_block(*args)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Generate accounts with valid IBANs and transactions with consistent balance chains for load testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accounts', type=int, default=1000, help='Accounts to create.')
+        parser.add_argument('--transactions', type=int, default=100000,
+                            help='Movements to generate (a transfer writes two transactions).')
+        parser.add_argument('--days', type=int, default=365, help='Days of history, ending before --end-date.')
+        parser.add_argument('--end-date', type=datetime.date.fromisoformat, default=DEFAULT_END_DATE,
+                            help=f'Day after the last day of history (YYYY-MM-DD, default {DEFAULT_END_DATE}).')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Random seed; the same seed, block size and end date reproduce the same accounts and movements.')
+        parser.add_argument('--block-size', type=int, default=1000,
+                            help='Accounts generated and inserted together; transfers stay within a block.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT.')
+        parser.add_argument('--workers', type=int, default=1, help='Processes generating and inserting blocks in parallel.')
+
+    def handle(self, *args, accounts, transactions, days, end_date, seed, block_size, batch_size, workers, **options):
+        if accounts < 1 or transactions < 0 or days < 1:
+            raise CommandError('--accounts and --days must be positive and --transactions not negative.')
+        started = time.perf_counter()
+        start = datetime.datetime.combine(end_date, datetime.time(), datetime.timezone.utc) - datetime.timedelta(days=days)
+
+        blocks = math.ceil(accounts / block_size)
+        jobs = []
+        for block in range(blocks):
+            first_index = block * block_size
+            size = min(block_size, accounts - first_index)
+            rows = transactions * (first_index + size) // accounts - transactions * first_index // accounts
+            jobs.append((seed, block, first_index, size, rows, start, days, batch_size))
+
+        first_ibans = generate_block(seed, 0, 0, jobs[0][3], 0, start, days)[0]
+        if Account.objects.filter(iban__in=first_ibans).exists():
+            raise CommandError(f'Accounts of seed {seed} already exist; use another --seed or an empty database.')
+
+        if workers > 1:
+            context = get_context('fork')
+            lock = context.Lock() if connection.vendor == 'sqlite' else None
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                     initializer=start_worker, initargs=(lock,)) as executor:
+                written = sum(executor.map(seed_block_in_worker, *zip(*jobs)))
+        else:
+            written = sum(seed_block(*job) for job in jobs)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {accounts} accounts and {written} transactions in {elapsed:.2f}s '
+            f'({(accounts + written) / elapsed:.0f} rows/s).'
+        ))
@@ -0,0 +1,106 @@
+"""
+Per-view request metrics in the Prometheus text exposition format.
+
+RequestMetricsMiddleware records, for every request, the resolved view, the
+wall time, and the number and total duration of the SQL queries it ran.
+``registry`` aggregates them per (view, method) in this process and
+render() writes them, together with the read-through cache counters, in the
+format scraped from ``GET /api/metrics/``.
+"""
+import math
+import threading
+from collections import defaultdict
+
+from . import cache
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+    def samples(self):
+        """
+        Yield (``le`` label, cumulative count) pairs including ``+Inf``.
+        """
+        for bound, count in zip(self.buckets, self.counts):
+            yield format_value(bound), count
+        yield '+Inf', self.count
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_seconds = 0.0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = defaultdict(ViewMetrics)
+
+    def observe(self, view, method, seconds, queries, db_seconds):
+        with self.lock:
+            metrics = self.views[view, method]
+            metrics.latency.observe(seconds)
+            metrics.queries.observe(queries)
+            metrics.db_seconds += db_seconds
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+    def render(self):
+        """
+        Return every metric in the Prometheus text exposition format (version 0.0.4).
+        """
+        with self.lock:
+            views = sorted(self.views.items())
+            lines = []
+            for name, help_text, attribute in [
+                ('accounts_request_duration_seconds', 'Request latency by view.', 'latency'),
+                ('accounts_request_queries', 'SQL queries per request by view.', 'queries'),
+            ]:
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for (view, method), metrics in views:
+                    histogram = getattr(metrics, attribute)
+                    labels = f'view="{escape(view)}",method="{method}"'
+                    lines += [f'{name}_bucket{{{labels},le="{le}"}} {count}' for le, count in histogram.samples()]
+                    lines.append(f'{name}_sum{{{labels}}} {format_value(histogram.sum)}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+            lines += ['# HELP accounts_request_db_seconds_total Time spent in SQL queries by view.',
+                      '# TYPE accounts_request_db_seconds_total counter']
+            lines += [f'accounts_request_db_seconds_total{{view="{escape(view)}",method="{method}"}} '
+                      f'{format_value(metrics.db_seconds)}' for (view, method), metrics in views]
+
+        scopes = cache.metrics.snapshot()
+        for name, key in [('accounts_cache_hits_total', 'hits'), ('accounts_cache_misses_total', 'misses')]:
+            lines += [f'# HELP {name} Read-through cache {key} by scope.', f'# TYPE {name} counter']
+            lines += [f'{name}{{scope="{escape(scope)}"}} {counts[key]}' for scope, counts in scopes.items()]
+        return '\n'.join(lines) + '\n'
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value):
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = MetricsRegistry()
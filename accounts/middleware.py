@@ -0,0 +1,147 @@
+import logging
+import math
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .metrics import registry
+from .routers import PIN_COOKIE, REPLICA_METHODS, is_pinned, pin_seconds, read_replicas, replica_reads
+
+logger = logging.getLogger('accounts.metrics')
+
+current_counter = ContextVar('accounts_query_counter', default=None)
+
+
+class QueryCounter:
+    """
+    Queries run and time spent in them by one request.
+    """
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+def count_queries(execute, sql, params, many, context):
+    """
+    Database execute wrapper adding each query to the QueryCounter of the current request.
+
+    Installed on every connection when it is opened (see accounts.signals). Database
+    connections are per thread, so the request is found through a context variable,
+    which also follows async views into the threads running their ORM calls.
+    """
+    counter = current_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        counter.seconds += time.perf_counter() - started
+        counter.queries += 1
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    func = match.func
+    return getattr(getattr(func, 'view_class', None), '__name__', None) or getattr(func, '__name__', match.view_name)
+
+
+class RequestMetricsMiddleware:
+    """
+    Record latency, query count and database time of every request per resolved view.
+
+    Queries on every database are counted by the count_queries execute wrapper. Requests running more queries than ``ACCOUNTS_QUERY_BUDGET`` (when
+    set) are logged as warnings on the ``accounts.metrics`` logger. Works for
+    both sync (WSGI) and async (ASGI) request handling.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter, started = QueryCounter(), time.perf_counter()
+        token = current_counter.set(counter)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_counter.reset(token)
+        self.record(request, counter, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        counter, started = QueryCounter(), time.perf_counter()
+        token = current_counter.set(counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_counter.reset(token)
+        self.record(request, counter, time.perf_counter() - started)
+        return response
+
+    def record(self, request, counter, seconds):
+        view = view_name(request)
+        registry.observe(view, request.method, seconds, counter.queries, counter.seconds)
+        budget = getattr(settings, 'ACCOUNTS_QUERY_BUDGET', None)
+        if budget is not None and counter.queries > budget:
+            logger.warning(
+                'Query budget exceeded: %s %s (%s) ran %d queries (budget %d) in %.1f ms, %.1f ms in the database.',
+                request.method, request.get_full_path(), view, counter.queries, budget,
+                seconds * 1000, counter.seconds * 1000,
+            )
+
+
+class ReplicaReadsMiddleware:
+    """
+    Let GET and HEAD requests of views with ``read_from_replica`` read from the
+    read replicas (see accounts.routers), unless the client is pinned to the
+    primary, and pin clients to the primary after each successful write.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = replica_reads.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            replica_reads.reset(token)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        token = replica_reads.set(False)
+        try:
+            response = await self.get_response(request)
+        finally:
+            replica_reads.reset(token)
+        return self.pin(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        if (request.method in REPLICA_METHODS and getattr(view_class, 'read_from_replica', False)
+                and not is_pinned(request)):
+            replica_reads.set(True)
+
+    def pin(self, request, response):
+        if request.method not in REPLICA_METHODS and request.method != 'OPTIONS' \
+                and response.status_code < 400 and read_replicas():
+            seconds = pin_seconds()
+            response.set_cookie(PIN_COOKIE, f'{time.time() + seconds:.3f}', max_age=math.ceil(seconds),
+                                httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,71 @@
+# Generated by Django 5.1 on 2026-10-18 14:59
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_snapshots(apps, schema_editor):
+    """
+    Record the closing balance of every (account, day) already in the ledger.
+    """
+    Transaction = apps.get_model("accounts", "Transaction")
+    BalanceSnapshot = apps.get_model("accounts", "BalanceSnapshot")
+    closing = {}
+    rows = Transaction.objects.order_by("account_id", "date", "id").values_list(
+        "account_id", "date", "balance_after"
+    )
+    for account_id, date, balance_after in rows.iterator(chunk_size=2000):
+        day = date.astimezone(datetime.timezone.utc).date()
+        closing[account_id, day] = balance_after
+    BalanceSnapshot.objects.bulk_create(
+        [
+            BalanceSnapshot(account_id=account_id, day=day, balance=balance)
+            for (account_id, day), balance in closing.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_transaction_statement_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BalanceSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("balance", models.DecimalField(decimal_places=2, max_digits=10)),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="snapshots",
+                        to="accounts.account",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("account", "day"),
+                        name="balance_snapshot_account_day_unique",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
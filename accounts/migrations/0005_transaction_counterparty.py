@@ -0,0 +1,25 @@
+# Generated by Django 5.1 on 2026-10-18 15:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_balancesnapshot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="counterparty",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="accounts.account",
+            ),
+        ),
+    ]
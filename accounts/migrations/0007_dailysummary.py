@@ -0,0 +1,88 @@
+# Generated by Django 5.1 on 2026-10-18 15:20
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_summaries(apps, schema_editor):
+    """
+    Total the transactions already in the ledger by account, day and type.
+    """
+    Transaction = apps.get_model("accounts", "Transaction")
+    DailySummary = apps.get_model("accounts", "DailySummary")
+    rows = (
+        Transaction.objects.order_by()
+        .values(
+            "account_id", "type", day=TruncDate("date", tzinfo=datetime.timezone.utc)
+        )
+        .annotate(total=Sum("amount"), count=Count("id"))
+        .values_list("account_id", "day", "type", "total", "count")
+    )
+    DailySummary.objects.bulk_create(
+        [
+            DailySummary(
+                account_id=account_id, day=day, type=type, total=total, count=count
+            )
+            for account_id, day, type, total, count in rows.iterator(chunk_size=2000)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0006_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailySummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("deposit", "Deposit"),
+                            ("withdrawal", "Withdrawal"),
+                            ("transfer", "Transfer"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("total", models.DecimalField(decimal_places=2, max_digits=14)),
+                ("count", models.PositiveIntegerField()),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_summaries",
+                        to="accounts.account",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("account", "day", "type"),
+                        name="daily_summary_account_day_type_unique",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
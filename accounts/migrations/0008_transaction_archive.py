@@ -0,0 +1,120 @@
+# Generated by Django 5.1 on 2026-10-18 15:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+STATEMENT_VIEW = """
+CREATE VIEW accounts_statemententry AS
+SELECT id, account_id, date, type, amount, balance_after, counterparty_id, FALSE AS archived
+FROM accounts_transaction
+UNION ALL
+SELECT id, account_id, date, type, amount, balance_after, counterparty_id, TRUE AS archived
+FROM accounts_archivedtransaction
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0007_dailysummary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatementEntry",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("date", models.DateTimeField()),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("deposit", "Deposit"),
+                            ("withdrawal", "Withdrawal"),
+                            ("transfer", "Transfer"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("balance_after", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("archived", models.BooleanField()),
+            ],
+            options={
+                "db_table": "accounts_statemententry",
+                "managed": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedPeriod",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("period", models.DateField(unique=True)),
+                ("transactions", models.PositiveIntegerField(default=0)),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ArchivedTransaction",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("period", models.DateField()),
+                ("date", models.DateTimeField()),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("deposit", "Deposit"),
+                            ("withdrawal", "Withdrawal"),
+                            ("transfer", "Transfer"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("balance_after", models.DecimalField(decimal_places=2, max_digits=10)),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_transactions",
+                        to="accounts.account",
+                    ),
+                ),
+                (
+                    "counterparty",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="accounts.account",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["account", "-date", "-id"],
+                        name="archived_account_date_idx",
+                    ),
+                    models.Index(
+                        fields=["account", "type", "date"],
+                        name="archived_account_type_idx",
+                    ),
+                    models.Index(fields=["-date", "-id"], name="archived_date_idx"),
+                    models.Index(fields=["period"], name="archived_period_idx"),
+                ],
+            },
+        ),
+        migrations.RunSQL(STATEMENT_VIEW, "DROP VIEW accounts_statemententry"),
+    ]
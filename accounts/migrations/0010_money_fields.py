@@ -0,0 +1,80 @@
+# Generated by Django 5.1 on 2026-10-18 15:36
+
+import accounts.money
+from accounts.money import DECIMAL, convert_storage, money_storage
+from django.db import migrations
+
+
+def convert_to_configured_storage(apps, schema_editor):
+    """
+    Store money as integer cents when ACCOUNTS_MONEY_STORAGE is "cents".
+    """
+    convert_storage(schema_editor, apps.get_model, DECIMAL, money_storage())
+
+
+def convert_to_decimal(apps, schema_editor):
+    convert_storage(schema_editor, apps.get_model, money_storage(), DECIMAL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0009_queuedmovement"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name="account",
+                    name="balance",
+                    field=accounts.money.MoneyField(decimal_places=2, default=0, max_digits=10),
+                ),
+                migrations.AlterField(
+                    model_name="archivedtransaction",
+                    name="amount",
+                    field=accounts.money.MoneyField(decimal_places=2, max_digits=10),
+                ),
+                migrations.AlterField(
+                    model_name="archivedtransaction",
+                    name="balance_after",
+                    field=accounts.money.MoneyField(decimal_places=2, max_digits=10),
+                ),
+                migrations.AlterField(
+                    model_name="balancesnapshot",
+                    name="balance",
+                    field=accounts.money.MoneyField(decimal_places=2, max_digits=10),
+                ),
+                migrations.AlterField(
+                    model_name="dailysummary",
+                    name="total",
+                    field=accounts.money.MoneyField(decimal_places=2, max_digits=14),
+                ),
+                migrations.AlterField(
+                    model_name="queuedmovement",
+                    name="amount",
+                    field=accounts.money.MoneyField(decimal_places=2, max_digits=10),
+                ),
+                migrations.AlterField(
+                    model_name="queuedmovement",
+                    name="balance_after",
+                    field=accounts.money.MoneyField(
+                        blank=True, decimal_places=2, max_digits=10, null=True
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="transaction",
+                    name="amount",
+                    field=accounts.money.MoneyField(decimal_places=2, max_digits=10),
+                ),
+                migrations.AlterField(
+                    model_name="transaction",
+                    name="balance_after",
+                    field=accounts.money.MoneyField(decimal_places=2, default=0, max_digits=10),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(convert_to_configured_storage, convert_to_decimal),
+            ],
+        ),
+    ]
@@ -0,0 +1,189 @@
+# Generated by Django 5.1 on 2026-10-18 15:47
+
+import accounts.money
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+# Existing history, recent and archived, becomes the start of the log in posting order.
+BACKFILL_EVENTS = """
+INSERT INTO accounts_ledgerevent
+    (transaction_id, account_id, date, type, amount, balance_after, counterparty_id, recorded_at)
+SELECT id, account_id, date, type, amount, balance_after, counterparty_id, date
+FROM accounts_statemententry
+ORDER BY date, id
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0010_money_fields"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectedBalance",
+            fields=[
+                (
+                    "account",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to="accounts.account",
+                    ),
+                ),
+                ("balance", accounts.money.MoneyField(decimal_places=2, max_digits=10)),
+                ("sequence", models.BigIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ProjectedStatement",
+            fields=[
+                (
+                    "account",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to="accounts.account",
+                    ),
+                ),
+                ("movements", models.PositiveIntegerField()),
+                ("credits", accounts.money.MoneyField(decimal_places=2, max_digits=14)),
+                ("debits", accounts.money.MoneyField(decimal_places=2, max_digits=14)),
+                ("first_movement_at", models.DateTimeField()),
+                ("last_movement_at", models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ProjectionCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("sequence", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="LedgerEvent",
+            fields=[
+                ("sequence", models.BigAutoField(primary_key=True, serialize=False)),
+                ("date", models.DateTimeField()),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("deposit", "Deposit"),
+                            ("withdrawal", "Withdrawal"),
+                            ("transfer", "Transfer"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("amount", accounts.money.MoneyField(decimal_places=2, max_digits=10)),
+                (
+                    "balance_after",
+                    accounts.money.MoneyField(decimal_places=2, max_digits=10),
+                ),
+                (
+                    "recorded_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "account",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="accounts.account",
+                    ),
+                ),
+                (
+                    "counterparty",
+                    models.ForeignKey(
+                        blank=True,
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="accounts.account",
+                    ),
+                ),
+                (
+                    "transaction",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="accounts.transaction",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["account", "sequence"], name="ledger_event_account_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ProjectedDailyTotal",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("deposit", "Deposit"),
+                            ("withdrawal", "Withdrawal"),
+                            ("transfer", "Transfer"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("total", accounts.money.MoneyField(decimal_places=2, max_digits=14)),
+                ("count", models.PositiveIntegerField()),
+                (
+                    "account",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="accounts.account",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("account", "day", "type"),
+                        name="projected_daily_total_unique",
+                    )
+                ],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_EVENTS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-18 16:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0011_ledger_events"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="idempotencykey",
+            name="headers",
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -1,6 +1,46 @@
-from django.db import models
+import datetime
+import hashlib
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.utils import timezone
+from django.db.models import Case, Count, F, Max, Sum, When
+from django.db.models.functions import TruncDate, TruncMonth
 from django.core.exceptions import ValidationError
 
+from .cache import invalidate_accounts
+from .money import MoneyField, money_value
+
+
+class InsufficientFunds(ValidationError):
+    """
+    Raised when a debit would take an account balance below zero.
+    """
+
+
+class AccountQuerySet(models.QuerySet):
+    def apply_movement(self, account_id, amount):
+        """
+        Atomically add ``amount`` (negative for debits) to the balance of the
+        given account and return the resulting balance.
+
+        The funds check is part of the guarded UPDATE itself, so it runs under
+        the same row lock as the write and two concurrent debits can never
+        overdraw the account. Must be called inside ``transaction.atomic()`` so
+        the balance read back is the one written by this UPDATE.
+        """
+        rows = self.filter(pk=account_id)
+        if amount < 0:
+            rows = rows.filter(balance__gte=-amount)
+        if not rows.update(balance=F('balance') + money_value(amount)):
+            if not self.filter(pk=account_id).exists():
+                raise self.model.DoesNotExist('Account matching query does not exist.')
+            raise InsufficientFunds('Insufficient funds for this transaction.')
+        return self.filter(pk=account_id).values_list('balance', flat=True).get()
+
+
 class Account(models.Model):
     """
     Represents a bank account.
@@ -10,11 +50,34 @@ class Account(models.Model):
     - balance: The current balance of the account, defaulting to 0.
     """
     iban = models.CharField(max_length=34, unique=True)
-    balance = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    balance = MoneyField(max_digits=10, decimal_places=2, default=0)
+
+    objects = AccountQuerySet.as_manager()
 
     def __str__(self):
         return self.iban
 
+    def balance_as_of(self, moment):
+        """
+        Return the balance of the account at ``moment`` (an aware datetime).
+
+        Starts from the closing balance of the last snapshot day before
+        ``moment`` and adds the movements posted on the day of ``moment`` up
+        to it, so the cost is one indexed lookup plus a scan of at most one day.
+        """
+        day = moment.astimezone(datetime.timezone.utc).date()
+        history = StatementEntry.objects.filter(account=self)
+        balance = self.snapshots.filter(day__lt=day).order_by('-day').values_list('balance', flat=True).first()
+        if balance is None:
+            first = history.order_by('date', 'id').values('type', 'amount', 'balance_after').first()
+            if first is None:
+                return self.balance
+            balance = first['balance_after'] - (-first['amount'] if first['type'] in Transaction.DEBIT_TYPES else first['amount'])
+        day_start = datetime.datetime.combine(day, datetime.time.min, tzinfo=datetime.timezone.utc)
+        delta = history.filter(date__gte=day_start, date__lte=moment).aggregate(
+            total=Sum(Transaction.signed_amount_expression()))['total']
+        return balance + (delta or 0)
+
 class Transaction(models.Model):
     """
     Represents a transaction associated with a bank account.
@@ -25,8 +88,10 @@ class Transaction(models.Model):
     - type: The type of the transaction, which can be 'deposit', 'withdrawal', or 'transfer'.
     - amount: The amount of money involved in the transaction.
     - balance_after: The account balance after the transaction is applied.
+    - counterparty: For the two legs of a transfer, the account on the other side.
 
     Methods:
+    - signed_amount: The amount as applied to the balance (negative for debits).
     - save: Overrides the save method to update the account balance based on the transaction type.
     """
 
@@ -39,23 +104,640 @@ class Transaction(models.Model):
         (WITHDRAWAL, 'Withdrawal'),
         (TRANSFER, 'Transfer'),
     ]
+
+    DEBIT_TYPES = (WITHDRAWAL, TRANSFER)
     
     account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='transactions')
     date = models.DateTimeField(auto_now_add=True)
     type = models.CharField(max_length=10, choices=TRANSACTION_TYPES)
-    amount = models.DecimalField(max_digits=10, decimal_places=2)
-    balance_after = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    amount = MoneyField(max_digits=10, decimal_places=2)
+    balance_after = MoneyField(max_digits=10, decimal_places=2, default=0)
+    counterparty = models.ForeignKey(Account, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        indexes = [
+            # Per-account statement, newest first, with id breaking date ties (keyset order).
+            models.Index(fields=['account', '-date', '-id'], name='transaction_account_date_idx'),
+            # Per-account statement filtered by type and date range.
+            models.Index(fields=['account', 'type', 'date'], name='transaction_account_type_idx'),
+            # Statement across all accounts.
+            models.Index(fields=['-date', '-id'], name='transaction_date_idx'),
+        ]
 
+    @property
+    def signed_amount(self):
+        return -self.amount if self.type in self.DEBIT_TYPES else self.amount
+
+    @classmethod
+    def signed_amount_expression(cls):
+        """
+        Database expression for signed_amount, for aggregating movements.
+        """
+        return Case(
+            When(type__in=cls.DEBIT_TYPES, then=-F('amount')),
+            default=F('amount'),
+            output_field=MoneyField(max_digits=10, decimal_places=2),
+        )
+
+    @classmethod
+    def after_posting(cls, transactions):
+        """
+        Update everything derived from posted transactions, in the database
+        transaction that posted them. ``transactions`` are saved Transaction
+        instances in posting order.
+        """
+        LedgerEvent.objects.append(transactions)
+        BalanceSnapshot.objects.record(transactions)
+        DailySummary.objects.record(transactions)
+        invalidate_accounts(entry.account_id for entry in transactions)
 
     def save(self, *args, **kwargs):
         """
         Overrides the save method to update the account balance 
         depending on the transaction type before saving the transaction.
+
+        The balance is only moved when the transaction is first posted, with a
+        single guarded UPDATE in the same database transaction as the insert,
+        so concurrent posts to one account neither lose updates nor overdraw
+        it. Raises InsufficientFunds if a debit is not covered.
         """
-        if self.type == self.WITHDRAWAL or self.type == self.TRANSFER:
-            self.account.balance -= self.amount
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            self.balance_after = Account.objects.apply_movement(self.account_id, self.signed_amount)
+            super().save(*args, **kwargs)
+            self.after_posting([self])
+        if self._meta.get_field('account').is_cached(self):
+            self.account.balance = self.balance_after
+
+
+class BalanceSnapshotQuerySet(models.QuerySet):
+    def record(self, transactions):
+        """
+        Upsert the closing balance of every (account, day) touched by
+        ``transactions``, given in posting order.
+        """
+        closing = {}
+        for entry in transactions:
+            day = entry.date.astimezone(datetime.timezone.utc).date()
+            closing[entry.account_id, day] = entry.balance_after
+        self.bulk_create(
+            [self.model(account_id=account_id, day=day, balance=balance) for (account_id, day), balance in closing.items()],
+            update_conflicts=True,
+            unique_fields=['account', 'day'],
+            update_fields=['balance'],
+        )
+
+
+class BalanceSnapshot(models.Model):
+    """
+    Represents the closing balance of an account on a day with movements.
+
+    Fields:
+    - account: The account the snapshot belongs to.
+    - day: The day (UTC) the snapshot closes.
+    - balance: The account balance after the last transaction of that day.
+
+    Snapshots are written by Transaction.after_posting as transactions are
+    posted, so a past balance is the nearest snapshot plus at most one day
+    of movements (see Account.balance_as_of).
+    """
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='snapshots')
+    day = models.DateField()
+    balance = MoneyField(max_digits=10, decimal_places=2)
+
+    objects = BalanceSnapshotQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'day'], name='balance_snapshot_account_day_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.account_id} {self.day}: {self.balance}'
+
+
+class DailyTotalsQuerySet(models.QuerySet):
+    def record(self, transactions):
+        """
+        Add ``transactions`` (or ledger events) to the totals of their (account, day, type).
+
+        For DailySummary this runs in the posting database transaction after
+        the accounts were locked (by the balance UPDATE or PostingBatch), so
+        no other posting can change the same totals between the read and the upsert.
+        """
+        deltas = defaultdict(lambda: [0, 0])
+        for entry in transactions:
+            delta = deltas[entry.account_id, entry.date.astimezone(datetime.timezone.utc).date(), entry.type]
+            delta[0] += entry.amount
+            delta[1] += 1
+        if not deltas:
+            return
+        account_ids, days, _ = (set(values) for values in zip(*deltas))
+        for row in self.filter(account_id__in=account_ids, day__in=days).values_list('account_id', 'day', 'type', 'total', 'count'):
+            if row[:3] in deltas:
+                deltas[row[:3]][0] += row[3]
+                deltas[row[:3]][1] += row[4]
+        self.bulk_create(
+            [self.model(account_id=account_id, day=day, type=type, total=total, count=count)
+             for (account_id, day, type), (total, count) in deltas.items()],
+            update_conflicts=True,
+            unique_fields=['account', 'day', 'type'],
+            update_fields=['total', 'count'],
+        )
+
+    def totals(self, period):
+        """
+        Return (period start, type, total, count) rows per ``period`` ('day' or 'month') in date order.
+        """
+        if period == 'day':
+            rows = self.order_by('day', 'type')
         else:
-            self.account.balance += self.amount
-        self.balance_after = self.account.balance
-        self.account.save()
+            rows = (self.order_by().annotate(month=TruncMonth('day')).values('month', 'type')
+                    .annotate(total_sum=Sum('total'), count_sum=Sum('count')).order_by('month', 'type'))
+            return rows.values_list('month', 'type', 'total_sum', 'count_sum')
+        return rows.values_list('day', 'type', 'total', 'count')
+
+
+class DailySummaryQuerySet(DailyTotalsQuerySet):
+    def rebuild(self, account_ids=None, batch_size=1000):
+        """
+        Recompute the totals of ``account_ids`` (all accounts by default) from
+        their transactions, archived ones included, and return the number of
+        summary rows written.
+        """
+        summaries, transactions = self.all(), StatementEntry.objects.all()
+        if account_ids is not None:
+            summaries, transactions = summaries.filter(account_id__in=account_ids), transactions.filter(account_id__in=account_ids)
+        rows = (
+            transactions.order_by()
+            .values('account_id', 'type', day=TruncDate('date', tzinfo=datetime.timezone.utc))
+            .annotate(total=Sum('amount'), count=Count('id'))
+            .values_list('account_id', 'day', 'type', 'total', 'count')
+        )
+        with transaction.atomic():
+            summaries.delete()
+            batch, written = [], 0
+            for account_id, day, type, total, count in rows.iterator(chunk_size=batch_size):
+                batch.append(self.model(account_id=account_id, day=day, type=type, total=total, count=count))
+                if len(batch) == batch_size:
+                    written += len(self.bulk_create(batch))
+                    batch = []
+            written += len(self.bulk_create(batch))
+        return written
+
+
+class DailySummary(models.Model):
+    """
+    Represents the movements of one type on an account during one day.
+
+    Fields:
+    - account: The account the movements belong to.
+    - day: The day (UTC) of the movements.
+    - type: The transaction type.
+    - total: The sum of the amounts of those movements.
+    - count: The number of those movements.
+
+    Maintained by Transaction.after_posting, so account statement summaries
+    read at most one row per day and type instead of every transaction.
+    Rebuild with ``python manage.py rebuild_summaries``.
+    """
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='daily_summaries')
+    day = models.DateField()
+    type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPES)
+    total = MoneyField(max_digits=14, decimal_places=2)
+    count = models.PositiveIntegerField()
+
+    objects = DailySummaryQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'day', 'type'], name='daily_summary_account_day_type_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.account_id} {self.day} {self.type}: {self.total} ({self.count})'
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return (month_start(day) + datetime.timedelta(days=32)).replace(day=1)
+
+
+class QueuedMovementQuerySet(models.QuerySet):
+    def pending(self):
+        return self.filter(status=self.model.PENDING)
+
+
+class QueuedMovement(models.Model):
+    """
+    Represents a movement accepted by the API and waiting to be posted by the queue worker.
+
+    Fields:
+    - account: The account to post to.
+    - type: The transaction type.
+    - amount: The amount of the movement.
+    - status: 'pending' until the worker processes it, then 'posted' or 'rejected'.
+    - transaction: The transaction the movement was posted as.
+    - balance_after: The account balance after the movement was posted.
+    - errors: Why the movement was rejected.
+    - created_at: When the movement was queued.
+    - processed_at: When the worker posted or rejected it.
+    """
+    PENDING = 'pending'
+    POSTED = 'posted'
+    REJECTED = 'rejected'
+
+    STATUSES = [
+        (PENDING, 'Pending'),
+        (POSTED, 'Posted'),
+        (REJECTED, 'Rejected'),
+    ]
+
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='queued_movements')
+    type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPES)
+    amount = MoneyField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    # No database constraint: the transaction may later be moved to the archive.
+    transaction = models.ForeignKey(Transaction, on_delete=models.DO_NOTHING, db_constraint=False,
+                                    null=True, blank=True, related_name='+')
+    balance_after = MoneyField(max_digits=10, decimal_places=2, null=True, blank=True)
+    errors = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    objects = QueuedMovementQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # The worker drains pending movements oldest first.
+            models.Index(fields=['id'], condition=models.Q(status='pending'), name='queued_movement_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.account_id} {self.type} {self.amount}: {self.status}'
+
+
+class ArchivedTransaction(models.Model):
+    """
+    Represents a transaction of a closed month moved out of the transaction table.
+
+    Fields:
+    - id: The id the transaction had in the transaction table.
+    - period: The first day (UTC) of the month of the transaction; the partition key of the archive.
+    - account, date, type, amount, balance_after, counterparty: As in Transaction.
+
+    Rows are moved here by ``python manage.py archive_transactions``, so the
+    transaction table and its indexes only hold recent months. Statements
+    read both tables through StatementEntry.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    period = models.DateField()
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='archived_transactions')
+    date = models.DateTimeField()
+    type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPES)
+    amount = MoneyField(max_digits=10, decimal_places=2)
+    balance_after = MoneyField(max_digits=10, decimal_places=2)
+    counterparty = models.ForeignKey(Account, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        indexes = [
+            # The statement indexes of Transaction, so both sides of StatementEntry are read the same way.
+            models.Index(fields=['account', '-date', '-id'], name='archived_account_date_idx'),
+            models.Index(fields=['account', 'type', 'date'], name='archived_account_type_idx'),
+            models.Index(fields=['-date', '-id'], name='archived_date_idx'),
+            models.Index(fields=['period'], name='archived_period_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.account_id} {self.date}: {self.type} {self.amount}'
+
+
+class ArchivedPeriodQuerySet(models.QuerySet):
+    def horizons(self):
+        """
+        Return (archived_until, hot_from): every transaction dated before
+        ``archived_until`` is in the archive and every transaction dated from
+        ``hot_from`` on is in the transaction table. Either is None when no
+        month was archived (or started being archived) yet.
+
+        Months are archived oldest first, so between the two horizons lies at
+        most the month being moved, with rows in both tables.
+        """
+        last = self.aggregate(started=Max('period'), completed=Max('period', filter=models.Q(completed_at__isnull=False)))
+        return tuple(None if day is None else next_month(day) for day in (last['completed'], last['started']))
+
+
+class ArchivedPeriod(models.Model):
+    """
+    Represents a month whose transactions are being or were moved to the archive.
+
+    Fields:
+    - period: The first day (UTC) of the month.
+    - transactions: The number of transactions of that month moved so far.
+    - started_at: When archiving the month started.
+    - completed_at: When the last transaction of the month was moved; empty while in progress.
+    """
+    period = models.DateField(unique=True)
+    transactions = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ArchivedPeriodQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{self.period:%Y-%m}: {self.transactions}'
+
+
+class StatementEntryQuerySet(models.QuerySet):
+    def prune(self, start_date, end_date, horizons):
+        """
+        Restrict the statement to the tables the date range can touch, given
+        the ``horizons`` of ArchivedPeriod.objects.horizons().
+
+        The ``archived`` column is a constant in each branch of the view, so
+        the database skips the pruned table without reading it.
+        """
+        archived_until, hot_from = horizons
+        if hot_from is None or (start_date is not None and start_date >= hot_from):
+            return self.filter(archived=False)
+        if archived_until is not None and end_date is not None and end_date < archived_until:
+            return self.filter(archived=True)
+        return self
+
+
+STATEMENT_VIEW = """
+CREATE VIEW accounts_statemententry AS
+SELECT id, account_id, date, type, amount, balance_after, counterparty_id, FALSE AS archived
+FROM accounts_transaction
+UNION ALL
+SELECT id, account_id, date, type, amount, balance_after, counterparty_id, TRUE AS archived
+FROM accounts_archivedtransaction
+"""
+
+
+class StatementEntry(models.Model):
+    """
+    Read-only view of all transactions: the transaction table and the archive (UNION ALL).
+
+    Fields:
+    - archived: Whether the row is in the archive.
+    - id, account, date, type, amount, balance_after, counterparty: As in Transaction.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    account = models.ForeignKey(Account, on_delete=models.DO_NOTHING, related_name='+')
+    date = models.DateTimeField()
+    type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPES)
+    amount = MoneyField(max_digits=10, decimal_places=2)
+    balance_after = MoneyField(max_digits=10, decimal_places=2)
+    counterparty = models.ForeignKey(Account, on_delete=models.DO_NOTHING, null=True, related_name='+')
+    archived = models.BooleanField()
+
+    objects = StatementEntryQuerySet.as_manager()
+
+    class Meta:
+        managed = False
+        db_table = 'accounts_statemententry'
+
+
+class IdempotencyKeyQuerySet(models.QuerySet):
+    def cutoff(self):
+        return timezone.now() - datetime.timedelta(seconds=getattr(settings, 'ACCOUNTS_IDEMPOTENCY_TTL', 24 * 60 * 60))
+
+    def live(self):
+        return self.filter(created_at__gt=self.cutoff())
+
+    def expired(self):
+        return self.filter(created_at__lte=self.cutoff())
+
+    def replay(self, key):
+        """
+        Return the stored outcome of ``key`` as a dict (fingerprint, status_code,
+        response, headers), or None, with a single lookup on the unique key index.
+        """
+        return self.live().filter(key=key).values('fingerprint', 'status_code', 'response', 'headers').first()
+
+
+class IdempotencyKey(models.Model):
+    """
+    Represents the stored outcome of a POST made with an ``Idempotency-Key`` header.
+
+    Fields:
+    - key: The client-supplied idempotency key.
+    - fingerprint: SHA-256 of the method, path and body of the original request.
+    - status_code: The HTTP status of the stored response.
+    - response: The body of the stored response.
+    - headers: The headers of the stored response a client needs on a retry (e.g. Location).
+    - created_at: When the request was processed; keys expire ACCOUNTS_IDEMPOTENCY_TTL seconds later.
+    """
+    KEY_MAX_LENGTH = 255
+
+    key = models.CharField(max_length=KEY_MAX_LENGTH, unique=True)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    response = models.JSONField(encoder=DjangoJSONEncoder)
+    headers = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    objects = IdempotencyKeyQuerySet.as_manager()
+
+    def __str__(self):
+        return self.key
+
+    @staticmethod
+    def fingerprint_request(method, path, body):
+        digest = hashlib.sha256(f'{method} {path}\n'.encode())
+        digest.update(body)
+        return digest.hexdigest()
+
+
+class LedgerEventQuerySet(models.QuerySet):
+    def append(self, transactions):
+        """
+        Append an event for each of ``transactions``, saved Transaction instances in posting order.
+        """
+        self.bulk_create([
+            self.model(transaction_id=entry.pk, account_id=entry.account_id, date=entry.date, type=entry.type,
+                       amount=entry.amount, balance_after=entry.balance_after, counterparty_id=entry.counterparty_id)
+            for entry in transactions
+        ], batch_size=1000)
+
+
+class LedgerEvent(models.Model):
+    """
+    Represents one posted movement in the append-only ledger event log.
+
+    Fields:
+    - sequence: The position of the event in the log, increasing in posting order.
+    - transaction: The transaction the movement was posted as.
+    - account, date, type, amount, balance_after, counterparty: As posted on the transaction.
+    - recorded_at: When the event was appended.
+
+    Appended by Transaction.after_posting in the posting database transaction
+    and never changed afterwards. Projections (see accounts/projections.py)
+    are built from the log alone and can be replayed from it at any time.
+    """
+    sequence = models.BigAutoField(primary_key=True)
+    # No database constraints: events outlive archived transactions and deleted accounts.
+    transaction = models.ForeignKey(Transaction, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    account = models.ForeignKey(Account, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    date = models.DateTimeField()
+    type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPES)
+    amount = MoneyField(max_digits=10, decimal_places=2)
+    balance_after = MoneyField(max_digits=10, decimal_places=2)
+    counterparty = models.ForeignKey(Account, on_delete=models.DO_NOTHING, db_constraint=False,
+                                     null=True, blank=True, related_name='+')
+    recorded_at = models.DateTimeField(default=timezone.now)
+
+    objects = LedgerEventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Per-account history in log order.
+            models.Index(fields=['account', 'sequence'], name='ledger_event_account_idx'),
+        ]
+
+    def __str__(self):
+        return f'#{self.sequence} {self.account_id} {self.type} {self.amount}'
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Ledger events are append-only.')
         super().save(*args, **kwargs)
+
+
+class ProjectionCheckpoint(models.Model):
+    """
+    Represents how far a projection has consumed the ledger event log.
+
+    Fields:
+    - name: The projection name (see accounts/projections.py).
+    - sequence: The last event applied to the projection (0 before the first).
+    - updated_at: When the projection last advanced.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    sequence = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.name} @ {self.sequence}'
+
+
+class ProjectedBalanceQuerySet(models.QuerySet):
+    def record(self, events):
+        """
+        Set the balance of every account in ``events`` (in sequence order) to its last ``balance_after``.
+        """
+        closing = {event.account_id: (event.balance_after, event.sequence) for event in events}
+        self.bulk_create(
+            [self.model(account_id=account_id, balance=balance, sequence=sequence)
+             for account_id, (balance, sequence) in closing.items()],
+            update_conflicts=True,
+            unique_fields=['account'],
+            update_fields=['balance', 'sequence'],
+        )
+
+
+class ProjectedBalance(models.Model):
+    """
+    Represents the current balance of an account as projected from the ledger event log.
+
+    Fields:
+    - account: The account.
+    - balance: The balance after its last projected event.
+    - sequence: That event.
+    """
+    account = models.OneToOneField(Account, on_delete=models.DO_NOTHING, db_constraint=False,
+                                   primary_key=True, related_name='+')
+    balance = MoneyField(max_digits=10, decimal_places=2)
+    sequence = models.BigIntegerField()
+
+    objects = ProjectedBalanceQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{self.account_id}: {self.balance}'
+
+
+class ProjectedStatementQuerySet(models.QuerySet):
+    def record(self, events):
+        """
+        Add ``events`` (in sequence order) to the statements of their accounts.
+        """
+        statements = {}
+        for event in events:
+            statement = statements.get(event.account_id)
+            if statement is None:
+                statement = statements[event.account_id] = self.model(
+                    account_id=event.account_id, movements=0, credits=0, debits=0,
+                    first_movement_at=event.date, last_movement_at=event.date)
+            statement.movements += 1
+            if event.type in Transaction.DEBIT_TYPES:
+                statement.debits += event.amount
+            else:
+                statement.credits += event.amount
+            statement.last_movement_at = max(statement.last_movement_at, event.date)
+        for existing in self.filter(account_id__in=statements):
+            statement = statements[existing.account_id]
+            statement.movements += existing.movements
+            statement.credits += existing.credits
+            statement.debits += existing.debits
+            statement.first_movement_at = min(statement.first_movement_at, existing.first_movement_at)
+            statement.last_movement_at = max(statement.last_movement_at, existing.last_movement_at)
+        self.bulk_create(
+            statements.values(),
+            update_conflicts=True,
+            unique_fields=['account'],
+            update_fields=['movements', 'credits', 'debits', 'first_movement_at', 'last_movement_at'],
+        )
+
+
+class ProjectedStatement(models.Model):
+    """
+    Represents the statement totals of an account as projected from the ledger event log.
+
+    Fields:
+    - account: The account.
+    - movements: The number of its movements.
+    - credits: The sum of its deposits.
+    - debits: The sum of its withdrawals and outgoing transfers.
+    - first_movement_at, last_movement_at: The dates of its first and last movements.
+    """
+    account = models.OneToOneField(Account, on_delete=models.DO_NOTHING, db_constraint=False,
+                                   primary_key=True, related_name='+')
+    movements = models.PositiveIntegerField()
+    credits = MoneyField(max_digits=14, decimal_places=2)
+    debits = MoneyField(max_digits=14, decimal_places=2)
+    first_movement_at = models.DateTimeField()
+    last_movement_at = models.DateTimeField()
+
+    objects = ProjectedStatementQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{self.account_id}: {self.movements} movements'
+
+
+class ProjectedDailyTotal(models.Model):
+    """
+    Represents the movements of one type on an account during one day, as projected from the ledger event log.
+
+    Fields:
+    - account, day, type, total, count: As in DailySummary.
+    """
+    account = models.ForeignKey(Account, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    day = models.DateField()
+    type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPES)
+    total = MoneyField(max_digits=14, decimal_places=2)
+    count = models.PositiveIntegerField()
+
+    objects = DailyTotalsQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'day', 'type'], name='projected_daily_total_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.account_id} {self.day} {self.type}: {self.total} ({self.count})'
@@ -0,0 +1,144 @@
+"""
+Storage of money columns.
+
+Every amount and balance is a MoneyField: Python code, serializers and the
+API always see ``Decimal`` values with two decimal places, while the column
+is either NUMERIC (``decimal`` storage, the default) or a 64-bit integer
+number of cents (``cents``), as configured by ACCOUNTS_MONEY_STORAGE.
+Integer columns are smaller and summed and compared as plain integers by
+the database.
+
+Switching the storage of an existing database converts every money column
+in place (``python manage.py convert_money_storage``).
+"""
+import decimal
+
+from django.conf import settings
+from django.db import models
+
+DECIMAL = 'decimal'
+CENTS = 'cents'
+STORAGES = [DECIMAL, CENTS]
+
+# Tables (model names) and their money columns.
+MONEY_COLUMNS = {
+    'account': ['balance'],
+    'transaction': ['amount', 'balance_after'],
+    'balancesnapshot': ['balance'],
+    'dailysummary': ['total'],
+    'queuedmovement': ['amount', 'balance_after'],
+    'archivedtransaction': ['amount', 'balance_after'],
+    'ledgerevent': ['amount', 'balance_after'],
+    'projectedbalance': ['balance'],
+    'projectedstatement': ['credits', 'debits'],
+    'projecteddailytotal': ['total'],
+}
+# Precision of the intermediate NUMERIC column while values are rescaled.
+CONVERSION_MAX_DIGITS = 20
+
+
+def money_storage():
+    return getattr(settings, 'ACCOUNTS_MONEY_STORAGE', DECIMAL)
+
+
+class MoneyField(models.DecimalField):
+    """
+    A DecimalField stored as NUMERIC or as an integer number of minor units.
+
+    ``storage`` pins the column type; by default it follows ACCOUNTS_MONEY_STORAGE.
+    """
+    def __init__(self, *args, storage=None, **kwargs):
+        self.storage = storage
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.storage is not None:
+            kwargs['storage'] = self.storage
+        return name, path, args, kwargs
+
+    @property
+    def stores_cents(self):
+        return (self.storage or money_storage()) == CENTS
+
+    def get_internal_type(self):
+        return 'BigIntegerField' if self.stores_cents else 'DecimalField'
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not self.stores_cents:
+            return super().get_db_prep_value(value, connection, prepared)
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is None or hasattr(value, 'as_sql'):
+            return value
+        return int(value.scaleb(self.decimal_places).to_integral_value())
+
+    def get_db_prep_save(self, value, connection):
+        if not self.stores_cents:
+            return super().get_db_prep_save(value, connection)
+        if hasattr(value, 'as_sql'):
+            return value
+        return self.get_db_prep_value(value, connection)
+
+    def from_db_value(self, value, expression, connection):
+        if value is None or not self.stores_cents:
+            return value
+        return decimal.Decimal(value).scaleb(-self.decimal_places)
+
+
+def money_value(amount):
+    """
+    ``amount`` as a query expression, for arithmetic with money columns (``F('balance') + money_value(amount)``).
+    """
+    return models.Value(amount, output_field=MoneyField(max_digits=CONVERSION_MAX_DIGITS, decimal_places=2))
+
+
+def stored_as(connection):
+    """
+    Return the storage the money columns of the database currently use.
+    """
+    with connection.cursor() as cursor:
+        for column in connection.introspection.get_table_description(cursor, 'accounts_account'):
+            if column.name == 'balance':
+                field_type = connection.introspection.get_field_type(column.type_code, column)
+                return DECIMAL if field_type == 'DecimalField' else CENTS
+
+
+def convert_storage(schema_editor, get_model, source, target):
+    """
+    Convert every money column from ``source`` to ``target`` storage.
+
+    Each column is first widened to NUMERIC(20, 2) in place, rescaled with one
+    UPDATE and then given its target type, so no value is truncated on the
+    way. The statement view reading the transaction tables is dropped and
+    created again around the conversion.
+    """
+    from .models import STATEMENT_VIEW
+
+    if source == target:
+        return
+    quote = schema_editor.quote_name
+    schema_editor.execute('DROP VIEW IF EXISTS accounts_statemententry')
+    for model_name, names in MONEY_COLUMNS.items():
+        try:
+            model = get_model('accounts', model_name)
+        except LookupError:
+            # Added by a later migration than the one converting.
+            continue
+        for name in names:
+            field = model._meta.get_field(name)
+            scale = 10 ** field.decimal_places
+
+            def clone(storage, **overrides):
+                _, _, args, kwargs = field.deconstruct()
+                kwargs.update(storage=storage, **overrides)
+                copy = MoneyField(*args, **kwargs)
+                copy.set_attributes_from_name(name)
+                copy.model = model
+                return copy
+            wide = clone(DECIMAL, max_digits=CONVERSION_MAX_DIGITS)
+            schema_editor.alter_field(model, clone(source), wide)
+            rescale = f'ROUND({quote(field.column)} * {scale})' if target == CENTS else f'{quote(field.column)} / {scale}.0'
+            schema_editor.execute(f'UPDATE {quote(model._meta.db_table)} SET {quote(field.column)} = {rescale}')
+            schema_editor.alter_field(model, wide, clone(target))
+    schema_editor.execute(STATEMENT_VIEW)
@@ -1,6 +1,255 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import datetime
+
+from django.conf import settings
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import cache
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+
+def planner_estimate(queryset):
+    """
+    Rows the query planner expects ``queryset`` to return, or None where the database gives no estimate (SQLite).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def cached_count(queryset):
+    """
+    Return ``(count, exact)`` for ``queryset``, cached per query (filter combination) in the statement cache.
+
+    Every posted transaction invalidates the statement cache, and with it
+    every cached count. When the planner expects more rows than
+    ``ACCOUNTS_COUNT_ESTIMATE_THRESHOLD`` (None disables estimates), its
+    estimate is returned instead of running ``COUNT(*)`` and ``exact`` is False.
+    """
+    queryset = queryset.order_by()
+    sql, params = queryset.query.sql_with_params()
+    variant = 'count:' + hashlib.sha1(f'{sql}|{params!r}'.encode()).hexdigest()
+
+    def count():
+        threshold = getattr(settings, 'ACCOUNTS_COUNT_ESTIMATE_THRESHOLD', None)
+        if threshold is not None:
+            estimate = planner_estimate(queryset)
+            if estimate is not None and estimate > threshold:
+                return [estimate, False]
+        return [queryset.count(), True]
+    count, exact = cache.cached(cache.STATEMENT, '', variant, count)
+    return count, exact
+
+
+class EstimatedPage(Page):
+    """
+    A page of a paginator whose count is an estimate; whether more rows follow is known from the rows themselves.
+    """
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+    # Page validates these numbers against num_pages, which an estimate that is too low would reject.
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+    def end_index(self):
+        return (self.number - 1) * self.paginator.per_page + len(self)
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator taking its count from cached_count().
+
+    An estimated count is not used to bound the pages: any page holding rows
+    is served, and a page has a next one when a row follows it.
+    """
+    count_exact = True
+
+    @cached_property
+    def count(self):
+        count, self.count_exact = cached_count(self.object_list)
+        return count
+
+    def page(self, number):
+        self.count  # Also sets count_exact.
+        if self.count_exact:
+            return super().page(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages['no_results'])
+        return EstimatedPage(rows[:self.per_page], number, self, has_more=len(rows) > self.per_page)
+
+
+class CachedCountPagination(StandardResultsSetPagination):
+    """
+    Page-number pagination counting rows with cached_count() instead of a
+    ``COUNT(*)`` per request. Responses say whether ``count`` is exact.
+    """
+    django_paginator_class = CachedCountPaginator
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['count_exact'] = self.page.paginator.count_exact
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_exact'] = {'type': 'boolean', 'example': True}
+        return response_schema
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over ``(date, id)``.
+
+    Each page is fetched with ``WHERE (date, id) < cursor ORDER BY date, id``
+    and a LIMIT, so there is no COUNT query and no OFFSET scan: a page deep
+    into a long history costs the same as the first one. The sort direction
+    follows the queryset ordering on ``date`` (as set by OrderingFilter).
+    """
+    cursor_query_param = 'cursor'
+    page_size = StandardResultsSetPagination.page_size
+    page_size_query_param = StandardResultsSetPagination.page_size_query_param
+    max_page_size = StandardResultsSetPagination.max_page_size
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        self.descending = not queryset.query.order_by or str(queryset.query.order_by[0]).startswith('-')
+        position, reverse = self.decode_cursor(request)
+
+        descending = self.descending != reverse
+        sign = '-' if descending else ''
+        queryset = queryset.order_by(f'{sign}date', f'{sign}id')
+        if position is not None:
+            date, pk = position
+            if descending:
+                queryset = queryset.filter(Q(date__lte=date) & (Q(date__lt=date) | Q(id__lt=pk)))
+            else:
+                queryset = queryset.filter(Q(date__gte=date) & (Q(date__gt=date) | Q(id__gt=pk)))
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            reverse, date, pk = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii').split('|')
+            return (datetime.fromisoformat(date), int(pk)), reverse == 'r'
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def make_cursor(date, pk, reverse=False):
+        token = f"{'r' if reverse else 'f'}|{date.isoformat()}|{pk}"
+        return base64.urlsafe_b64encode(token.encode('ascii')).decode('ascii')
+
+    def encode_cursor(self, item, reverse):
+        date, pk = (item['date'], item['id']) if isinstance(item, dict) else (item.date, item.id)
+        return replace_query_param(self.base_url, self.cursor_query_param, self.make_cursor(date, pk, reverse))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class StatementPagination(CachedCountPagination):
+    """
+    Page-number pagination by default; switches to KeysetPagination when the
+    request carries a ``cursor`` parameter (send ``?cursor=`` for the first page).
+    """
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
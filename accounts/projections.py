@@ -0,0 +1,122 @@
+"""
+Projections of the ledger event log.
+
+Every projection is a read model built from LedgerEvent rows alone:
+
+- ``balances``: the current balance of every account with movements (ProjectedBalance).
+- ``statements``: movements, credits, debits and first and last movement per account (ProjectedStatement).
+- ``daily-totals``: totals per account, day and type (ProjectedDailyTotal).
+
+project() consumes the log from the projection's checkpoint in sequence
+order, one batch at a time. A batch and the checkpoint after it are written
+in one database transaction, so every event is applied exactly once.
+replay() empties a projection and builds it again from the first event.
+
+Sequence numbers are assigned when an event is inserted, not when it
+commits. On PostgreSQL a posting can therefore commit after one with a
+higher sequence number, and the log shows a gap until it does. The projector
+stops before any gap younger than ACCOUNTS_EVENT_GAP_SECONDS and treats
+older gaps as rolled-back postings. SQLite commits one posting at a time and
+never shows such gaps.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import LedgerEvent, ProjectedBalance, ProjectedDailyTotal, ProjectedStatement, ProjectionCheckpoint
+from .retries import retry_on_lock
+
+PROJECTIONS = {
+    'balances': ProjectedBalance,
+    'statements': ProjectedStatement,
+    'daily-totals': ProjectedDailyTotal,
+}
+PROJECTION_BATCH_SIZE = 5000
+# Events are read as named rows rather than model instances, which is much cheaper on replays.
+EVENT_FIELDS = ['sequence', 'account_id', 'date', 'type', 'amount', 'balance_after', 'recorded_at']
+
+
+def gap_seconds():
+    return getattr(settings, 'ACCOUNTS_EVENT_GAP_SECONDS', 60)
+
+
+def settled(events, after):
+    """
+    Return the leading ``events`` (read in sequence order after ``after``)
+    that can be applied without skipping an event that may still commit.
+    """
+    cutoff = timezone.now() - datetime.timedelta(seconds=gap_seconds())
+    expected = after + 1
+    for index, event in enumerate(events):
+        if event.sequence != expected and event.recorded_at > cutoff:
+            return events[:index]
+        expected = event.sequence + 1
+    return events
+
+
+def lock_checkpoint(name):
+    checkpoint, _ = ProjectionCheckpoint.objects.get_or_create(name=name)
+    return ProjectionCheckpoint.objects.select_for_update().get(pk=checkpoint.pk)
+
+
+@retry_on_lock
+def project(name, batch_size=PROJECTION_BATCH_SIZE):
+    """
+    Apply the next ``batch_size`` events of the log to projection ``name`` and return how many were applied.
+    """
+    with transaction.atomic():
+        checkpoint = lock_checkpoint(name)
+        events = settled(
+            list(LedgerEvent.objects.filter(sequence__gt=checkpoint.sequence).order_by('sequence')
+                 .values_list(*EVENT_FIELDS, named=True)[:batch_size]),
+            checkpoint.sequence,
+        )
+        if events:
+            PROJECTIONS[name].objects.record(events)
+            checkpoint.sequence = events[-1].sequence
+            checkpoint.save(update_fields=['sequence', 'updated_at'])
+    return len(events)
+
+
+def catch_up(name, batch_size=PROJECTION_BATCH_SIZE):
+    """
+    Apply batches to projection ``name`` until it reaches the end of the log (or an unsettled gap); returns the events applied.
+    """
+    applied = 0
+    while True:
+        count = project(name, batch_size)
+        applied += count
+        if count < batch_size:
+            return applied
+
+
+@retry_on_lock
+def reset(name):
+    """
+    Empty projection ``name`` and move its checkpoint back to the start of the log.
+    """
+    with transaction.atomic():
+        checkpoint = lock_checkpoint(name)
+        PROJECTIONS[name].objects.all().delete()
+        checkpoint.sequence = 0
+        checkpoint.save(update_fields=['sequence', 'updated_at'])
+
+
+def replay(name, batch_size=PROJECTION_BATCH_SIZE):
+    """
+    Rebuild projection ``name`` from the whole log and return the events applied.
+    """
+    reset(name)
+    return catch_up(name, batch_size)
+
+
+def lag(name):
+    """
+    Number of sequence numbers between the checkpoint of projection ``name`` and the end of the log.
+    """
+    last = LedgerEvent.objects.aggregate(last=Max('sequence'))['last'] or 0
+    checkpoint = ProjectionCheckpoint.objects.filter(name=name).values_list('sequence', flat=True).first() or 0
+    return last - checkpoint
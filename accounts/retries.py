@@ -0,0 +1,48 @@
+"""
+Retrying writes that failed on lock contention.
+
+SQLite allows one writer at a time: a write that cannot get the lock within
+the busy timeout fails with "database is locked". PostgreSQL can abort one
+side of a deadlock or a serialization conflict. In both cases nothing was
+written and the whole database transaction can simply be run again.
+"""
+import functools
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection
+
+LOCK_MESSAGES = ('database is locked', 'database table is locked')
+# PostgreSQL SQLSTATEs: serialization_failure, deadlock_detected.
+RETRYABLE_SQLSTATES = ('40001', '40P01')
+
+
+def is_lock_error(exc):
+    cause = exc.__cause__
+    sqlstate = getattr(cause, 'sqlstate', None) or getattr(cause, 'pgcode', None)
+    return sqlstate in RETRYABLE_SQLSTATES or any(message in str(exc) for message in LOCK_MESSAGES)
+
+
+def retry_on_lock(func):
+    """
+    Run ``func`` again, with jittered exponential backoff, when it fails on lock contention.
+
+    Only the outermost database transaction can be retried: when called inside
+    ``transaction.atomic()`` the error is re-raised for the caller to retry.
+    Attempts and backoff come from ACCOUNTS_LOCK_RETRIES and ACCOUNTS_LOCK_RETRY_BACKOFF.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        attempts = getattr(settings, 'ACCOUNTS_LOCK_RETRIES', 5)
+        backoff = getattr(settings, 'ACCOUNTS_LOCK_RETRY_BACKOFF', 0.02)
+        attempt = 1
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as exc:
+                if attempt >= attempts or connection.in_atomic_block or not is_lock_error(exc):
+                    raise
+            time.sleep(backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+            attempt += 1
+    return wrapper
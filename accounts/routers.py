@@ -0,0 +1,72 @@
+"""
+Read replicas for account and statement reads.
+
+GET and HEAD requests of views declaring ``read_from_replica = True`` (the
+account list and detail and the statement) run their queries on one of the
+databases named in ``ACCOUNTS_READ_REPLICAS``. Every write, and every read of
+any other request, uses the ``default`` database, the primary.
+
+Replicas lag behind the primary, so a client would not find its own write
+there straight away. ReplicaReadsMiddleware sets a cookie on every
+successful write and, for ``ACCOUNTS_REPLICA_PIN_SECONDS`` afterwards, the
+reads of that client stay on the primary.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'accounts_primary_until'
+REPLICA_METHODS = ('GET', 'HEAD')
+
+# Set by ReplicaReadsMiddleware while a view that may read from a replica runs.
+replica_reads = ContextVar('accounts_replica_reads', default=False)
+
+
+def read_replicas():
+    return list(getattr(settings, 'ACCOUNTS_READ_REPLICAS', []))
+
+
+def pin_seconds():
+    return getattr(settings, 'ACCOUNTS_REPLICA_PIN_SECONDS', 5)
+
+
+def reading_from_replica():
+    return replica_reads.get() and bool(read_replicas())
+
+
+def is_pinned(request):
+    """
+    Whether the client of ``request`` wrote recently enough to read from the primary.
+    """
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class ReplicaRouter:
+    """
+    Send reads flagged by ReplicaReadsMiddleware to a random read replica and everything else to the primary.
+    """
+    def db_for_read(self, model, **hints):
+        replicas = read_replicas()
+        if replicas and replica_reads.get():
+            return random.choice(replicas)
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Explicit, so saving an instance read from a replica writes to the primary.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *read_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema from the primary.
+        return False if db in read_replicas() else None
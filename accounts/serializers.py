@@ -1,5 +1,10 @@
-from rest_framework import serializers
-from .models import Account, Transaction
+import datetime
+import decimal
+from decimal import Decimal
+
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from .models import Account, QueuedMovement, Transaction, InsufficientFunds
 from rest_framework.exceptions import ValidationError
 
 class AccountSerializer(serializers.ModelSerializer):
@@ -7,12 +12,103 @@ class AccountSerializer(serializers.ModelSerializer):
         model = Account
         fields = '__all__'
 
+class AccountBalanceSerializer(serializers.Serializer):
+    account = serializers.IntegerField()
+    as_of = serializers.DateTimeField()
+    balance = serializers.DecimalField(max_digits=10, decimal_places=2)
+
 class TransactionSerializerBasic(serializers.ModelSerializer):
     balance = serializers.CharField(source='balance_after')
     class Meta:
         model = Transaction
         fields = ['date', 'type', 'amount', 'balance']
 
+def fast_encoder(field):
+    """
+    Return a function equivalent to ``field.to_representation`` that computes
+    once what DRF recomputes on every call (current time zone, decimal context
+    and quantization exponent). Values the shortcut does not cover are handed
+    to the field itself, so the output is always identical.
+    """
+    if type(field) is serializers.CharField:
+        return str
+    if isinstance(field, serializers.DateTimeField) and str(getattr(field, 'format', api_settings.DATETIME_FORMAT)).lower() == ISO_8601:
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if field_timezone is None:
+            return field.to_representation
+
+        def encode_datetime(value):
+            if not isinstance(value, datetime.datetime) or value.utcoffset() is None:
+                return field.to_representation(value)
+            value = value.astimezone(field_timezone).isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return encode_datetime
+    if (isinstance(field, serializers.DecimalField) and field.decimal_places is not None and not field.localize
+            and getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)):
+        exponent = decimal.Decimal('.1') ** field.decimal_places
+        context = decimal.getcontext().copy()
+        if field.max_digits is not None:
+            context.prec = field.max_digits
+
+        def encode_decimal(value):
+            if not isinstance(value, decimal.Decimal):
+                return field.to_representation(value)
+            return '{:f}'.format(value.quantize(exponent, rounding=field.rounding, context=context))
+        return encode_decimal
+    return field.to_representation
+
+class TransactionRowSerializer:
+    """
+    Read-only fast path producing exactly the output of a model serializer
+    (TransactionSerializerBasic by default) from ``.values()`` rows.
+
+    Field objects are built once per serializer instead of once per row, and
+    rows are read as plain dicts, so no model instances are created.
+    """
+    def __init__(self, serializer_class=TransactionSerializerBasic):
+        fields = serializer_class().fields
+        self.fields = [(name, field.source, fast_encoder(field)) for name, field in fields.items()]
+        self.sources = list(dict.fromkeys(['id', 'date'] + [source for _, source, _ in self.fields]))
+
+    def select(self, queryset):
+        """
+        Restrict ``queryset`` to the values this serializer needs (plus id and date for cursors).
+        """
+        return queryset.values(*self.sources)
+
+    def to_representation(self, row):
+        return {name: encode(row[source]) for name, source, encode in self.fields}
+
+    def encode(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+class TransactionBulkItemSerializer(serializers.Serializer):
+    """
+    Validates one row of a bulk posting request.
+
+    The account is only checked when the batch is posted, so validating a row
+    never touches the database.
+    """
+    account = serializers.IntegerField()
+    type = serializers.ChoiceField(choices=Transaction.TRANSACTION_TYPES)
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+
+class TransferSerializer(serializers.Serializer):
+    """
+    Validates a transfer between two accounts.
+
+    The accounts and the funds are checked when the transfer is executed,
+    under the account row locks.
+    """
+    source = serializers.IntegerField()
+    destination = serializers.IntegerField()
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+
+    def validate(self, data):
+        if data['source'] == data['destination']:
+            raise ValidationError('Source and destination must be different accounts.')
+        return data
+
 class TransactionSerializer(serializers.ModelSerializer):
     """
     Serializer for Transaction model.
@@ -28,6 +124,9 @@ class TransactionSerializer(serializers.ModelSerializer):
     def validate(self, data):
         """
         Ensure that the account has sufficient funds for withdrawals or transfers.
+
+        This is only a fast rejection path; the authoritative check is made
+        again by Transaction.save under the account row lock.
         """
         
         account = data['account']
@@ -38,3 +137,54 @@ class TransactionSerializer(serializers.ModelSerializer):
             raise ValidationError('Insufficient funds for this transaction.')
 
         return data
+
+    def create(self, validated_data):
+        """
+        Post the transaction, reporting a debit that lost a race for funds
+        the same way as one rejected by validate().
+        """
+        try:
+            return super().create(validated_data)
+        except InsufficientFunds as exc:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: exc.messages})
+
+
+class QueuedMovementSerializer(serializers.ModelSerializer):
+    """
+    Serializer for QueuedMovement: the tracking record of a movement posted in queued mode.
+
+    - ``transaction`` and ``balance`` are set once the worker posted the movement, ``errors`` once it rejected it.
+    """
+    balance = serializers.DecimalField(source='balance_after', max_digits=10, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = QueuedMovement
+        fields = ['id', 'account', 'type', 'amount', 'status', 'transaction', 'balance', 'errors', 'created_at', 'processed_at']
+        read_only_fields = fields
+
+
+class SummaryQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the account summary: grouping period, date range and types.
+    """
+    PERIODS = ['day', 'month']
+
+    period = serializers.ChoiceField(choices=PERIODS, default='month')
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    type = serializers.MultipleChoiceField(choices=Transaction.TRANSACTION_TYPES, required=False)
+
+    def validate(self, data):
+        if data.get('start_date') and data.get('end_date') and data['start_date'] > data['end_date']:
+            raise serializers.ValidationError('start_date must not be after end_date.')
+        return data
+
+
+class SummaryRowSerializer(serializers.Serializer):
+    """
+    Totals of one transaction type in one period (``yyyy-mm-dd`` or ``yyyy-mm``).
+    """
+    period = serializers.CharField()
+    type = serializers.ChoiceField(choices=Transaction.TRANSACTION_TYPES)
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+    count = serializers.IntegerField()
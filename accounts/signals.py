@@ -0,0 +1,39 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_accounts
+from .middleware import count_queries
+from .models import Account, Transaction
+
+
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+def invalidate_account_cache(sender, instance, **kwargs):
+    """
+    Drop cached reads of an account created, edited or deleted outside the posting path.
+    """
+    invalidate_accounts([instance.pk])
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+def invalidate_transaction_cache(sender, instance, **kwargs):
+    """
+    Drop cached statements, counts and balances of a transaction saved or deleted one by one (e.g. in the admin).
+
+    Postings also invalidate through Transaction.after_posting, which covers bulk inserts too.
+    """
+    invalidate_accounts(pk for pk in (instance.account_id, instance.counterparty_id) if pk is not None)
+
+
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    """
+    Let RequestMetricsMiddleware count the queries run on every database connection.
+
+    Installed first: connection.execute_wrapper() blocks pop the last wrapper on
+    exit, and the connection may be opened inside one of them.
+    """
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_queries)
@@ -0,0 +1,73 @@
+"""
+Boot a WSGI worker and serve one request, timing each step.
+
+Run by the ``startup`` benchmark in a fresh interpreter, optionally with
+``-X importtime``::
+
+    python -m accounts.startup <path> <spawned-at>
+
+``spawned-at`` is the time.time() at which the parent started the process,
+so the report includes interpreter start-up. The worker boots the way
+bank_account_kata.wsgi does, but in timed steps, and serves the request with
+a hand-built WSGI environ rather than the test client, which would import
+more than a worker does. It prints a JSON report on stdout.
+"""
+import io
+import json
+import os
+import sys
+import time
+
+
+def modules_loaded(package):
+    return sum(1 for name in sys.modules if name == package or name.startswith(f'{package}.'))
+
+
+def boot(path, spawned_at):
+    """
+    Boot Django, serve GET ``path`` and return the report: steps as (name, ms, modules imported) and the response status.
+    """
+    steps = []
+    mark = [time.time(), len(sys.modules)]
+
+    def step(name):
+        now = time.time()
+        steps.append({'step': name, 'ms': (now - mark[0]) * 1000, 'modules': len(sys.modules) - mark[1],
+                      'elapsed_ms': (now - spawned_at) * 1000})
+        mark[:] = [now, len(sys.modules)]
+
+    # Everything before this module ran: interpreter start-up and the site imports.
+    mark[0] = spawned_at
+    step('interpreter')
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bank_account_kata.settings')
+    import django
+    django.setup(set_prefix=False)
+    step('django.setup')
+
+    from django.core.handlers.wsgi import WSGIHandler
+    application = WSGIHandler()
+    step('wsgi handler')
+
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+    step('urlconf')
+
+    path, _, query = path.partition('?')
+    status = []
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+    }
+    response = application(environ, lambda response_status, headers: status.append(response_status))
+    b''.join(response)
+    response.close()
+    step('first request')
+
+    return {'steps': steps, 'status': int(status[0].split()[0]), 'drf_yasg_modules': modules_loaded('drf_yasg')}
+
+
+if __name__ == '__main__':
+    print(json.dumps(boot(sys.argv[1], float(sys.argv[2]))))
@@ -1,9 +1,31 @@
-from django.test import TestCase
+from io import StringIO
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, transaction as db_transaction
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.core.exceptions import ValidationError
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import Account, Transaction
-from datetime import datetime, timedelta
+from rest_framework.renderers import JSONRenderer
+from . import cache
+from .benchmarks import _boot_worker
+from .checks import check_cache_backend
+from .filters import TransactionFilter
+from .metrics import registry
+from .money import CENTS, DECIMAL, MoneyField, stored_as
+from .models import Account, ArchivedPeriod, ArchivedTransaction, BalanceSnapshot, DailySummary, IdempotencyKey, LedgerEvent, ProjectedBalance, ProjectedDailyTotal, ProjectedStatement, ProjectionCheckpoint, QueuedMovement, StatementEntry, Transaction, InsufficientFunds
+from .pagination import KeysetPagination
+from .projections import project, settled
+from .retries import retry_on_lock
+from .routers import PIN_COOKIE, ReplicaRouter, replica_reads
+from .serializers import TransactionRowSerializer, TransactionSerializerBasic
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+import json
+from unittest import skipUnless
+from unittest.mock import patch
 
 # Create your tests here.
 class TransactionModelTest(TestCase):
@@ -66,6 +88,1023 @@ class TransactionModelTest(TestCase):
         self.assertEqual(Transaction.objects.count(), 0)  # No transaction should be created
 
 
+class TransactionPostingTest(TestCase):
+    def setUp(self):
+        self.account = Account.objects.create(iban='ES7921000813610123456789', balance=1000)
+
+    def test_save_moves_balance_in_database(self):
+        """Posting updates the stored balance even through a stale Account instance."""
+        stale = Account.objects.get(pk=self.account.pk)
+        Transaction.objects.create(account=self.account, type='deposit', amount=100)
+        transaction = Transaction.objects.create(account=stale, type='withdrawal', amount=300)
+        self.assertEqual(transaction.balance_after, 800)
+        self.assertEqual(stale.balance, 800)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, 800)
+
+    def test_save_rejects_uncovered_debit(self):
+        """The guarded update refuses a debit even when the caller skipped validation."""
+        with self.assertRaises(InsufficientFunds):
+            Transaction.objects.create(account=self.account, type='transfer', amount=1000.01)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, 1000)
+        self.assertEqual(Transaction.objects.count(), 0)
+
+    def test_resave_does_not_apply_twice(self):
+        """Editing a posted transaction does not move the balance again."""
+        transaction = Transaction.objects.create(account=self.account, type='deposit', amount=100)
+        transaction.save()
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, 1100)
+
+
+class BalanceSnapshotTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.account = Account.objects.create(iban='ES7921000813610123456789', balance=1000)
+        # Post three days of movements, then move them back in time.
+        self.days = [datetime(2024, 3, day, 12, tzinfo=dt_timezone.utc) for day in (1, 2, 4)]
+        for moment, (kind, amount) in zip(self.days, [('deposit', 100), ('withdrawal', 300), ('deposit', 50)]):
+            transaction = Transaction.objects.create(account=self.account, type=kind, amount=amount)
+            Transaction.objects.filter(pk=transaction.pk).update(date=moment)
+        BalanceSnapshot.objects.all().delete()
+        BalanceSnapshot.objects.record(Transaction.objects.order_by('date', 'id'))
+
+    def balance(self, as_of):
+        response = self.client.get(f'/api/accounts/{self.account.id}/balance/', {'as_of': as_of})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['balance']
+
+    def test_posting_records_closing_balance_of_the_day(self):
+        """Each post upserts the closing balance of its day."""
+        Transaction.objects.create(account=self.account, type='deposit', amount=10)
+        Transaction.objects.create(account=self.account, type='withdrawal', amount=5)
+        today = BalanceSnapshot.objects.get(account=self.account, day=datetime.now(dt_timezone.utc).date())
+        self.assertEqual(today.balance, 855)
+        self.assertEqual(BalanceSnapshot.objects.filter(account=self.account).count(), 4)
+
+    def test_bulk_posting_records_snapshots(self):
+        """The bulk path maintains the same snapshots."""
+        self.client.post('/api/transactions/bulk/', [
+            {'account': self.account.id, 'type': 'deposit', 'amount': '1'},
+            {'account': self.account.id, 'type': 'deposit', 'amount': '2'},
+        ], format='json')
+        self.assertEqual(BalanceSnapshot.objects.get(account=self.account, day=datetime.now(dt_timezone.utc).date()).balance, 853)
+
+    def test_balance_as_of_dates(self):
+        """Dates return the balance at the end of that day, before any movement the opening balance."""
+        self.assertEqual(self.balance('2024-02-28'), '1000.00')
+        self.assertEqual(self.balance('2024-03-01'), '1100.00')
+        self.assertEqual(self.balance('2024-03-03'), '800.00')
+        self.assertEqual(self.balance('2024-03-10'), '850.00')
+
+    def test_balance_as_of_times(self):
+        """Date and time cut-offs include only the movements of that day up to the moment."""
+        self.assertEqual(self.balance('2024-03-02T11:59:59Z'), '1100.00')
+        self.assertEqual(self.balance('2024-03-02T12:00:00Z'), '800.00')
+        self.assertEqual(self.balance('2024-03-01T08:00:00Z'), '1000.00')
+
+    def test_balance_as_of_cost_is_constant(self):
+        """Account, snapshot and one-day delta are read with three queries."""
+        with self.assertNumQueries(3):
+            self.balance('2024-03-10T00:00:00Z')
+
+    def test_invalid_as_of(self):
+        """Unparseable as_of values are rejected."""
+        response = self.client.get(f'/api/accounts/{self.account.id}/balance/', {'as_of': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AccountSummaryTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.account = Account.objects.create(iban='ES7921000813610123456789', balance=1000)
+        moments = [datetime(2024, 3, 1, 9, tzinfo=dt_timezone.utc), datetime(2024, 3, 1, 17, tzinfo=dt_timezone.utc),
+                   datetime(2024, 3, 20, 12, tzinfo=dt_timezone.utc), datetime(2024, 4, 2, 12, tzinfo=dt_timezone.utc)]
+        movements = [('deposit', 100), ('deposit', 50), ('withdrawal', 30), ('transfer', 20)]
+        for moment, (kind, amount) in zip(moments, movements):
+            transaction = Transaction.objects.create(account=self.account, type=kind, amount=Decimal(amount))
+            Transaction.objects.filter(pk=transaction.pk).update(date=moment)
+        DailySummary.objects.rebuild()
+
+    def summary(self, **params):
+        response = self.client.get(f'/api/accounts/{self.account.id}/summary/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(row['period'], row['type'], row['total'], row['count']) for row in response.data['results']]
+
+    def test_monthly_summary(self):
+        """Totals and counts are grouped per month and type."""
+        self.assertEqual(self.summary(), [
+            ('2024-03', 'deposit', '150.00', 2), ('2024-03', 'withdrawal', '30.00', 1), ('2024-04', 'transfer', '20.00', 1),
+        ])
+
+    def test_daily_summary_with_filters(self):
+        """Daily grouping honours the date range and type filters."""
+        self.assertEqual(self.summary(period='day', start_date='2024-03-01', end_date='2024-03-31'), [
+            ('2024-03-01', 'deposit', '150.00', 2), ('2024-03-20', 'withdrawal', '30.00', 1),
+        ])
+        self.assertEqual(self.summary(type=['withdrawal', 'transfer']), [
+            ('2024-03', 'withdrawal', '30.00', 1), ('2024-04', 'transfer', '20.00', 1),
+        ])
+
+    def test_posting_updates_summaries(self):
+        """Single and bulk posts add to today's totals incrementally."""
+        Transaction.objects.create(account=self.account, type='deposit', amount=Decimal('5'))
+        self.client.post('/api/transactions/bulk/', [
+            {'account': self.account.id, 'type': 'deposit', 'amount': '7'},
+            {'account': self.account.id, 'type': 'withdrawal', 'amount': '2'},
+        ], format='json')
+        today = datetime.now(dt_timezone.utc).date().isoformat()
+        self.assertEqual(self.summary(period='day', start_date=today), [
+            (today, 'deposit', '12.00', 2), (today, 'withdrawal', '2.00', 1),
+        ])
+        incremental = list(DailySummary.objects.order_by('day', 'type').values_list('day', 'type', 'total', 'count'))
+        DailySummary.objects.rebuild()
+        self.assertEqual(list(DailySummary.objects.order_by('day', 'type').values_list('day', 'type', 'total', 'count')), incremental)
+
+    def test_summary_cost_is_independent_of_history(self):
+        """The summary is read with two queries from the rollups, however many transactions there are."""
+        for _ in range(20):
+            Transaction.objects.create(account=self.account, type='deposit', amount=Decimal('1'))
+        with self.assertNumQueries(2):
+            self.summary()
+
+    def test_rebuild_command(self):
+        """rebuild_summaries recomputes the rollups from the transactions."""
+        DailySummary.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_summaries', stdout=out)
+        self.assertIn('Rebuilt 3 daily summaries', out.getvalue())
+        self.assertEqual(len(self.summary(period='day')), 3)
+
+    def test_invalid_parameters(self):
+        """Unknown periods, reversed ranges and unknown accounts are rejected."""
+        url = f'/api/accounts/{self.account.id}/summary/'
+        self.assertEqual(self.client.get(url, {'period': 'week'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'start_date': '2024-04-01', 'end_date': '2024-03-01'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/api/accounts/999999/summary/').status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ReconcileLedgerTest(TestCase):
+    def setUp(self):
+        self.account = Account.objects.create(iban='ES7921000813610123456789', balance=1000)
+        self.other = Account.objects.create(iban='ES9121000418450200051332', balance=500)
+        self.idle = Account.objects.create(iban='ES6621000418401234567891', balance=42)
+        for kind, amount in [('deposit', 100), ('withdrawal', 30), ('transfer', 20)]:
+            Transaction.objects.create(account=self.account, type=kind, amount=amount)
+        Transaction.objects.create(account=self.other, type='deposit', amount=1)
+
+    def reconcile(self, *args):
+        out = StringIO()
+        call_command('reconcile_ledger', '--batch-size', '2', *args, stdout=out)
+        return out.getvalue()
+
+    def test_consistent_ledger_reports_no_drift(self):
+        """Balances that match their history are not reported."""
+        output = self.reconcile()
+        self.assertIn('Checked 2 accounts', output)
+        self.assertIn('0 drifted', output)
+
+    def test_drift_is_reported_and_repaired(self):
+        """An edited balance is reported and put back by --repair."""
+        Account.objects.filter(pk=self.account.pk).update(balance=2000)
+        output = self.reconcile()
+        self.assertIn(f'Account {self.account.pk} ({self.account.iban}): balance 2000.00, expected 1050.00, drift 950.00', output)
+        self.assertIn('1 drifted', output)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, 2000)
+
+        self.reconcile('--repair')
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, 1050)
+        self.assertIn('0 drifted', self.reconcile())
+
+    def test_edited_transaction_amount_is_detected(self):
+        """Editing a posted amount desynchronizes the ledger and is detected."""
+        Transaction.objects.filter(account=self.account, type='withdrawal').update(amount=40)
+        self.assertIn(f'Account {self.account.pk} ({self.account.iban}): balance 1050.00, expected 1040.00, drift 10.00', self.reconcile())
+
+
+class SeedLedgerTest(TestCase):
+    def seed(self):
+        call_command('seed_ledger', accounts=12, transactions=300, days=30, seed=7, block_size=5, stdout=StringIO())
+        return (list(Account.objects.order_by('pk').values_list('iban', 'balance')),
+                list(Transaction.objects.order_by('pk').values_list('date', 'type', 'amount', 'balance_after')))
+
+    def test_generated_ledger_is_consistent(self):
+        """Seeded accounts have valid IBANs and balances that match their transaction chains."""
+        accounts, transactions = self.seed()
+        self.assertEqual(len(accounts), 12)
+        self.assertGreaterEqual(len(transactions), 300)
+        for iban, _ in accounts:
+            self.assertRegex(iban, r'^ES\d{22}$')
+            self.assertEqual(int(''.join(str(int(char, 36)) for char in iban[4:] + iban[:4])) % 97, 1)
+        out = StringIO()
+        call_command('reconcile_ledger', stdout=out)
+        self.assertIn('Checked 12 accounts', out.getvalue())
+        self.assertIn('0 drifted', out.getvalue())
+        for account in Account.objects.all():
+            last = account.transactions.order_by('-date', '-id').first()
+            self.assertEqual(account.balance, last.balance_after)
+        self.assertFalse(Transaction.objects.filter(balance_after__lt=0).exists())
+        for debit in Transaction.objects.filter(type='transfer'):
+            self.assertTrue(Transaction.objects.filter(account=debit.counterparty, counterparty=debit.account_id,
+                                                       type='deposit', amount=debit.amount, date=debit.date).exists())
+        self.assertTrue(BalanceSnapshot.objects.exists())
+
+    def test_same_seed_reproduces_ledger(self):
+        """Running again with the same seed on an empty database generates the same data, on any day."""
+        first = self.seed()
+        with self.assertRaises(CommandError):
+            self.seed()
+        Account.objects.all().delete()
+        with patch('django.utils.timezone.now', return_value=datetime(2031, 6, 1, 12, tzinfo=dt_timezone.utc)):
+            self.assertEqual(self.seed(), first)
+
+    def test_history_ends_before_end_date(self):
+        """Movements are dated over --days days before --end-date."""
+        call_command('seed_ledger', '--end-date', '2024-03-01', accounts=3, transactions=50, days=10, stdout=StringIO())
+        dates = Transaction.objects.values_list('date', flat=True)
+        self.assertGreaterEqual(min(dates), datetime(2024, 2, 20, tzinfo=dt_timezone.utc))
+        self.assertLess(max(dates), datetime(2024, 3, 1, tzinfo=dt_timezone.utc))
+
+
+class ArchiveTransactionsTest(TestCase):
+    def setUp(self):
+        # Cached statements would outlive the rolled back test transaction.
+        cache.get_cache().clear()
+        self.addCleanup(cache.get_cache().clear)
+        self.client = APIClient()
+        self.account = Account.objects.create(iban='ES7921000813610123456789', balance=1000)
+        dates = [datetime(2024, 1, 10, tzinfo=dt_timezone.utc), datetime(2024, 1, 20, tzinfo=dt_timezone.utc),
+                 datetime(2024, 2, 5, tzinfo=dt_timezone.utc), datetime(2024, 3, 1, tzinfo=dt_timezone.utc)]
+        for moment, (kind, amount) in zip(dates, [('deposit', 100), ('withdrawal', 30), ('transfer', 20), ('deposit', 5)]):
+            entry = Transaction.objects.create(account=self.account, type=kind, amount=amount)
+            Transaction.objects.filter(pk=entry.pk).update(date=moment)
+        Transaction.objects.create(account=self.account, type='deposit', amount=1)
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command('archive_transactions', *args, stdout=out)
+        return out.getvalue()
+
+    def statement(self, params=None):
+        response = self.client.get(f'/api/accounts/{self.account.id}/transactions/', params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(row['date'], row['type'], row['balance']) for row in response.data['results']]
+
+    def test_closed_months_are_moved_in_batches(self):
+        """Months before --before move to the archive with their ids; later ones stay."""
+        self.assertIn('Archived 3 transactions of 2 months', self.archive('--before', '2024-03', '--batch-size', '1'))
+        self.assertEqual(Transaction.objects.count(), 2)
+        self.assertEqual(sorted(ArchivedTransaction.objects.values_list('period', 'type', 'balance_after')), [
+            (datetime(2024, 1, 1).date(), 'deposit', Decimal('1100.00')),
+            (datetime(2024, 1, 1).date(), 'withdrawal', Decimal('1070.00')),
+            (datetime(2024, 2, 1).date(), 'transfer', Decimal('1050.00')),
+        ])
+        self.assertEqual(list(ArchivedPeriod.objects.order_by('period').values_list('transactions', flat=True)), [2, 1])
+        self.assertFalse(ArchivedPeriod.objects.filter(completed_at__isnull=True).exists())
+        self.assertEqual(ArchivedPeriod.objects.horizons(), (datetime(2024, 3, 1).date(), datetime(2024, 3, 1).date()))
+
+    @override_settings(ACCOUNTS_CACHE_ENABLED=True, ACCOUNTS_CACHED_STATEMENT_PAGES=0)
+    def test_archiving_in_another_process_keeps_statements_whole(self):
+        """Archived rows stay in statements when the archiving process's invalidations do not reach this one."""
+        before = self.statement()
+        with patch('accounts.cache.bump_version'):
+            self.archive('--before', '2024-02')
+        self.assertEqual(self.statement(), before)
+
+    def test_statements_include_archived_transactions(self):
+        """Statements, reconciliation and summary rebuilds read the archive too."""
+        before = self.statement()
+        DailySummary.objects.rebuild()
+        summaries = sorted(DailySummary.objects.values_list('day', 'type', 'total', 'count'))
+        self.archive('--before', '2024-03')
+        self.assertEqual(self.statement(), before)
+        self.assertEqual(len(self.statement({'start_date': '2024-01-15', 'end_date': '2024-02-28'})), 2)
+        out = StringIO()
+        call_command('reconcile_ledger', stdout=out)
+        self.assertIn('0 drifted', out.getvalue())
+        DailySummary.objects.rebuild()
+        self.assertEqual(sorted(DailySummary.objects.values_list('day', 'type', 'total', 'count')), summaries)
+
+    def test_date_range_prunes_partitions(self):
+        """Ranges on one side of the archive horizons only read that table."""
+        self.archive('--before', '2024-03')
+        base = StatementEntry.objects.all()
+
+        def statement(params):
+            return str(TransactionFilter(params, queryset=base).qs.query)
+        self.assertEqual(statement({'start_date': '2024-03-01'}),
+                         str(base.filter(date__gte=datetime(2024, 3, 1).date()).filter(archived=False).query))
+        self.assertEqual(statement({'end_date': '2024-02-28'}),
+                         str(base.filter(date__lte=datetime(2024, 2, 28).date()).filter(archived=True).query))
+        self.assertEqual(statement({'start_date': '2024-02-01'}), str(base.filter(date__gte=datetime(2024, 2, 1).date()).query))
+
+    def test_nothing_archived_reads_recent_table_only(self):
+        """Without archived months every statement is pruned to the transaction table."""
+        self.assertEqual(str(TransactionFilter({}, queryset=StatementEntry.objects.all()).qs.query),
+                         str(StatementEntry.objects.filter(archived=False).query))
+
+    def test_only_closed_months_and_dry_run(self):
+        """The open month cannot be archived and --dry-run moves nothing."""
+        with self.assertRaises(CommandError):
+            self.archive('--before', '2999-01')
+        self.assertIn('Would archive 2024-01', self.archive('--before', '2024-03', '--dry-run'))
+        self.assertEqual(Transaction.objects.count(), 5)
+        self.assertFalse(ArchivedPeriod.objects.exists())
+
+
+class EventLogTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.first = Account.objects.create(iban='ES7921000813610123456789', balance=Decimal('100.00'))
+        self.second = Account.objects.create(iban='ES1000492352082414205416', balance=Decimal('0.00'))
+        self.post('deposit', '50.00')
+        self.post('withdrawal', '500.00')  # Rejected: never logged.
+        self.post('withdrawal', '30.00')
+        self.client.post('/api/transfers/', {'source': self.first.id, 'destination': self.second.id, 'amount': '20.00'}, format='json')
+
+    def post(self, kind, amount, account=None):
+        return self.client.post('/api/transactions/', {'account': (account or self.first).id, 'type': kind, 'amount': amount}, format='json')
+
+    def test_postings_append_events_in_posting_order(self):
+        """Every posted transaction, and nothing else, is appended to the log in posting order."""
+        events = list(LedgerEvent.objects.order_by('sequence').values_list(
+            'transaction_id', 'account_id', 'type', 'amount', 'balance_after', 'counterparty_id'))
+        transactions = list(Transaction.objects.order_by('id').values_list(
+            'id', 'account_id', 'type', 'amount', 'balance_after', 'counterparty_id'))
+        self.assertEqual(events, transactions)
+        self.assertEqual([event[2] for event in events], ['deposit', 'withdrawal', 'transfer', 'deposit'])
+        event = LedgerEvent.objects.first()
+        with self.assertRaises(ValueError):
+            event.save()
+
+    def test_projector_consumes_the_log_from_its_checkpoint(self):
+        """Projections match the posted state and only new events are applied on the next run."""
+        call_command('run_projector', '--once', stdout=StringIO())
+        self.assertEqual(dict(ProjectedBalance.objects.values_list('account_id', 'balance')),
+                         {self.first.id: Decimal('100.00'), self.second.id: Decimal('20.00')})
+        statement = ProjectedStatement.objects.get(account=self.first)
+        self.assertEqual((statement.movements, statement.credits, statement.debits), (3, Decimal('50.00'), Decimal('50.00')))
+        fields = ('account_id', 'day', 'type', 'total', 'count')
+        self.assertEqual(set(ProjectedDailyTotal.objects.values_list(*fields)), set(DailySummary.objects.values_list(*fields)))
+        last = LedgerEvent.objects.order_by('-sequence').values_list('sequence', flat=True).first()
+        self.assertEqual(set(ProjectionCheckpoint.objects.values_list('sequence', flat=True)), {last})
+
+        self.post('deposit', '5.00', self.second)
+        self.assertEqual(project('balances'), 1)
+        self.assertEqual(project('balances'), 0)
+        self.assertEqual(ProjectedBalance.objects.get(account=self.second).balance, Decimal('25.00'))
+        self.assertEqual(ProjectedStatement.objects.get(account=self.second).movements, 1)
+
+    def test_replay_rebuilds_projections(self):
+        """Replaying a projection rebuilds it from the whole log, whatever it held before."""
+        call_command('run_projector', '--once', stdout=StringIO())
+        ProjectedBalance.objects.filter(account=self.first).update(balance=Decimal('1.00'))
+        ProjectedStatement.objects.all().delete()
+        out = StringIO()
+        call_command('replay_projection', 'balances', 'statements', '--batch-size', '2', stdout=out)
+        self.assertIn('Replayed 4 events into balances', out.getvalue())
+        self.assertEqual(ProjectedBalance.objects.get(account=self.first).balance, Decimal('100.00'))
+        self.assertEqual(ProjectedStatement.objects.get(account=self.first).movements, 3)
+        with self.assertRaises(CommandError):
+            call_command('replay_projection', 'nope', stdout=StringIO())
+
+    def test_projector_stops_before_recent_gaps(self):
+        """A gap in the sequence holds the projector back until it is older than ACCOUNTS_EVENT_GAP_SECONDS."""
+        now = datetime.now(dt_timezone.utc)
+        events = [LedgerEvent(sequence=sequence, recorded_at=now) for sequence in (11, 12, 14, 15)]
+        self.assertEqual([event.sequence for event in settled(events, 10)], [11, 12])
+        self.assertEqual(settled(events, 9), [])
+        events[2].recorded_at = now - timedelta(minutes=5)
+        self.assertEqual([event.sequence for event in settled(events, 10)], [11, 12, 14, 15])
+
+
+class MoneyStorageTest(TransactionTestCase):
+    def test_cents_storage_converts_at_database_boundary(self):
+        """Cents storage writes integer minor units and reads back the same Decimal."""
+        field = MoneyField(max_digits=10, decimal_places=2, storage=CENTS)
+        self.assertEqual(field.get_db_prep_save(Decimal('12.34'), connection), 1234)
+        self.assertEqual(field.get_db_prep_save(-5, connection), -500)
+        self.assertEqual(field.from_db_value(1234, None, connection), Decimal('12.34'))
+        self.assertEqual(field.db_type(connection), connection.data_types['BigIntegerField'])
+
+    def test_converting_storage_keeps_api_output(self):
+        """Converting the money columns back and forth leaves balances, statements and reconciliation unchanged."""
+        client = APIClient()
+        account = Account.objects.create(iban='ES7921000813610123456789', balance=Decimal('99999.99'))
+        for kind, amount in [('deposit', '0.01'), ('withdrawal', '1234.56'), ('transfer', '0.10')]:
+            client.post('/api/transactions/', {'account': account.id, 'type': kind, 'amount': amount}, format='json')
+
+        def read():
+            cache.get_cache().clear()
+            return (client.get(f'/api/accounts/{account.id}/').data,
+                    client.get(f'/api/accounts/{account.id}/transactions/').data['results'])
+        before = read()
+        source = stored_as(connection)
+        target = CENTS if source == DECIMAL else DECIMAL
+        try:
+            with override_settings(ACCOUNTS_MONEY_STORAGE=target):
+                call_command('convert_money_storage', stdout=StringIO())
+                self.assertEqual(stored_as(connection), target)
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT balance FROM accounts_account')
+                    raw = cursor.fetchone()[0]
+                self.assertEqual(str(raw), '9876534' if target == CENTS else '98765.34')
+                self.assertEqual(read(), before)
+                client.post('/api/transactions/', {'account': account.id, 'type': 'deposit', 'amount': '0.56'}, format='json')
+                self.assertEqual(client.get(f'/api/accounts/{account.id}/').data['balance'], '98765.90')
+                out = StringIO()
+                call_command('reconcile_ledger', stdout=out)
+                self.assertIn('0 drifted', out.getvalue())
+        finally:
+            call_command('convert_money_storage', '--to', source, stdout=StringIO())
+        self.assertEqual(Account.objects.get(pk=account.pk).balance, Decimal('98765.90'))
+
+
+class ReplicaRoutingTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.account = Account.objects.create(iban='ES7921000813610123456789', balance=Decimal('100.00'))
+        cache.get_cache().clear()
+        self.addCleanup(cache.get_cache().clear)
+
+    def routed(self, request):
+        """
+        Run ``request`` and return, for every query it ran, whether it was routed to the replicas.
+        """
+        flags = []
+
+        def record(execute, sql, params, many, context):
+            flags.append(replica_reads.get())
+            return execute(sql, params, many, context)
+        with connection.execute_wrapper(record):
+            request()
+        self.assertTrue(flags)
+        return flags
+
+    @override_settings(ACCOUNTS_READ_REPLICAS=['replica'])
+    def test_router_sends_only_flagged_reads_to_replicas(self):
+        """Reads go to a replica only while the middleware allows it; writes and migrations stay on the primary."""
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Account))
+        token = replica_reads.set(True)
+        try:
+            self.assertEqual(router.db_for_read(Account), 'replica')
+            self.assertEqual(router.db_for_write(Account, instance=self.account), 'default')
+        finally:
+            replica_reads.reset(token)
+        self.assertFalse(router.allow_migrate('replica', 'accounts'))
+        self.assertIsNone(router.allow_migrate('default', 'accounts'))
+
+    @override_settings(ACCOUNTS_READ_REPLICAS=['default'])
+    def test_account_and_statement_reads_use_replicas(self):
+        """GETs of the account list, account detail and statement views read from replicas; other views do not."""
+        Transaction.objects.create(account=self.account, type=Transaction.DEPOSIT, amount=Decimal('5.00'))
+        async_client = AsyncClient()
+        for request in [
+            lambda: self.client.get('/api/accounts/'),
+            lambda: self.client.get(f'/api/accounts/{self.account.id}/'),
+            lambda: self.client.get('/api/transactions/'),
+            lambda: async_to_sync(async_client.get)(f'/api/async/accounts/{self.account.id}/'),
+            lambda: async_to_sync(async_client.get)('/api/async/transactions/'),
+        ]:
+            self.assertTrue(all(self.routed(request)))
+        self.assertFalse(any(self.routed(lambda: self.client.get(f'/api/accounts/{self.account.id}/balance/'))))
+        self.assertFalse(any(self.routed(lambda: self.client.post(
+            '/api/transactions/', {'account': self.account.id, 'type': 'deposit', 'amount': '1.00'}, format='json'))))
+
+    @override_settings(ACCOUNTS_READ_REPLICAS=['default'], ACCOUNTS_REPLICA_PIN_SECONDS=30)
+    def test_writes_pin_the_client_to_the_primary(self):
+        """After a successful write the client reads from the primary until its pin cookie expires."""
+        response = self.client.post('/api/transactions/', {'account': self.account.id, 'type': 'deposit', 'amount': '1.00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 30)
+        self.assertFalse(any(self.routed(lambda: self.client.get(f'/api/accounts/{self.account.id}/'))))
+
+        rejected = self.client.post('/api/transactions/', {'account': self.account.id, 'type': 'withdrawal', 'amount': '500.00'}, format='json')
+        self.assertEqual(rejected.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn(PIN_COOKIE, rejected.cookies)
+
+        self.client.cookies[PIN_COOKIE] = '1'
+        cache.get_cache().clear()
+        self.assertTrue(all(self.routed(lambda: self.client.get(f'/api/accounts/{self.account.id}/'))))
+
+    @override_settings(ACCOUNTS_READ_REPLICAS=['default'], ACCOUNTS_REPLICA_PIN_SECONDS=30, ACCOUNTS_CACHE_ENABLED=True)
+    def test_pinned_client_never_gets_cached_replica_reads(self):
+        """A balance another client cached from a lagging replica is not served to the client that just wrote."""
+        writer, reader = APIClient(), APIClient()
+        response = writer.post('/api/transactions/', {'account': self.account.id, 'type': 'deposit', 'amount': '50.00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # The replica has not replayed the deposit yet when the other client reads it.
+        Account.objects.filter(pk=self.account.id).update(balance=Decimal('100.00'))
+        self.assertEqual(reader.get(f'/api/accounts/{self.account.id}/').data['balance'], '100.00')
+        Account.objects.filter(pk=self.account.id).update(balance=Decimal('150.00'))
+
+        self.assertEqual(writer.get(f'/api/accounts/{self.account.id}/').data['balance'], '150.00')
+
+    def test_no_pinning_without_replicas(self):
+        """Without replicas every read uses the primary and writes set no cookie."""
+        response = self.client.post('/api/transactions/', {'account': self.account.id, 'type': 'deposit', 'amount': '1.00'}, format='json')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.assertIsNone(ReplicaRouter().db_for_read(Account))
+
+
+class LockRetryTest(TestCase):
+    def flaky(self, failures, message='database is locked'):
+        calls = []
+
+        @retry_on_lock
+        def write():
+            calls.append(1)
+            if len(calls) <= failures:
+                raise OperationalError(message)
+            return len(calls)
+        return write, calls
+
+    @override_settings(ACCOUNTS_LOCK_RETRIES=3, ACCOUNTS_LOCK_RETRY_BACKOFF=0)
+    def test_lock_errors_are_retried(self):
+        """Writes failing on a locked database are run again, up to the configured attempts."""
+        write, calls = self.flaky(2)
+        with patch.object(connection, 'in_atomic_block', False):
+            self.assertEqual(write(), 3)
+            write, calls = self.flaky(3)
+            with self.assertRaises(OperationalError):
+                write()
+        self.assertEqual(len(calls), 3)
+
+    @override_settings(ACCOUNTS_LOCK_RETRY_BACKOFF=0)
+    def test_other_errors_and_nested_transactions_are_not_retried(self):
+        """Only lock errors of the outermost transaction are retried."""
+        write, calls = self.flaky(1, 'no such table: accounts_account')
+        with patch.object(connection, 'in_atomic_block', False), self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 1)
+        write, calls = self.flaky(1)
+        with db_transaction.atomic(), self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 1)
+
+    @skipUnless(connection.vendor == 'sqlite' and connection.settings_dict['OPTIONS'].get('init_command'),
+                'Tuned SQLite profile disabled')
+    def test_sqlite_connections_are_tuned(self):
+        """Connections are opened with the high-throughput pragmas and immediate transactions."""
+        with connection.cursor() as cursor:
+            self.assertEqual(cursor.execute('PRAGMA synchronous').fetchone()[0], 1)
+            self.assertEqual(cursor.execute('PRAGMA busy_timeout').fetchone()[0], 20000)
+            self.assertEqual(cursor.execute('PRAGMA temp_store').fetchone()[0], 2)
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+class TransactionBulkCreateTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.account = Account.objects.create(iban='ES7921000813610123456789', balance=100)
+        self.other = Account.objects.create(iban='ES9121000418450200051332', balance=0)
+
+    def test_bulk_json_array_reports_each_row(self):
+        """Rows are posted in order with running balances; bad rows are rejected on their own."""
+        response = self.client.post('/api/transactions/bulk/', [
+            {'account': self.account.id, 'type': 'withdrawal', 'amount': '80'},
+            {'account': self.account.id, 'type': 'transfer', 'amount': '30'},
+            {'account': self.other.id, 'type': 'deposit', 'amount': '10'},
+            {'account': self.account.id, 'type': 'deposit', 'amount': '5'},
+            {'account': 999999, 'type': 'deposit', 'amount': '1'},
+            {'account': self.account.id, 'type': 'refund', 'amount': '1'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['accepted'], 3)
+        self.assertEqual(response.data['rejected'], 3)
+        self.assertEqual([row['status'] for row in response.data['results']],
+                         ['accepted', 'rejected', 'accepted', 'accepted', 'rejected', 'rejected'])
+        self.assertEqual(response.data['results'][3]['balance'], '25.00')
+        self.assertIn('account', response.data['results'][4]['errors'])
+        self.assertIn('type', response.data['results'][5]['errors'])
+        self.account.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.account.balance, 25)
+        self.assertEqual(self.other.balance, 10)
+        self.assertEqual(list(self.account.transactions.order_by('id').values_list('balance_after', flat=True)), [20, 25])
+
+    def test_bulk_rejects_non_positive_amounts(self):
+        """Amounts must be positive whatever the type; the type alone decides the sign."""
+        response = self.client.post('/api/transactions/bulk/', [
+            {'account': self.account.id, 'type': 'withdrawal', 'amount': '-500'},
+            {'account': self.account.id, 'type': 'deposit', 'amount': '-40'},
+            {'account': self.account.id, 'type': 'deposit', 'amount': '0'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['rejected'], 3)
+        self.assertIn('amount', response.data['results'][0]['errors'])
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, 100)
+        self.assertFalse(DailySummary.objects.exists())
+
+    def test_bulk_ndjson_stream(self):
+        """Newline-delimited JSON bodies are accepted as well."""
+        body = '\n'.join([
+            '{"account": %d, "type": "deposit", "amount": "1.50"}' % self.other.id,
+            '',
+            '{"account": %d, "type": "deposit", "amount": "2.50"}' % self.other.id,
+        ])
+        response = self.client.post('/api/transactions/bulk/', body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['accepted'], 2)
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.balance, 4)
+
+    def test_bulk_rejects_non_list_body(self):
+        """A single object is not a valid bulk request."""
+        response = self.client.post('/api/transactions/bulk/', {'account': self.account.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class QueuedPostingTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.account = Account.objects.create(iban='ES7921000813610123456789', balance=1000)
+        self.other = Account.objects.create(iban='ES9121000418450200051332', balance=100)
+
+    def enqueue(self, account, kind, amount, **headers):
+        return self.client.post('/api/transactions/', {'account': account.id, 'type': kind, 'amount': amount},
+                                format='json', HTTP_PREFER='respond-async', **headers)
+
+    def drain(self):
+        out = StringIO()
+        call_command('process_posting_queue', '--once', stdout=out)
+        return out.getvalue()
+
+    def test_posted_balance_is_read_after_the_worker_runs(self):
+        """Reads after the worker posted a movement return the new balance, not one cached before."""
+        self.enqueue(self.account, 'deposit', '35.00')
+        self.assertEqual(self.client.get(f'/api/accounts/{self.account.id}/').data['balance'], '1000.00')
+        self.drain()
+        self.assertEqual(self.client.get(f'/api/accounts/{self.account.id}/').data['balance'], '1035.00')
+
+    @override_settings(ACCOUNTS_CACHE_ENABLED=True)
+    def test_worker_refuses_a_per_process_cache(self):
+        """The worker does not start when its invalidations could not reach the web workers."""
+        with self.assertRaises(CommandError):
+            self.drain()
+        with override_settings(ACCOUNTS_POSTING_MODE='queued'):
+            self.assertEqual([error.id for error in check_cache_backend(None)], ['accounts.E001'])
+
+    def test_queued_post_is_accepted_without_posting(self):
+        """Prefer: respond-async stores the movement and answers 202 with its tracking record."""
+        response = self.enqueue(self.account, 'deposit', '50.00')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response['Location'], f'/api/transactions/queue/{response.data["id"]}/')
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertIsNone(response.data['transaction'])
+        self.assertFalse(Transaction.objects.exists())
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, 1000)
+
+    def test_worker_posts_queue_in_order(self):
+        """The worker posts queued movements in order and the status endpoint reports the outcome."""
+        first = self.enqueue(self.account, 'withdrawal', '600.00').data['id']
+        second = self.enqueue(self.account, 'withdrawal', '600.00').data['id']
+        third = self.enqueue(self.other, 'deposit', '1.00').data['id']
+        self.assertIn('Processed 3 queued movements', self.drain())
+
+        posted = self.client.get(f'/api/transactions/queue/{first}/').data
+        self.assertEqual((posted['status'], posted['balance']), ('posted', '400.00'))
+        self.assertEqual(Transaction.objects.get(pk=posted['transaction']).balance_after, Decimal('400.00'))
+        rejected = self.client.get(f'/api/transactions/queue/{second}/').data
+        self.assertEqual(rejected['status'], 'rejected')
+        self.assertEqual(rejected['errors'], {'non_field_errors': ['Insufficient funds for this transaction.']})
+        self.assertEqual(self.client.get(f'/api/transactions/queue/{third}/').data['balance'], '101.00')
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, 400)
+        self.assertIn('Processed 0 queued movements', self.drain())
+
+    def test_worker_moves_each_balance_once_per_batch(self):
+        """A batch of queued movements is one insert and one balance update per account."""
+        for _ in range(10):
+            self.enqueue(self.account, 'deposit', '1.00')
+            self.enqueue(self.other, 'deposit', '2.00')
+        with CaptureQueriesContext(connection) as queries:
+            self.drain()
+        statements = [query['sql'] for query in queries.captured_queries]
+        self.assertEqual(sum(sql.startswith('UPDATE "accounts_account"') for sql in statements), 2)
+        self.assertEqual(sum(sql.startswith('INSERT INTO "accounts_transaction"') for sql in statements), 1)
+        self.assertEqual(list(Account.objects.order_by('pk').values_list('balance', flat=True)), [Decimal('1010.00'), Decimal('120.00')])
+
+    @override_settings(ACCOUNTS_POSTING_MODE='queued')
+    def test_queued_mode_setting(self):
+        """In queued mode every post is queued; invalid ones are still rejected right away."""
+        response = self.client.post('/api/transactions/', {'account': self.account.id, 'type': 'deposit', 'amount': '5.00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        response = self.client.post('/api/transactions/', {'account': self.account.id, 'type': 'withdrawal', 'amount': '5000.00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(QueuedMovement.objects.count(), 1)
+
+    def test_retry_with_idempotency_key_is_queued_once(self):
+        """Idempotency-Key replays the 202 instead of queueing the movement again."""
+        first = self.enqueue(self.account, 'deposit', '5.00', HTTP_IDEMPOTENCY_KEY='queued-1')
+        retry = self.enqueue(self.account, 'deposit', '5.00', HTTP_IDEMPOTENCY_KEY='queued-1')
+        self.assertEqual(retry.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(QueuedMovement.objects.count(), 1)
+
+
+class TransferTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.source = Account.objects.create(iban='ES7921000813610123456789', balance=100)
+        self.destination = Account.objects.create(iban='ES9121000418450200051332', balance=0)
+
+    def test_transfer_moves_money_between_accounts(self):
+        """A transfer debits the source and credits the destination atomically."""
+        response = self.client.post('/api/transfers/', {'source': self.source.id, 'destination': self.destination.id, 'amount': '40'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['debit']['type'], 'transfer')
+        self.assertEqual(response.data['debit']['balance'], '60.00')
+        self.assertEqual(response.data['credit']['type'], 'deposit')
+        self.assertEqual(response.data['credit']['balance'], '40.00')
+        debit = Transaction.objects.get(pk=response.data['debit']['id'])
+        self.assertEqual(debit.counterparty, self.destination)
+        self.source.refresh_from_db()
+        self.destination.refresh_from_db()
+        self.assertEqual((self.source.balance, self.destination.balance), (60, 40))
+
+    def test_transfer_insufficient_funds_moves_nothing(self):
+        """A transfer the source cannot cover leaves both accounts untouched."""
+        response = self.client.post('/api/transfers/', {'source': self.source.id, 'destination': self.destination.id, 'amount': '100.01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Transaction.objects.count(), 0)
+        self.destination.refresh_from_db()
+        self.assertEqual(self.destination.balance, 0)
+
+    def test_transfer_validation(self):
+        """Transfers to the same account, of non-positive amounts or to unknown accounts are rejected."""
+        for payload in [{'source': self.source.id, 'destination': self.source.id, 'amount': '1'},
+                        {'source': self.source.id, 'destination': self.destination.id, 'amount': '-5'},
+                        {'source': self.source.id, 'destination': 999999, 'amount': '1'}]:
+            response = self.client.post('/api/transfers/', payload)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Transaction.objects.count(), 0)
+
+    def test_batch_transfers_are_netted(self):
+        """Batched transfers run in order and each account balance is updated once."""
+        transfers = [
+            {'source': self.source.id, 'destination': self.destination.id, 'amount': '70'},
+            {'source': self.destination.id, 'destination': self.source.id, 'amount': '20'},
+            {'source': self.source.id, 'destination': self.destination.id, 'amount': '60'},
+            {'source': self.destination.id, 'destination': self.source.id, 'amount': '30'},
+        ]
+        with self.assertNumQueries(10):
+            # savepoint, lock, insert, event log, snapshots, summaries (read and upsert), two balance updates, release
+            response = self.client.post('/api/transfers/batch/', transfers, format='json')
+        self.assertEqual([row['status'] for row in response.data['results']], ['accepted', 'accepted', 'rejected', 'accepted'])
+        self.source.refresh_from_db()
+        self.destination.refresh_from_db()
+        self.assertEqual((self.source.balance, self.destination.balance), (80, 20))
+        self.assertEqual(Transaction.objects.count(), 6)
+
+
+@override_settings(ACCOUNTS_CACHE_ENABLED=True)
+class ReadThroughCacheTest(TestCase):
+    def setUp(self):
+        cache.get_cache().clear()
+        cache.metrics.reset()
+        self.client = APIClient()
+        self.account = Account.objects.create(iban='ES7921000813610123456789', balance=100)
+        for _ in range(3):
+            Transaction.objects.create(account=self.account, type='deposit', amount=Decimal('10'))
+
+    def test_account_reads_are_cached(self):
+        """Repeated account reads are answered without querying the database."""
+        self.client.get(f'/api/accounts/{self.account.id}/')
+        self.client.get('/api/accounts/')
+        with self.assertNumQueries(0):
+            detail = self.client.get(f'/api/accounts/{self.account.id}/')
+            listing = self.client.get('/api/accounts/')
+        self.assertEqual(detail.data['balance'], '130.00')
+        self.assertEqual(listing.data[0]['balance'], '130.00')
+
+    def test_posting_invalidates_account_and_statement(self):
+        """A successful post is visible in the very next read of the account and the statement."""
+        self.client.get(f'/api/accounts/{self.account.id}/')
+        self.client.get('/api/accounts/')
+        self.client.get('/api/transactions/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/transactions/', {'account': self.account.id, 'type': 'withdrawal', 'amount': '30'})
+        self.assertEqual(self.client.get(f'/api/accounts/{self.account.id}/').data['balance'], '100.00')
+        self.assertEqual(self.client.get('/api/accounts/').data[0]['balance'], '100.00')
+        self.assertEqual(self.client.get('/api/transactions/').data['count'], 4)
+
+    def test_account_update_invalidates_account(self):
+        """Editing an account through the API drops its cached reads."""
+        self.client.get(f'/api/accounts/{self.account.id}/')
+        self.client.patch(f'/api/accounts/{self.account.id}/', {'iban': 'ES9121000418450200051332'})
+        self.assertEqual(self.client.get(f'/api/accounts/{self.account.id}/').data['iban'], 'ES9121000418450200051332')
+
+    def test_only_first_statement_pages_are_cached(self):
+        """Page-number pages up to the configured depth and the first keyset page are cached."""
+        for params in [{}, {'page': 2, 'page_size': 1}, {'cursor': ''}, {'page': 3, 'page_size': 1}]:
+            self.client.get('/api/transactions/', params)
+            with self.assertNumQueries(0):
+                self.client.get('/api/transactions/', params)
+        # Deeper keyset pages read the archive horizons and the page.
+        with self.assertNumQueries(2):
+            self.client.get('/api/transactions/', {'cursor': KeysetPagination.make_cursor(datetime.now(dt_timezone.utc), 1)})
+
+    def test_transaction_edit_and_delete_invalidate_statement(self):
+        """Transactions changed one by one outside the posting path (e.g. in the admin) drop cached statements."""
+        entry = self.account.transactions.order_by('id').first()
+        self.client.get('/api/transactions/')
+        entry.amount = Decimal('12.50')
+        entry.save()
+        self.assertIn('12.50', [row['amount'] for row in self.client.get('/api/transactions/').data['results']])
+        entry.delete()
+        self.assertEqual(self.client.get('/api/transactions/').data['count'], 2)
+
+    @override_settings(ACCOUNTS_CACHED_STATEMENT_PAGES=0)
+    def test_cached_statement_pages_are_read_per_request(self):
+        """ACCOUNTS_CACHED_STATEMENT_PAGES takes effect without a restart."""
+        self.client.get('/api/transactions/')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/transactions/')
+        self.assertTrue(queries.captured_queries)
+
+    @override_settings(ACCOUNTS_CACHE_ENABLED=None)
+    def test_cache_needs_a_shared_backend(self):
+        """Unless forced on, the cache is only used with a backend every process shares."""
+        self.assertFalse(cache.enabled())
+        self.client.get(f'/api/accounts/{self.account.id}/')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f'/api/accounts/{self.account.id}/')
+        self.assertTrue(queries.captured_queries)
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                                                   'LOCATION': 'accounts_cache'}}):
+            self.assertTrue(cache.enabled())
+
+    def test_forcing_a_per_process_cache_is_reported(self):
+        """ACCOUNTS_CACHE_ENABLED with the local-memory backend raises a system check warning."""
+        self.assertEqual([warning.id for warning in check_cache_backend(None)], ['accounts.W001'])
+        with override_settings(ACCOUNTS_CACHE_ENABLED=None):
+            self.assertEqual(check_cache_backend(None), [])
+
+    def test_read_racing_a_write_is_not_served(self):
+        """A value read before a write commits is stored under a version that is never read again."""
+        def stale_read():
+            Transaction.objects.create(account=self.account, type='deposit', amount=Decimal('10'))
+            return 'stale'
+        cache.cached(cache.ACCOUNT, self.account.id, 'detail', stale_read)
+        self.assertEqual(self.client.get(f'/api/accounts/{self.account.id}/').data['balance'], '140.00')
+
+    def test_cache_stats(self):
+        """Hits and misses are reported per cache scope."""
+        for _ in range(3):
+            self.client.get(f'/api/accounts/{self.account.id}/')
+        response = self.client.get('/api/cache/stats/')
+        self.assertEqual(response.data['account'], {'hits': 2, 'misses': 1, 'hit_ratio': 0.6667})
+
+
+class IdempotencyKeyTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.account = Account.objects.create(iban='ES7921000813610123456789', balance=100)
+        self.payload = {'account': self.account.id, 'type': 'withdrawal', 'amount': '30'}
+
+    def post(self, payload, key='retry-1', path='/api/transactions/'):
+        return self.client.post(path, payload, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_stored_response(self):
+        """A retry returns the original response from one lookup and posts nothing."""
+        first = self.post(self.payload)
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        with self.assertNumQueries(1):
+            retry = self.post(self.payload)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Transaction.objects.count(), 1)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, 70)
+
+    def test_queued_retry_replays_location(self):
+        """Replaying a queued 202 restores the Location of the queued movement and Preference-Applied."""
+        first = self.client.post('/api/transactions/', self.payload, format='json',
+                                 HTTP_IDEMPOTENCY_KEY='queued-1', HTTP_PREFER='respond-async')
+        self.assertEqual(first.status_code, status.HTTP_202_ACCEPTED)
+        retry = self.client.post('/api/transactions/', self.payload, format='json',
+                                 HTTP_IDEMPOTENCY_KEY='queued-1', HTTP_PREFER='respond-async')
+        self.assertEqual(retry.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry['Location'], first['Location'])
+        self.assertEqual(retry['Preference-Applied'], 'respond-async')
+        self.assertEqual(QueuedMovement.objects.count(), 1)
+
+    def test_requests_without_key_are_not_deduplicated(self):
+        """Without the header every POST is posted."""
+        self.client.post('/api/transactions/', self.payload, format='json')
+        self.client.post('/api/transactions/', self.payload, format='json')
+        self.assertEqual(Transaction.objects.count(), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_key_reused_for_different_request(self):
+        """Reusing a key with another body is rejected without posting."""
+        self.post(self.payload)
+        response = self.post({**self.payload, 'amount': '10'})
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_failed_request_is_not_stored(self):
+        """A rejected request can be retried with the same key once it can succeed."""
+        response = self.post({**self.payload, 'amount': '300'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        Transaction.objects.create(account=self.account, type='deposit', amount=Decimal('500'))
+        self.assertEqual(self.post({**self.payload, 'amount': '300'}).status_code, status.HTTP_201_CREATED)
+
+    def test_expired_key_is_processed_again(self):
+        """Keys older than the TTL are ignored, replaced and purged."""
+        self.post(self.payload)
+        IdempotencyKey.objects.update(created_at=datetime.now(dt_timezone.utc) - timedelta(days=2))
+        self.assertNotIn('Idempotent-Replayed', self.post(self.payload))
+        self.assertEqual(Transaction.objects.count(), 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+        IdempotencyKey.objects.update(created_at=datetime.now(dt_timezone.utc) - timedelta(days=2))
+        out = StringIO()
+        call_command('purge_idempotency_keys', stdout=out)
+        self.assertIn('Deleted 1 expired idempotency keys.', out.getvalue())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_transfer_and_bulk_endpoints(self):
+        """Transfers and bulk posts are deduplicated the same way."""
+        destination = Account.objects.create(iban='ES9121000418450200051332', balance=0)
+        transfer = {'source': self.account.id, 'destination': destination.id, 'amount': '10'}
+        for _ in range(2):
+            self.post(transfer, key='transfer-1', path='/api/transfers/')
+            self.post([self.payload], key='bulk-1', path='/api/transactions/bulk/')
+        self.assertEqual(Transaction.objects.count(), 3)
+
+
+@override_settings(ACCOUNTS_CACHE_ENABLED=True)
+class RequestMetricsTest(TestCase):
+    def setUp(self):
+        registry.reset()
+        cache.get_cache().clear()
+        self.client = APIClient()
+        self.account = Account.objects.create(iban='ES7921000813610123456789', balance=100)
+
+    def test_metrics_per_view(self):
+        """Latency, query count and database time are exported per resolved view."""
+        self.client.get(f'/api/accounts/{self.account.id}/')
+        self.client.get(f'/api/accounts/{self.account.id}/')
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        labels = 'view="AccountDetail",method="GET"'
+        self.assertIn(f'accounts_request_duration_seconds_count{{{labels}}} 2', body)
+        # One query on the cache miss, none on the hit.
+        self.assertIn(f'accounts_request_queries_sum{{{labels}}} 1', body)
+        self.assertIn(f'accounts_request_queries_bucket{{{labels},le="0"}} 1', body)
+        self.assertIn(f'accounts_request_queries_bucket{{{labels},le="+Inf"}} 2', body)
+        self.assertIn(f'accounts_request_db_seconds_total{{{labels}}}', body)
+        self.assertIn('accounts_cache_hits_total{scope="account"} 1', body)
+
+    async def test_async_views_are_measured(self):
+        """Requests served by async views are counted under their own view name."""
+        await AsyncClient().get(f'/api/async/accounts/{self.account.id}/')
+        self.assertIn('accounts_request_queries_sum{view="AsyncAccountDetail",method="GET"} 1', registry.render())
+
+    @override_settings(ACCOUNTS_QUERY_BUDGET=0)
+    def test_query_budget_is_logged(self):
+        """Requests over the query budget are logged with their view and query count."""
+        with self.assertLogs('accounts.metrics', 'WARNING') as logs:
+            self.client.get('/api/accounts/')
+        self.assertIn('GET /api/accounts/ (AccountListCreate) ran 1 queries (budget 0)', logs.output[0])
+
+
+class ApiDocsTest(TestCase):
+    @skipUnless(settings.API_DOCS, 'API docs are disabled')
+    def test_schema_documents_view_parameters(self):
+        """The schema built on the first docs request includes the parameters declared on the views."""
+        response = self.client.get('/swagger/?format=openapi')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        paths = json.loads(response.content)['paths']
+        self.assertEqual([p['name'] for p in paths['/accounts/{id}/balance/']['get']['parameters']], ['as_of'])
+        self.assertIn('Idempotency-Key', [p['name'] for p in paths['/transactions/']['post']['parameters']])
+        self.assertIn('cursor', [p['name'] for p in paths['/transactions/']['get']['parameters']])
+        export = [p['name'] for p in paths['/transactions/export/']['get']['parameters']]
+        self.assertIn('output', export)
+        self.assertNotIn('cursor', export)
+
+    def test_worker_without_docs_never_imports_drf_yasg(self):
+        """A worker booted with API_DOCS=0 serves requests without importing drf_yasg."""
+        report, _ = _boot_worker('/api/metrics/', 'off')
+        self.assertEqual(report['status'], 200)
+        self.assertEqual(report['drf_yasg_modules'], 0)
+        self.assertEqual([step['step'] for step in report['steps']],
+                         ['interpreter', 'django.setup', 'wsgi handler', 'urlconf', 'first request'])
+
+
 class TransactionFilterTest(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -113,4 +1152,330 @@ class TransactionFilterTest(TestCase):
         for transaction in response.data['results']:
             transaction_date = transaction['date'].split('T')[0]
             self.assertEqual(transaction['type'], 'deposit')
-            self.assertIn(transaction_date, [self.yesterday.isoformat(), self.today.isoformat(), self.tomorrow.isoformat()])
\ No newline at end of file
+            self.assertIn(transaction_date, [self.yesterday.isoformat(), self.today.isoformat(), self.tomorrow.isoformat()])
+
+
+class AccountTransactionListTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.account = Account.objects.create(iban='ES7921000813610123456789', balance=1000)
+        self.other = Account.objects.create(iban='ES9121000418450200051332', balance=1000)
+        for kind in ['deposit', 'withdrawal', 'deposit']:
+            Transaction.objects.create(account=self.account, type=kind, amount=10)
+        for _ in range(5):
+            Transaction.objects.create(account=self.other, type='deposit', amount=1)
+
+    def test_statement_only_contains_account_transactions(self):
+        """The per-account statement leaves out other accounts' movements."""
+        response = self.client.get(f'/api/accounts/{self.account.id}/transactions/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([row['balance'] for row in response.data['results']], ['1010.00', '1000.00', '1010.00'])
+
+    def test_statement_filters_and_ordering(self):
+        """Type filters and ordering work on the per-account statement."""
+        response = self.client.get(f'/api/accounts/{self.account.id}/transactions/', {'type': 'deposit', 'ordering': 'date'})
+        self.assertEqual([row['balance'] for row in response.data['results']], ['1010.00', '1010.00'])
+        self.assertTrue(all(row['type'] == 'deposit' for row in response.data['results']))
+
+    def test_statement_query_count_does_not_grow_with_rows(self):
+        """Account check, archive horizons, count and page are four queries however many rows there are."""
+        with self.assertNumQueries(4):
+            self.client.get(f'/api/accounts/{self.other.id}/transactions/')
+
+    def test_statement_of_unknown_account(self):
+        """Asking for the statement of a missing account returns 404."""
+        response = self.client.get('/api/accounts/999999/transactions/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TransactionRowSerializerTest(TestCase):
+    def setUp(self):
+        self.account = Account.objects.create(iban='ES7921000813610123456789', balance=Decimal('99999.99'))
+        for kind, amount in [('deposit', '0.10'), ('withdrawal', '12345.6'), ('transfer', '1'), ('deposit', '0.05')]:
+            Transaction.objects.create(account=self.account, type=kind, amount=Decimal(amount))
+
+    def test_output_is_byte_identical_to_model_serializer(self):
+        """The fast path renders exactly the same JSON as TransactionSerializerBasic."""
+        statement = Transaction.objects.order_by('-date')
+        rows = TransactionRowSerializer()
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(rows.encode(rows.select(statement))),
+                         renderer.render(TransactionSerializerBasic(statement, many=True).data))
+
+    def test_statement_listing_uses_value_rows(self):
+        """The statement endpoint returns the model serializer's representation."""
+        response = APIClient().get('/api/transactions/')
+        expected = TransactionSerializerBasic(Transaction.objects.order_by('-date'), many=True).data
+        self.assertEqual(response.json()['results'], json.loads(JSONRenderer().render(expected)))
+
+
+class TransactionExportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.account = Account.objects.create(iban='ES7921000813610123456789', balance=1000)
+        self.other = Account.objects.create(iban='ES9121000418450200051332', balance=1000)
+        for kind in ['deposit', 'withdrawal', 'transfer']:
+            Transaction.objects.create(account=self.account, type=kind, amount=10)
+        Transaction.objects.create(account=self.other, type='deposit', amount=5)
+
+    def export(self, path, params):
+        response = self.client.get(path, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_ndjson_export_matches_statement(self):
+        """NDJSON rows are the same objects the paginated statement returns."""
+        listing = self.client.get('/api/transactions/', {'type': ['deposit', 'transfer']}).json()['results']
+        response, body = self.export('/api/transactions/export/', {'output': 'ndjson', 'type': ['deposit', 'transfer']})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([json.loads(line) for line in body.splitlines()], listing)
+
+    def test_csv_export_of_account(self):
+        """The account export is a CSV file with a header and only that account's rows."""
+        response, body = self.export(f'/api/accounts/{self.account.id}/transactions/export/', {'ordering': 'date'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment', response['Content-Disposition'])
+        lines = body.splitlines()
+        self.assertEqual(lines[0], 'date,type,amount,balance')
+        self.assertEqual([line.split(',')[1:] for line in lines[1:]],
+                         [['deposit', '10.00', '1010.00'], ['withdrawal', '10.00', '1000.00'], ['transfer', '10.00', '990.00']])
+
+    def test_unknown_output_format(self):
+        """Only csv and ndjson can be requested."""
+        response = self.client.get('/api/transactions/export/', {'output': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncViewsTest(TestCase):
+    def setUp(self):
+        self.client = AsyncClient()
+        self.account = Account.objects.create(iban='ES7921000813610123456789', balance=1000)
+        for kind in ['deposit', 'withdrawal', 'deposit']:
+            Transaction.objects.create(account=self.account, type=kind, amount=10)
+
+    async def test_async_statement_matches_sync_statement(self):
+        """The async statement returns the same page as TransactionListCreate."""
+        params = {'type': 'deposit', 'ordering': 'date', 'page_size': 1, 'page': 2}
+        response = await self.client.get('/api/async/transactions/', params)
+        expected = await AsyncClient().get('/api/transactions/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['count'], expected.json()['count'])
+        self.assertEqual(response.json()['results'], expected.json()['results'])
+
+    async def test_async_post_transaction(self):
+        """Posting through the async view moves the balance and rejects uncovered debits."""
+        response = await self.client.post('/api/async/transactions/', {'account': self.account.id, 'type': 'withdrawal', 'amount': '10'},
+                                          content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['balance'], '1000.00')
+        response = await self.client.post('/api/async/transactions/', {'account': self.account.id, 'type': 'transfer', 'amount': '5000'},
+                                          content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {'non_field_errors': ['Insufficient funds for this transaction.']})
+
+    async def test_async_accounts(self):
+        """Accounts can be created, listed and retrieved; duplicate IBANs are rejected."""
+        response = await self.client.post('/api/async/accounts/', {'iban': 'ES9121000418450200051332', 'balance': '5.00'},
+                                          content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        created = response.json()
+        duplicate = await self.client.post('/api/async/accounts/', {'iban': 'ES9121000418450200051332'}, content_type='application/json')
+        self.assertEqual(duplicate.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual((await self.client.get(f"/api/async/accounts/{created['id']}/")).json(), created)
+        self.assertEqual(len((await self.client.get('/api/async/accounts/')).json()), 2)
+        self.assertEqual((await self.client.get('/api/async/accounts/999999/')).status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(ACCOUNTS_CACHE_ENABLED=True)
+class CachedCountPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.account = Account.objects.create(iban='ES7921000813610123456789', balance=1000)
+        for n in range(25):
+            Transaction.objects.create(account=self.account, type='deposit' if n % 3 else 'withdrawal', amount=1)
+        cache.get_cache().clear()
+        self.addCleanup(cache.get_cache().clear)
+
+    def count_queries(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/transactions/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, sum('COUNT(' in query['sql'] for query in queries.captured_queries)
+
+    def test_counts_are_cached_per_filter_until_a_posting(self):
+        """Each filter combination is counted once; a posted transaction invalidates the counts."""
+        response, counts = self.count_queries({'page': 4, 'page_size': 5})
+        self.assertEqual((response.data['count'], response.data['count_exact'], counts), (25, True, 1))
+        response, counts = self.count_queries({'page': 5, 'page_size': 5})
+        self.assertEqual((response.data['count'], counts), (25, 0))
+        response, counts = self.count_queries({'page': 4, 'page_size': 2, 'type': 'withdrawal'})
+        self.assertEqual((response.data['count'], counts), (9, 1))
+
+        self.client.post('/api/transactions/', {'account': self.account.id, 'type': 'deposit', 'amount': '1.00'}, format='json')
+        response, counts = self.count_queries({'page': 5, 'page_size': 5})
+        self.assertEqual((response.data['count'], counts), (26, 1))
+
+    @override_settings(ACCOUNTS_COUNT_ESTIMATE_THRESHOLD=10)
+    def test_planner_estimates_above_threshold(self):
+        """Above the threshold the planner estimate is returned as an inexact count and pages end where the rows do."""
+        with patch('accounts.pagination.planner_estimate', return_value=1000):
+            response, counts = self.count_queries({'page': 4, 'page_size': 5})
+            self.assertEqual((response.data['count'], response.data['count_exact'], counts), (1000, False, 0))
+            self.assertIsNotNone(response.data['next'])
+            response, _ = self.count_queries({'page': 5, 'page_size': 5})
+            self.assertEqual(len(response.data['results']), 5)
+            self.assertIsNone(response.data['next'])
+            self.assertEqual(self.client.get('/api/transactions/', {'page': 6, 'page_size': 5}).status_code,
+                             status.HTTP_404_NOT_FOUND)
+            async_response = async_to_sync(AsyncClient().get)('/api/async/transactions/', {'page': 5, 'page_size': 5})
+            self.assertEqual(async_response.json()['count_exact'], False)
+            self.assertIsNone(async_response.json()['next'])
+
+    @override_settings(ACCOUNTS_COUNT_ESTIMATE_THRESHOLD=5)
+    def test_pages_past_an_underestimate(self):
+        """Pages beyond the estimated number of pages are served with their links while rows remain."""
+        with patch('accounts.pagination.planner_estimate', return_value=10):
+            for page in range(2, 6):
+                response, _ = self.count_queries({'page': page, 'page_size': 5})
+                self.assertEqual((response.data['count'], response.data['count_exact']), (10, False))
+                self.assertEqual(len(response.data['results']), 5)
+                self.assertIn(f'page={page - 1}' if page > 2 else 'page_size=5', response.data['previous'])
+                if page < 5:
+                    self.assertIn(f'page={page + 1}', response.data['next'])
+            self.assertIsNone(response.data['next'])
+            self.assertEqual(self.client.get('/api/transactions/', {'page': 6, 'page_size': 5}).status_code,
+                             status.HTTP_404_NOT_FOUND)
+
+    @override_settings(ACCOUNTS_COUNT_ESTIMATE_THRESHOLD=10)
+    def test_small_estimates_are_counted_exactly(self):
+        """Estimates below the threshold, or none at all (SQLite), fall back to an exact count."""
+        for estimate in [5, None]:
+            cache.get_cache().clear()
+            with patch('accounts.pagination.planner_estimate', return_value=estimate):
+                response, counts = self.count_queries({'page': 4, 'page_size': 5})
+            self.assertEqual((response.data['count'], response.data['count_exact'], counts), (25, True, 1))
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.account = Account.objects.create(iban='ES7921000813610123456789', balance=1000)
+        for n in range(25):
+            Transaction.objects.create(account=self.account, type='deposit' if n % 3 else 'withdrawal', amount=1)
+
+    def walk(self, params):
+        """Follow next links from the first keyset page and collect every page."""
+        pages = []
+        response = self.client.get('/api/transactions/', {'cursor': '', **params})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response.data)
+            if not response.data['next']:
+                return pages
+            response = self.client.get(response.data['next'])
+
+    def test_keyset_pages_cover_statement_in_order(self):
+        """Keyset pages walk the whole statement newest first without gaps or repeats."""
+        pages = self.walk({'page_size': 10})
+        self.assertEqual([len(page['results']) for page in pages], [10, 10, 5])
+        self.assertNotIn('count', pages[0])
+        balances = [row['balance'] for page in pages for row in page['results']]
+        expected = [str(b) for b in Transaction.objects.order_by('-date', '-id').values_list('balance_after', flat=True)]
+        self.assertEqual(balances, expected)
+
+    def test_keyset_respects_filters_and_ordering(self):
+        """Type filters and ascending ordering apply to keyset pages."""
+        pages = self.walk({'page_size': 4, 'type': 'withdrawal', 'ordering': 'date'})
+        rows = [row for page in pages for row in page['results']]
+        self.assertEqual(len(rows), 9)
+        self.assertTrue(all(row['type'] == 'withdrawal' for row in rows))
+        self.assertEqual([row['date'] for row in rows], sorted(row['date'] for row in rows))
+
+    def test_keyset_previous_link_returns_prior_page(self):
+        """Following previous from the second page returns the first page again."""
+        first = self.client.get('/api/transactions/', {'cursor': '', 'page_size': 10}).data
+        second = self.client.get(first['next']).data
+        self.assertIsNone(first['previous'])
+        self.assertEqual(self.client.get(second['previous']).data['results'], first['results'])
+
+    def test_keyset_page_runs_a_single_query(self):
+        """No COUNT(*) is issued for keyset pages: only the archive horizons and the page are read."""
+        with self.assertNumQueries(2):
+            self.client.get('/api/transactions/', {'cursor': ''})
+
+    def test_invalid_cursor(self):
+        """A cursor that cannot be decoded is reported as not found."""
+        response = self.client.get('/api/transactions/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+
+class StatementQueryPlanTest(TestCase):
+    """
+    Statement queries must be answered from the statement indexes, without
+    sorting the table (SQLite "USE TEMP B-TREE", PostgreSQL "Sort" nodes).
+
+    Statements read StatementEntry, the UNION ALL of the transaction table and
+    the archive. January 2024 is archived, so date ranges from February on are
+    pruned to the transaction table and ranges ending in January to the archive.
+    """
+    def setUp(self):
+        cache.get_cache().clear()
+        self.account = Account.objects.create(iban='ES7921000813610123456789', balance=1000)
+        ArchivedPeriod.objects.create(period=datetime(2024, 1, 1).date(), completed_at=datetime(2024, 2, 1, tzinfo=dt_timezone.utc))
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                # Tiny test tables would otherwise always be scanned sequentially.
+                cursor.execute('SET enable_seqscan = off')
+
+    def statement(self, params, account=None):
+        queryset = StatementEntry.objects.all()
+        if account is not None:
+            queryset = queryset.filter(account_id=account.id)
+        return TransactionFilter(params, queryset=queryset).qs
+
+    def pruned_to(self, queryset):
+        """The value the statement was pruned to on ``archived``, or None when it reads both tables."""
+        lookups = {child.lhs.target.name: child.rhs for child in queryset.query.where.children if hasattr(child, 'lhs')}
+        return lookups.get('archived')
+
+    def assertPlanUsesIndexes(self, queryset, *index_names):
+        plan = queryset.explain()
+        for index_name in index_names:
+            self.assertIn(index_name, plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+        self.assertNotRegex(plan, r'(?m)^\s*(->\s*)?(Incremental )?Sort\b')
+
+    def test_account_statement_uses_account_date_indexes(self):
+        """Unpruned account statements merge both account/date indexes in either direction."""
+        queryset = self.statement({}, self.account)
+        self.assertIsNone(self.pruned_to(queryset))
+        indexes = ('transaction_account_date_idx', 'archived_account_date_idx')
+        self.assertPlanUsesIndexes(queryset.order_by('-date', '-id')[:10], *indexes)
+        self.assertPlanUsesIndexes(queryset.order_by('date', 'id')[:10], *indexes)
+
+    def test_account_statement_by_date_range_uses_account_date_index(self):
+        """Date ranges pruned to one table narrow that table's account/date index scan."""
+        recent = self.statement({'start_date': '2024-03-01', 'end_date': '2024-12-31'}, self.account)
+        self.assertIs(self.pruned_to(recent), False)
+        self.assertPlanUsesIndexes(recent.order_by('-date', '-id')[:10], 'transaction_account_date_idx')
+        archived = self.statement({'start_date': '2023-12-01', 'end_date': '2024-01-15'}, self.account)
+        self.assertIs(self.pruned_to(archived), True)
+        self.assertPlanUsesIndexes(archived.order_by('-date', '-id')[:10], 'archived_account_date_idx')
+
+    def test_account_statement_by_type_uses_account_type_indexes(self):
+        """Type and date filters use the account/type/date index of each table."""
+        queryset = self.statement({'type': ['deposit'], 'start_date': '2023-06-01'}, self.account)
+        self.assertPlanUsesIndexes(queryset.order_by('date')[:10], 'transaction_account_type_idx', 'archived_account_type_idx')
+        pruned = self.statement({'type': ['deposit'], 'start_date': '2024-03-01'}, self.account)
+        self.assertPlanUsesIndexes(pruned.order_by('date')[:10], 'transaction_account_type_idx')
+
+    def test_global_statement_uses_date_indexes(self):
+        """The statement across all accounts walks the date index of each table, pruned or not."""
+        indexes = ('transaction_date_idx', 'archived_date_idx')
+        self.assertPlanUsesIndexes(self.statement({}).order_by('-date')[:10], *indexes)
+        self.assertPlanUsesIndexes(self.statement({}).order_by('-date', '-id')[:10], *indexes)
+        pruned = self.statement({'start_date': '2024-03-01'})
+        self.assertPlanUsesIndexes(pruned.order_by('-date', '-id')[:10], 'transaction_date_idx')
\ No newline at end of file
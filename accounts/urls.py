@@ -1,8 +1,24 @@
 from django.urls import path
-from .views import AccountListCreate, TransactionListCreate, AccountDetail
+from .async_views import AsyncAccountListCreate, AsyncAccountDetail, AsyncTransactionListCreate, AsyncTransactionDetail
+from .views import AccountListCreate, AccountBalance, AccountSummary, TransactionListCreate, TransactionBulkCreate, AccountDetail, AccountTransactionList, TransactionExport, AccountTransactionExport, QueuedMovementDetail, TransferCreate, TransferBatchCreate, CacheStats, Metrics
 
 urlpatterns = [
     path('accounts/', AccountListCreate.as_view(), name='account-list-create'),
     path('accounts/<int:pk>/', AccountDetail.as_view(), name='account-detail'),
+    path('accounts/<int:pk>/balance/', AccountBalance.as_view(), name='account-balance'),
+    path('accounts/<int:pk>/summary/', AccountSummary.as_view(), name='account-summary'),
+    path('accounts/<int:pk>/transactions/', AccountTransactionList.as_view(), name='account-transaction-list'),
+    path('accounts/<int:pk>/transactions/export/', AccountTransactionExport.as_view(), name='account-transaction-export'),
     path('transactions/', TransactionListCreate.as_view(), name='transaction-list-create'),
+    path('transactions/bulk/', TransactionBulkCreate.as_view(), name='transaction-bulk-create'),
+    path('transactions/export/', TransactionExport.as_view(), name='transaction-export'),
+    path('transactions/queue/<int:pk>/', QueuedMovementDetail.as_view(), name='queued-movement-detail'),
+    path('transfers/', TransferCreate.as_view(), name='transfer-create'),
+    path('transfers/batch/', TransferBatchCreate.as_view(), name='transfer-batch-create'),
+    path('cache/stats/', CacheStats.as_view(), name='cache-stats'),
+    path('metrics/', Metrics.as_view(), name='metrics'),
+    path('async/accounts/', AsyncAccountListCreate.as_view(), name='async-account-list-create'),
+    path('async/accounts/<int:pk>/', AsyncAccountDetail.as_view(), name='async-account-detail'),
+    path('async/transactions/', AsyncTransactionListCreate.as_view(), name='async-transaction-list-create'),
+    path('async/transactions/<int:pk>/', AsyncTransactionDetail.as_view(), name='async-transaction-detail'),
 ]
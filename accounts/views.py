@@ -1,34 +1,263 @@
-from rest_framework import generics, filters
-from rest_framework.exceptions import ValidationError
+import datetime
+import hashlib
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import generics, filters, status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.response import Response
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django_filters import rest_framework as django_filters
+from . import cache
+from .exports import EXPORT_FORMATS
+from .metrics import registry
 from .filters import TransactionFilter
-from .models import Account, Transaction
-from .serializers import AccountSerializer, TransactionSerializer, TransactionSerializerBasic
-from .pagination import StandardResultsSetPagination
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from .ledger import error_detail, post_movements, post_transfers
+from .models import Account, DailySummary, IdempotencyKey, QueuedMovement, StatementEntry
+from .parsers import NDJSONParser
+from .retries import retry_on_lock
+from .serializers import AccountSerializer, AccountBalanceSerializer, QueuedMovementSerializer, SummaryQuerySerializer, SummaryRowSerializer, TransactionSerializer, TransactionSerializerBasic, TransactionBulkItemSerializer, TransactionRowSerializer, TransferSerializer
+from .pagination import StatementPagination
+from .docs import openapi, swagger_auto_schema
+
+filter_parameters = [
+    openapi.Parameter('type', openapi.IN_QUERY, description="Filter by transaction type (deposit, withdrawal, transfer)", type=openapi.TYPE_ARRAY,items=openapi.Items(type=openapi.TYPE_STRING),collection_format='multi'),
+    openapi.Parameter('start_date', openapi.IN_QUERY, description="Filter transactions after this date (yyyy-mm-dd)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+    openapi.Parameter('end_date', openapi.IN_QUERY, description="Filter transactions before this date (yyyy-mm-dd)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+    openapi.Parameter('ordering', openapi.IN_QUERY, description="Sort account statement by date in ascending(date) and descending order(-date).", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+]
+statement_parameters = filter_parameters + [
+    openapi.Parameter('cursor', openapi.IN_QUERY, description="Use keyset pagination instead of page numbers. Send an empty cursor for the first page, then follow the next/previous links.", type=openapi.TYPE_STRING),
+]
+
+
+class StatementViewMixin:
+    """
+    Listing configuration shared by the transaction statement views:
+    type/date filters, date ordering and page-number or keyset pagination.
+    Statements read recent and archived transactions through StatementEntry.
+    """
+
+    queryset = StatementEntry.objects.all().order_by('-date')
+    serializer_class = TransactionSerializerBasic
+    filter_backends = [django_filters.DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = TransactionFilter
+    ordering_fields = ['date']
+    pagination_class = StatementPagination
+    row_serializer_class = TransactionRowSerializer
+    cached_pages = 0
+
+    def list(self, request, *args, **kwargs):
+        """
+        List the statement through the value-row fast path: rows are fetched with
+        ``.values()`` and encoded by TransactionRowSerializer, which returns the same
+        output as TransactionSerializerBasic without building model instances.
+
+        The first ``cached_pages`` pages (and the first keyset page) are served from
+        the statement cache, which every posted transaction invalidates.
+        """
+        if self.is_cached_page(request):
+            variant = hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+            return Response(cache.cached(cache.STATEMENT, '', variant, lambda: self.list_page(request).data))
+        return self.list_page(request)
+
+    def is_cached_page(self, request):
+        params = request.query_params
+        if 'cursor' in params:
+            return not params['cursor']
+        try:
+            return int(params.get('page', 1)) <= self.cached_pages
+        except ValueError:
+            return False
+
+    def list_page(self, request):
+        row_serializer = self.row_serializer_class(self.serializer_class)
+        queryset = row_serializer.select(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.encode(page))
+        return Response(row_serializer.encode(queryset))
+
+
+idempotency_parameters = [
+    openapi.Parameter('Idempotency-Key', openapi.IN_HEADER, description="Unique key for this request. Retrying with the same key and body returns the stored response instead of posting again.", type=openapi.TYPE_STRING),
+]
+
+
+class IdempotentPostMixin:
+    """
+    Support for the ``Idempotency-Key`` header on POST endpoints.
+
+    The first request with a key runs normally; its response is stored in the same database transaction
+    as the writes it made. A retry with the same key and body gets the stored response back from one
+    indexed lookup, without validation or touching accounts. Reusing a key for a different request is
+    answered with 422. Failed requests (raised errors) are not stored, so they can be retried.
+    A request whose writes failed on lock contention is run again as a whole.
+    """
+
+    idempotency_header = 'Idempotency-Key'
+    # Response headers stored with the body, e.g. where a queued movement can be followed.
+    replayed_headers = ('Location', 'Preference-Applied')
+
+    @retry_on_lock
+    def idempotent(self, request, handler):
+        key = request.headers.get(self.idempotency_header)
+        if not key:
+            return handler()
+        if len(key) > IdempotencyKey.KEY_MAX_LENGTH:
+            raise ValidationError({self.idempotency_header: [f'Ensure this value has at most {IdempotencyKey.KEY_MAX_LENGTH} characters.']})
+
+        fingerprint = IdempotencyKey.fingerprint_request(request.method, request.path, request.body)
+        stored = IdempotencyKey.objects.replay(key)
+        if stored is not None:
+            return self.replay(stored, fingerprint)
+        try:
+            with transaction.atomic():
+                response = handler()
+                IdempotencyKey.objects.filter(key=key).expired().delete()
+                IdempotencyKey.objects.create(
+                    key=key, fingerprint=fingerprint, status_code=response.status_code, response=response.data,
+                    headers={name: response[name] for name in self.replayed_headers if response.has_header(name)},
+                )
+        except IntegrityError:
+            # A concurrent request with the same key committed first; this one's writes were rolled back.
+            stored = IdempotencyKey.objects.replay(key)
+            if stored is None:
+                raise
+            return self.replay(stored, fingerprint)
+        return response
+
+    def replay(self, stored, fingerprint):
+        if stored['fingerprint'] != fingerprint:
+            return Response({'detail': f'{self.idempotency_header} was already used for a different request.'},
+                            status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return Response(stored['response'], status=stored['status_code'],
+                        headers={**stored['headers'], 'Idempotent-Replayed': 'true'})
+
 
 class AccountListCreate(generics.ListCreateAPIView):
     queryset = Account.objects.all()
     serializer_class = AccountSerializer
+    read_from_replica = True
+
+    def list(self, request, *args, **kwargs):
+        return Response(cache.cached(
+            cache.ACCOUNT_LIST, '', 'all',
+            lambda: [dict(row) for row in self.get_serializer(self.get_queryset(), many=True).data],
+        ))
+
+
+class AccountBalance(generics.GenericAPIView):
+    """
+    API view to read the balance of an account at a point in time.
+
+    - GET: Return the balance at ``as_of`` (a date for the end of that day, or a date and time; defaults to now),
+      computed from the nearest daily balance snapshot plus the movements of a single day.
+    """
+
+    queryset = Account.objects.all()
+    serializer_class = AccountBalanceSerializer
+
+    @swagger_auto_schema(
+        operation_description="Retrieve the balance of an account at a point in time.",
+        responses={200: AccountBalanceSerializer(), 400: "Invalid as_of", 404: "Account not found"},
+        manual_parameters=[
+            openapi.Parameter('as_of', openapi.IN_QUERY, description="Date (yyyy-mm-dd, end of day) or date and time (ISO 8601). Defaults to now.", type=openapi.TYPE_STRING),
+        ]
+    )
+    def get(self, request, *args, **kwargs):
+        account = self.get_object()
+        as_of = self.parse_as_of(request.query_params.get('as_of'))
+        serializer = self.get_serializer({'account': account.pk, 'as_of': as_of, 'balance': account.balance_as_of(as_of)})
+        return Response(serializer.data)
 
+    def parse_as_of(self, value):
+        if not value:
+            return timezone.now()
+        try:
+            day = parse_date(value)
+            if day is not None:
+                moment = datetime.datetime.combine(day, datetime.time.max)
+            else:
+                moment = parse_datetime(value)
+        except ValueError:
+            moment = None
+        if moment is None:
+            raise ValidationError({'as_of': ['Enter a date (yyyy-mm-dd) or an ISO 8601 date and time.']})
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
 
 
-class TransactionListCreate(generics.ListCreateAPIView):
+class AccountSummary(generics.GenericAPIView):
+    """
+    API view to summarize the statement of an account.
+
+    - GET: Total amount and number of transactions per type and per day or month in a date range, read from
+      the daily summary rollups kept up to date as transactions are posted. The cost follows the number of
+      days in the range, not the number of transactions of the account.
+    """
+
+    queryset = Account.objects.all()
+    serializer_class = SummaryRowSerializer
+
+    @swagger_auto_schema(
+        operation_description="Retrieve totals and counts per transaction type per day or month for an account.",
+        responses={200: SummaryRowSerializer(many=True), 400: "Invalid parameters", 404: "Account not found"},
+        query_serializer=SummaryQuerySerializer
+    )
+    def get(self, request, *args, **kwargs):
+        query = SummaryQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        account_id = self.kwargs['pk']
+        if not Account.objects.filter(pk=account_id).exists():
+            raise NotFound('Account not found.')
+
+        summaries = DailySummary.objects.filter(account_id=account_id)
+        if params.get('start_date'):
+            summaries = summaries.filter(day__gte=params['start_date'])
+        if params.get('end_date'):
+            summaries = summaries.filter(day__lte=params['end_date'])
+        if params.get('type'):
+            summaries = summaries.filter(type__in=params['type'])
+        label = '%Y-%m-%d' if params['period'] == 'day' else '%Y-%m'
+        rows = [
+            {'period': start.strftime(label), 'type': type, 'total': total, 'count': count}
+            for start, type, total, count in summaries.totals(params['period'])
+        ]
+        return Response({
+            'account': int(account_id),
+            'period': params['period'],
+            'start_date': params.get('start_date'),
+            'end_date': params.get('end_date'),
+            'results': self.get_serializer(rows, many=True).data,
+        })
+
+
+class TransactionListCreate(IdempotentPostMixin, StatementViewMixin, generics.ListCreateAPIView):
     """
     API view to list and create transactions.
 
     - GET: Retrieve a list of transactions with optional filters for type, date range, and ordering.
+      Paginated by page number, or by keyset when a ``cursor`` parameter is given. The first pages are cached.
     - POST: Create a new transaction, ensuring that there are sufficient funds for withdrawals or transfers.
+      In queued mode (``ACCOUNTS_POSTING_MODE = "queued"`` or a ``Prefer: respond-async`` header) the
+      validated movement is stored in the posting queue instead and answered with 202 and its tracking
+      record; ``process_posting_queue`` posts it later.
     """
 
-    queryset = Transaction.objects.all().order_by('-date')
-    serializer_class = TransactionSerializerBasic
     create_serializer_class = TransactionSerializer
-    filter_backends = [django_filters.DjangoFilterBackend, filters.OrderingFilter]
-    filterset_class = TransactionFilter
-    ordering_fields = ['date']
-    pagination_class = StandardResultsSetPagination
+    read_from_replica = True
+
+    @property
+    def cached_pages(self):
+        return getattr(settings, 'ACCOUNTS_CACHED_STATEMENT_PAGES', 3)
 
     def get_serializer_class(self):
         """
@@ -41,24 +270,280 @@ class TransactionListCreate(generics.ListCreateAPIView):
     @swagger_auto_schema(
         operation_description="Retrieve a list of transactions, optionally filtered by type or date range.",
         responses={200: TransactionSerializerBasic(many=True)},
-        manual_parameters=[
-            openapi.Parameter('type', openapi.IN_QUERY, description="Filter by transaction type (deposit, withdrawal, transfer)", type=openapi.TYPE_ARRAY,items=openapi.Items(type=openapi.TYPE_STRING),collection_format='multi'),
-            openapi.Parameter('start_date', openapi.IN_QUERY, description="Filter transactions after this date (yyyy-mm-dd)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
-            openapi.Parameter('end_date', openapi.IN_QUERY, description="Filter transactions before this date (yyyy-mm-dd)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
-            openapi.Parameter('ordering', openapi.IN_QUERY, description="Sort account statement by date in ascending(date) and descending order(-date).", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
-        ]
+        manual_parameters=statement_parameters
     )
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
     
     @swagger_auto_schema(
         operation_description="Create a new transaction, ensuring sufficient funds.",
-        responses={201: TransactionSerializer(), 400: "Validation error or insufficient funds"}
+        responses={201: TransactionSerializer(), 202: QueuedMovementSerializer(), 400: "Validation error or insufficient funds", 422: "Idempotency-Key reused for a different request"},
+        manual_parameters=idempotency_parameters + [
+            openapi.Parameter('Prefer', openapi.IN_HEADER, description="Send respond-async to queue the transaction and get 202 with a tracking record.", type=openapi.TYPE_STRING),
+        ]
     )
     def post(self, request, *args, **kwargs):
-        return super().post(request, *args, **kwargs)
+        if self.is_queued(request):
+            return self.idempotent(request, lambda: self.enqueue(request))
+        return self.idempotent(request, lambda: super(TransactionListCreate, self).post(request, *args, **kwargs))
+
+    def is_queued(self, request):
+        preferences = [token.split(';')[0].strip().lower() for token in request.headers.get('Prefer', '').split(',')]
+        return 'respond-async' in preferences or getattr(settings, 'ACCOUNTS_POSTING_MODE', 'sync') == 'queued'
+
+    def enqueue(self, request):
+        """
+        Validate the movement like a synchronous post and store it in the posting queue.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        queued = QueuedMovement.objects.create(account=data['account'], type=data['type'], amount=data['amount'])
+        response = Response(QueuedMovementSerializer(queued).data, status=status.HTTP_202_ACCEPTED)
+        response['Location'] = reverse('queued-movement-detail', args=[queued.pk])
+        response['Preference-Applied'] = 'respond-async'
+        return response
+
+
+class BatchPostingMixin:
+    """
+    Shared handling for endpoints that post a list of rows: each row is validated on its own,
+    valid rows are posted in order in chunks, and each row is reported as accepted or rejected.
+    """
+
+    parser_classes = [JSONParser, NDJSONParser]
+    chunk_size = 5000
+
+    def post_batch(self, request, post, describe):
+        """
+        Post the rows of ``request.data`` with the ledger function ``post`` and return the
+        per-row report; ``describe`` turns a posted outcome into the fields of an accepted row.
+        """
+        if not isinstance(request.data, list):
+            raise ValidationError('Expected a list of rows.')
+
+        row_serializer = self.get_serializer()
+        results = [None] * len(request.data)
+        valid = []
+        for index, row in enumerate(request.data):
+            try:
+                valid.append((index, row_serializer.run_validation(row)))
+            except ValidationError as exc:
+                results[index] = {'index': index, 'status': 'rejected', 'errors': exc.detail}
+
+        for start in range(0, len(valid), self.chunk_size):
+            chunk = valid[start:start + self.chunk_size]
+            outcomes = post([data for _, data in chunk])
+            for (index, _), outcome in zip(chunk, outcomes):
+                if isinstance(outcome, DjangoValidationError):
+                    results[index] = {'index': index, 'status': 'rejected', 'errors': error_detail(outcome)}
+                else:
+                    results[index] = {'index': index, 'status': 'accepted', **describe(outcome)}
+
+        accepted = sum(1 for result in results if result['status'] == 'accepted')
+        return Response({'accepted': accepted, 'rejected': len(results) - accepted, 'results': results})
+
+
+class TransactionBulkCreate(IdempotentPostMixin, BatchPostingMixin, generics.GenericAPIView):
+    """
+    API view to post many transactions in one request.
+
+    - POST: Accept a JSON array or an NDJSON stream of transactions. Rows are posted in order in chunks,
+      one bulk insert and one balance update per account and chunk, and each row is reported as accepted or rejected.
+    """
+
+    serializer_class = TransactionBulkItemSerializer
+
+    @swagger_auto_schema(
+        operation_description="Post a JSON array or NDJSON stream (application/x-ndjson) of transactions.",
+        request_body=TransactionBulkItemSerializer(many=True),
+        responses={200: "Per-row accept/reject results", 400: "Body is not a list of transactions", 422: "Idempotency-Key reused for a different request"},
+        manual_parameters=idempotency_parameters
+    )
+    def post(self, request, *args, **kwargs):
+        return self.idempotent(request, lambda: self.post_batch(
+            request, post_movements, lambda entry: {'id': entry.pk, 'balance': str(entry.balance_after)}))
+
+
+class TransferCreate(IdempotentPostMixin, generics.GenericAPIView):
+    """
+    API view to transfer money between two accounts.
+
+    - POST: Debit the source and credit the destination in one database transaction, locking both accounts
+      in primary key order. Fails without moving any money if the source does not have sufficient funds.
+    """
+
+    serializer_class = TransferSerializer
+
+    @swagger_auto_schema(
+        operation_description="Transfer money between two accounts atomically.",
+        request_body=TransferSerializer(),
+        responses={201: "The debit and credit transactions", 400: "Validation error or insufficient funds", 422: "Idempotency-Key reused for a different request"},
+        manual_parameters=idempotency_parameters
+    )
+    def post(self, request, *args, **kwargs):
+        return self.idempotent(request, lambda: self.transfer(request))
+
+    def transfer(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        outcome = post_transfers([serializer.validated_data])[0]
+        if isinstance(outcome, DjangoValidationError):
+            raise ValidationError(error_detail(outcome))
+        debit, credit = outcome
+        return Response({'debit': TransactionSerializer(debit).data, 'credit': TransactionSerializer(credit).data},
+                        status=status.HTTP_201_CREATED)
+
+
+class TransferBatchCreate(IdempotentPostMixin, BatchPostingMixin, generics.GenericAPIView):
+    """
+    API view to execute many transfers in one request.
+
+    - POST: Accept a JSON array or an NDJSON stream of transfers. Each chunk runs in one database transaction,
+      transfers between the same accounts are netted into one balance update per account, and each row is
+      reported as accepted or rejected.
+    """
+
+    serializer_class = TransferSerializer
+
+    @swagger_auto_schema(
+        operation_description="Execute a JSON array or NDJSON stream (application/x-ndjson) of transfers.",
+        request_body=TransferSerializer(many=True),
+        responses={200: "Per-row accept/reject results", 400: "Body is not a list of transfers", 422: "Idempotency-Key reused for a different request"},
+        manual_parameters=idempotency_parameters
+    )
+    def post(self, request, *args, **kwargs):
+        return self.idempotent(request, lambda: self.post_batch(request, post_transfers, lambda legs: {
+            'debit': legs[0].pk, 'credit': legs[1].pk,
+            'source_balance': str(legs[0].balance_after), 'destination_balance': str(legs[1].balance_after),
+        }))
+
+
+class QueuedMovementDetail(generics.RetrieveAPIView):
+    """
+    API view to track a transaction posted in queued mode.
+
+    - GET: The queued movement with its status (pending, posted or rejected), and the resulting
+      transaction and balance or the rejection errors once the queue worker processed it.
+    """
+
+    queryset = QueuedMovement.objects.all()
+    serializer_class = QueuedMovementSerializer
+
+    @swagger_auto_schema(
+        operation_description="Track a queued transaction.",
+        responses={200: QueuedMovementSerializer(), 404: "Not found"}
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
 
 class AccountDetail(generics.RetrieveUpdateDestroyAPIView):
     queryset = Account.objects.all()
     serializer_class = AccountSerializer
+    read_from_replica = True
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(cache.cached(
+            cache.ACCOUNT, self.kwargs['pk'], 'detail',
+            lambda: dict(self.get_serializer(self.get_object()).data),
+        ))
+
+
+class CacheStats(generics.GenericAPIView):
+    """
+    API view to read the hit/miss counters of the account and statement caches.
+
+    - GET: Hits, misses and hit ratio per cache scope since this process started.
+    """
+
+    @swagger_auto_schema(
+        operation_description="Read the read-through cache hit/miss counters of this process.",
+        responses={200: "Hits, misses and hit ratio per cache scope"}
+    )
+    def get(self, request, *args, **kwargs):
+        return Response(cache.metrics.snapshot())
+
+
+class Metrics(generics.GenericAPIView):
+    """
+    API view to scrape request metrics.
+
+    - GET: Per-view latency and SQL query count histograms, database time and cache counters of this process,
+      in the Prometheus text exposition format.
+    """
+
+    @swagger_auto_schema(
+        operation_description="Request metrics in the Prometheus text format.",
+        responses={200: "Prometheus text exposition format"}
+    )
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class AccountStatementMixin(StatementViewMixin):
+    """
+    Narrows the statement to the account in the URL, answering 404 for unknown accounts.
+    """
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return StatementEntry.objects.none()
+        account_id = self.kwargs['pk']
+        if not Account.objects.filter(pk=account_id).exists():
+            raise NotFound('Account not found.')
+        return super().get_queryset().filter(account_id=account_id)
+
+
+class AccountTransactionList(AccountStatementMixin, generics.ListAPIView):
+    """
+    API view to list the transactions of one account.
+
+    - GET: Retrieve the statement of the account, with the same filters, ordering and pagination as the
+      transaction list. The account is narrowed in the database query, so the cost follows the size of
+      this account's history rather than the whole table.
+    """
+
+    @swagger_auto_schema(
+        operation_description="Retrieve the transactions of an account, optionally filtered by type or date range.",
+        responses={200: TransactionSerializerBasic(many=True), 404: "Account not found"},
+        manual_parameters=statement_parameters
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class TransactionExport(StatementViewMixin, generics.GenericAPIView):
+    """
+    API view to export a statement as a file.
+
+    - GET: Stream the filtered statement as CSV or NDJSON (``output`` parameter). Rows are read through a
+      chunked cursor and written as they are read, so memory stays flat for any date range.
+    """
+
+    output_query_param = 'output'
+
+    @swagger_auto_schema(
+        operation_description="Stream transactions as CSV or NDJSON, optionally filtered by type or date range.",
+        responses={200: "CSV or NDJSON file", 400: "Unknown output format"},
+        manual_parameters=filter_parameters + [
+            openapi.Parameter('output', openapi.IN_QUERY, description="Export format (csv, ndjson). Defaults to csv.", type=openapi.TYPE_STRING, enum=list(EXPORT_FORMATS)),
+        ]
+    )
+    def get(self, request, *args, **kwargs):
+        output = request.query_params.get(self.output_query_param, 'csv')
+        if output not in EXPORT_FORMATS:
+            raise ValidationError({self.output_query_param: [f'Choose one of: {", ".join(EXPORT_FORMATS)}.']})
+        content_type, stream = EXPORT_FORMATS[output]
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(stream(queryset), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="statement.{output}"'
+        return response
+
+
+class AccountTransactionExport(AccountStatementMixin, TransactionExport):
+    """
+    API view to export the statement of one account as a file.
+
+    - GET: Same as the transaction export, restricted to the account in the URL.
+    """
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -28,6 +29,11 @@ DEBUG = True
 ALLOWED_HOSTS = []
 
 
+# Serve the Swagger and ReDoc documentation. drf_yasg is only imported when
+# the docs are first requested; set API_DOCS=0 to leave them out entirely.
+API_DOCS = os.environ.get("API_DOCS", "1") == "1"
+
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -38,11 +44,13 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django_filters",
-    'drf_yasg',
+    *(["drf_yasg"] if API_DOCS else []),
     "accounts",
 ]
 
 MIDDLEWARE = [
+    "accounts.middleware.RequestMetricsMiddleware",
+    "accounts.middleware.ReplicaReadsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -83,6 +91,129 @@ DATABASES = {
     }
 }
 
+# High-throughput SQLite profile (set SQLITE_TUNED=0 for stock SQLite):
+# - WAL lets readers run alongside the single writer, and synchronous=NORMAL
+#   only syncs at checkpoints (safe in WAL mode).
+# - BEGIN IMMEDIATE takes the write lock when a transaction starts, so writers
+#   queue on the busy timeout instead of failing to upgrade a read lock.
+# - Connections are kept open between requests and tuned once when opened.
+if os.environ.get("SQLITE_TUNED", "1") == "1":
+    DATABASES["default"].update({
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "timeout": 20,
+            "transaction_mode": "IMMEDIATE",
+            "init_command": (
+                "PRAGMA journal_mode=WAL;"
+                "PRAGMA synchronous=NORMAL;"
+                "PRAGMA busy_timeout=20000;"
+                "PRAGMA mmap_size=268435456;"
+                "PRAGMA cache_size=-65536;"
+                "PRAGMA temp_store=MEMORY;"
+            ),
+        },
+    })
+
+# Set POSTGRES_DB to run against PostgreSQL instead (requires psycopg), e.g.
+# the "postgres" service of docker-compose.yml for benchmarks.
+if os.environ.get("POSTGRES_DB"):
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.environ["POSTGRES_DB"],
+        "USER": os.environ.get("POSTGRES_USER", "postgres"),
+        "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+        "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
+        "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+    }
+
+# Read replica (see accounts/routers.py): POSTGRES_REPLICA_HOST names a hot
+# standby of the PostgreSQL primary, SQLITE_REPLICA a SQLite file read with
+# query_only, e.g. a copy made with `sqlite3 db.sqlite3 ".backup replica.sqlite3"`.
+# Tests read the replica from the test database of "default".
+if os.environ.get("POSTGRES_DB") and os.environ.get("POSTGRES_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.environ["POSTGRES_REPLICA_HOST"],
+        "PORT": os.environ.get("POSTGRES_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        "TEST": {"MIRROR": "default"},
+    }
+elif os.environ.get("SQLITE_REPLICA") and not os.environ.get("POSTGRES_DB"):
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ["SQLITE_REPLICA"],
+        "OPTIONS": {"timeout": 20, "init_command": "PRAGMA query_only=ON;PRAGMA cache_size=-65536;"},
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["accounts.routers.ReplicaRouter"]
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+if os.environ.get("REDIS_URL"):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ["REDIS_URL"],
+    }
+
+# Read-through cache for account reads and the first statement pages
+# (see accounts/cache.py). It is only used with a backend shared by every
+# process, so invalidations reach all of them; None picks it from the backend.
+ACCOUNTS_CACHE_ENABLED = None
+ACCOUNTS_CACHE_ALIAS = "default"
+ACCOUNTS_CACHE_TIMEOUT = 60
+ACCOUNTS_CACHED_STATEMENT_PAGES = 3
+
+# Statement counts are cached per filter combination until the next posting.
+# Above this many rows (PostgreSQL planner estimate) the estimate is returned
+# instead of counting, with "count_exact": false; None always counts exactly.
+ACCOUNTS_COUNT_ESTIMATE_THRESHOLD = None
+
+# Seconds a stored Idempotency-Key response is replayed for. Expired keys are
+# ignored and removed by `python manage.py purge_idempotency_keys`.
+ACCOUNTS_IDEMPOTENCY_TTL = 24 * 60 * 60
+
+# Requests running more SQL queries than this are logged as warnings on the
+# "accounts.metrics" logger (None disables the check). Metrics are served at
+# /api/metrics/.
+ACCOUNTS_QUERY_BUDGET = 20
+
+# Writes failing on lock contention ("database is locked", deadlocks) are
+# retried this many times in total, backing off exponentially from this many seconds.
+ACCOUNTS_LOCK_RETRIES = 5
+ACCOUNTS_LOCK_RETRY_BACKOFF = 0.02
+
+# "sync" posts POST /api/transactions/ in the request; "queued" stores it in
+# the posting queue and answers 202, leaving the posting to
+# `python manage.py process_posting_queue`. Clients can ask for the queued
+# mode per request with a "Prefer: respond-async" header.
+ACCOUNTS_POSTING_MODE = "sync"
+
+# Databases that GET requests of the account list, account detail and
+# statement views read from (empty: everything uses "default"). A client that
+# wrote reads from the primary for ACCOUNTS_REPLICA_PIN_SECONDS afterwards;
+# keep it above the usual replication lag.
+ACCOUNTS_READ_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+ACCOUNTS_REPLICA_PIN_SECONDS = 5
+
+# Event log projections (see accounts/projections.py) wait this long for a
+# posting with a lower sequence number to commit before skipping its gap in
+# the log as a rollback. Keep it above the longest posting transaction.
+ACCOUNTS_EVENT_GAP_SECONDS = 60
+
+# Storage of amounts and balances (see accounts/money.py): "decimal" NUMERIC
+# columns or "cents", 64-bit integers of minor units. The API is the same in
+# both modes. After changing it on an existing database run
+# `python manage.py convert_money_storage`.
+ACCOUNTS_MONEY_STORAGE = os.environ.get("ACCOUNTS_MONEY_STORAGE", "decimal")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -14,28 +14,20 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 
-schema_view = get_schema_view(
-   openapi.Info(
-      title="Bank Account API",
-      default_version='v1',
-      description="API documentation for the Bank Account project",
-      terms_of_service="https://www.google.com/policies/terms/",
-      contact=openapi.Contact(email="contact@bank.local"),
-      license=openapi.License(name="BSD License"),
-   ),
-   public=True,
-   permission_classes=(permissions.AllowAny,),
-)
-
 urlpatterns = [
     path("admin/", admin.site.urls),
     path('api/', include('accounts.urls')),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 ]
+
+# drf_yasg is imported on the first request for the docs (see accounts/docs.py).
+if settings.API_DOCS:
+    from accounts.docs import docs_view
+
+    urlpatterns += [
+        path('swagger/', docs_view('swagger'), name='schema-swagger-ui'),
+        path('redoc/', docs_view('redoc'), name='schema-redoc'),
+    ]